@@ -0,0 +1,44 @@
+"""
+CPU ASR: single faster-whisper call over the whole file vs. silence-split chunks
+transcribed in a process pool (workers x cpu_threads).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_asr_parallel <audio_16k.wav> [--workers 4] [--threads 4]
+"""
+import argparse
+import time
+from faster_whisper import WhisperModel
+from config import Config
+from core.asr import ASRProcessor
+from core.audio import AudioProcessor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio_path", help="16 kHz mono WAV (e.g. output of AudioProcessor.extract_audio)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=Config.ASR_CPU_THREADS)
+    args = parser.parse_args()
+
+    samples, sample_rate = AudioProcessor.load_wav(args.audio_path)
+    duration = len(samples) / sample_rate
+    print(f"Audio: {duration:.1f}s | model {Config.WHISPER_MODEL_SIZE} ({Config.WHISPER_COMPUTE_TYPE})")
+
+    # Single call gets the same total thread budget for a fair comparison
+    asr = ASRProcessor()
+    asr.model = WhisperModel(asr.model_files(), device="cpu", compute_type=Config.WHISPER_COMPUTE_TYPE,
+                             cpu_threads=args.workers * args.threads)
+    start = time.perf_counter()
+    single = list(asr.iter_segments(args.audio_path))
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = asr.transcribe_parallel(args.audio_path, workers=args.workers, cpu_threads=args.threads)
+    parallel_time = time.perf_counter() - start
+
+    print(f"{'single call':>16}: {single_time:8.1f}s | RTF {single_time / duration:.3f} | {len(single)} segments")
+    print(f"{f'{args.workers}x{args.threads} chunked':>16}: {parallel_time:8.1f}s | RTF {parallel_time / duration:.3f} | "
+          f"{len(parallel)} segments")
+    print(f"Speedup: {single_time / parallel_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Cold-start latency of the CLI: fresh `python main.py --help` (and `--check`) processes,
+plus the slowest modules from `python -X importtime`.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_cold_start [--runs 10] [--video input.mp4] [--top 10]
+
+Compare against the previous commit (eager torch / faster-whisper / transformers imports)
+with `git stash` or a checkout of the parent revision.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from config import Config
+
+def time_command(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=Config.BASE_DIR,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def slowest_imports(top):
+    result = subprocess.run([sys.executable, "-X", "importtime", "main.py", "--help"], cwd=Config.BASE_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--video", help="Also time `main.py <video> --check`")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    commands = [("--help", ["main.py", "--help"])]
+    if args.video:
+        commands.append(("--check", ["main.py", args.video, "--check"]))
+    for label, command in commands:
+        timings = time_command(command, args.runs)
+        print(f"main.py {label:>7}: median {statistics.median(timings) * 1000:7.1f} ms | "
+              f"min {min(timings) * 1000:7.1f} ms | max {max(timings) * 1000:7.1f} ms ({args.runs} runs)")
+
+    heavy = [m for m in ("torch", "faster_whisper", "transformers", "f5_tts", "pydub", "cv2")
+             if subprocess.run([sys.executable, "-c", f"import main, sys; sys.exit('{m}' in sys.modules)"],
+                               cwd=Config.BASE_DIR, capture_output=True).returncode]
+    print(f"Heavy modules imported by `import main`: {', '.join(heavy) or 'none'}")
+    print("Slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports(args.top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Throughput in videos/hour: one `python main.py <video>` process per file (interpreter
+start-up, imports and model loads every time) vs. the daemon's warm worker pool.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_daemon video1.mp4 video2.mp4 ... [--workers 2] [--lang en]
+
+Both modes run with --force-stage all so the stage cache does not hide the work.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from config import Config
+
+def run_one_shot(videos, lang):
+    start = time.perf_counter()
+    for video in videos:
+        subprocess.run([sys.executable, "main.py", video, lang, "--force-stage", "all"],
+                       cwd=Config.BASE_DIR, check=False, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def run_daemon(videos, lang, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        queue_file = Path(tmp) / "queue.jsonl"
+        run_id = int(time.time())
+        with open(queue_file, 'w', encoding='utf-8') as f:
+            for i, video in enumerate(videos):
+                f.write(json.dumps({"id": f"bench-{run_id}-{i}", "video_path": video,
+                                    "target_lang": lang, "force_stages": ["all"]}) + "\n")
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--daemon", "--queue", str(queue_file),
+                        "--workers", str(workers), "--exit-when-idle"],
+                       cwd=Config.BASE_DIR, check=False, stdout=subprocess.DEVNULL)
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--workers", type=int, default=Config.DAEMON_WORKERS)
+    parser.add_argument("--lang", default="en")
+    args = parser.parse_args()
+    videos = [str(Path(v).resolve()) for v in args.videos]
+
+    one_shot = run_one_shot(videos, args.lang)
+    daemon = run_daemon(videos, args.lang, args.workers)
+    for label, elapsed in (("one-shot CLI", one_shot), (f"daemon x{args.workers}", daemon)):
+        print(f"{label:>14}: {elapsed:8.1f}s | {len(videos) * 3600 / elapsed:6.1f} videos/hour")
+    print(f"Speedup: {one_shot / daemon:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+NLLB throughput on CPU: fixed groups of 16 in original order (previous behaviour)
+vs. length-sorted token-budget batching.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_nllb_batching [--segments 200] [--max-tokens 4096]
+"""
+import argparse
+import random
+import time
+from config import Config
+from core.translator import Translator
+
+WORDS = "我们 今天 来 聊 一下 这个 视频 里面 的 内容 非常 有意思 大家 可以 看看 然后 告诉 我 你们 的 想法".split()
+
+def build_texts(count, seed=0):
+    """Subtitle-like mix: mostly short lines with a long tail."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        length = rng.choice([3, 4, 5, 6, 8, 10, 12, 15, 20, 30, 45])
+        texts.append("".join(rng.choice(WORDS) for _ in range(length)) + "。")
+    return texts
+
+def legacy_translate(translator, texts, batch_size=16):
+    """The pre-bucketing local path: fixed batches in original order, max_length=100."""
+    forced_bos = translator.tokenizer.convert_tokens_to_ids(translator.target_code)
+    results = []
+    for i in range(0, len(texts), batch_size):
+        inputs = translator.tokenizer(texts[i:i + batch_size], return_tensors="pt", padding=True, truncation=True)
+        tokens = translator.model.generate(**inputs, forced_bos_token_id=forced_bos, max_length=100,
+                                           length_penalty=1.0, num_beams=4)
+        results.extend(translator.tokenizer.batch_decode(tokens, skip_special_tokens=True))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=Config.NLLB_MAX_BATCH_TOKENS)
+    parser.add_argument("--target-lang", default="en")
+    args = parser.parse_args()
+
+    import torch
+    Config.NLLB_MAX_BATCH_TOKENS = args.max_tokens
+    # Compares generate() batching strategies, so always the eager PyTorch model
+    Config.NLLB_ENGINE = "transformers"
+    translator = Translator(target_lang=args.target_lang, use_local=True, source_lang="zh")
+    translator.model.to("cpu")
+    texts = build_texts(args.segments)
+    source_tokens = sum(len(ids) for ids in translator.tokenizer(texts)["input_ids"])
+    print(f"{len(texts)} segments, {source_tokens} source tokens, {torch.get_num_threads()} CPU threads")
+
+    # Warm-up
+    translator._translate_local(texts[:4])
+
+    timings = {}
+    for label, run in (("fixed-16", lambda: legacy_translate(translator, texts)),
+                       ("token-budget", lambda: translator._translate_local(texts))):
+        start = time.perf_counter()
+        with torch.inference_mode():
+            run()
+        timings[label] = time.perf_counter() - start
+        print(f"{label:>13}: {timings[label]:8.2f}s | {source_tokens / timings[label]:8.1f} tokens/s | "
+              f"{len(texts) / timings[label]:6.2f} seg/s")
+    print(f"Speedup: {timings['fixed-16'] / timings['token-budget']:.2f}x (max tokens {args.max_tokens})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Local NLLB-200 on CPU: eager PyTorch generate() (transformers) vs. the converted
+CTranslate2 model on the same segments. Every engine runs in its own process so
+peak memory is comparable. Reports load time, single-segment latency, batch
+throughput, peak RSS and how many outputs match the transformers path.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_nllb_ct2 [--segments 200] [--latency-samples 20]
+                                        [--compute-types int8,int8_float32]
+                                        [--intra-threads 4] [--inter-threads 1]
+
+The first CTranslate2 run converts the model into CHECKPOINTS_DIR (not timed).
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+from config import Config
+from benchmarks.bench_nllb_batching import build_texts
+
+def run_engine(engine, compute_type, args):
+    """Child process: loads one engine, times it and prints a RESULT line."""
+    from core.registry import _rss_bytes
+    from core.translator import Translator
+    Config.DEVICE = "cpu"
+    Config.NLLB_ENGINE = engine
+    Config.NLLB_CT2_COMPUTE_TYPE = compute_type
+    Config.NLLB_CT2_INTRA_THREADS = args.intra_threads
+    Config.NLLB_CT2_INTER_THREADS = args.inter_threads
+    if engine == "ctranslate2":
+        Translator.convert_ctranslate2()
+    else:
+        import torch
+        torch.set_num_threads(args.intra_threads)
+    texts = build_texts(args.segments, args.seed)
+
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    translator = Translator(target_lang=args.target_lang, use_local=True, source_lang="zh")
+    load_seconds = time.perf_counter() - started
+    translator._translate_local(texts[:4])  # Warm-up
+
+    latencies = []
+    for text in texts[:args.latency_samples]:
+        started = time.perf_counter()
+        translator._translate_local([text])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    outputs = translator._translate_local(texts)
+    elapsed = time.perf_counter() - started
+    source_tokens = sum(len(ids) for ids in translator.tokenizer(texts)["input_ids"])
+    print("RESULT " + json.dumps({
+        "load_seconds": load_seconds, "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p90": float(np.percentile(latencies, 90)), "batch_seconds": elapsed,
+        "tokens_per_second": source_tokens / elapsed, "segments_per_second": len(texts) / elapsed,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "model_rss_mb": (_rss_bytes() - rss_before) / 1024 ** 2, "outputs": outputs,
+    }, ensure_ascii=False), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument("--latency-samples", type=int, default=20, help="Segments timed one by one")
+    parser.add_argument("--compute-types", default="int8,int8_float32", help="CTranslate2 compute types to compare")
+    parser.add_argument("--intra-threads", type=int, default=Config.NLLB_CT2_INTRA_THREADS)
+    parser.add_argument("--inter-threads", type=int, default=Config.NLLB_CT2_INTER_THREADS)
+    parser.add_argument("--target-lang", default="en")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", help=argparse.SUPPRESS)  # Child mode: "transformers" or "ctranslate2:<type>"
+    args = parser.parse_args()
+
+    if args.engine:
+        engine, _, compute_type = args.engine.partition(":")
+        run_engine(engine, compute_type or None, args)
+        return
+
+    runs = ["transformers"] + [f"ctranslate2:{t.strip()}" for t in args.compute_types.split(",") if t.strip()]
+    results = {}
+    for run in runs:
+        print(f"⏱️ {run}...")
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_nllb_ct2", *sys.argv[1:], "--engine", run],
+                              capture_output=True, text=True)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("RESULT ")]
+        if proc.returncode != 0 or not lines:
+            print(f"❌ {run} failed:\n{proc.stderr[-1500:]}")
+            continue
+        results[run] = json.loads(lines[-1][len("RESULT "):])
+
+    print(f"\n{args.segments} segments, {args.intra_threads} intra / {args.inter_threads} inter threads")
+    print(f"{'engine':<26} {'load':>7} {'lat p50':>8} {'lat p90':>8} {'batch':>8} {'tok/s':>8} {'seg/s':>7} "
+          f"{'peak RSS':>9} {'model':>8} {'same':>6}")
+    reference = results.get("transformers")
+    for run, r in results.items():
+        same = (f"{np.mean([a == b for a, b in zip(r['outputs'], reference['outputs'])]):6.0%}"
+                if reference else f"{'-':>6}")
+        print(f"{run:<26} {r['load_seconds']:6.1f}s {r['latency_p50']:7.3f}s {r['latency_p90']:7.3f}s "
+              f"{r['batch_seconds']:7.2f}s {r['tokens_per_second']:8.1f} {r['segments_per_second']:7.2f} "
+              f"{r['peak_rss_mb']:7.0f}MB {r['model_rss_mb']:6.0f}MB {same}")
+    if reference:
+        for run, r in results.items():
+            if run != "transformers":
+                print(f"{run}: {reference['batch_seconds'] / r['batch_seconds']:.2f}x throughput, "
+                      f"{reference['latency_p50'] / r['latency_p50']:.2f}x latency, "
+                      f"{r['peak_rss_mb'] / reference['peak_rss_mb']:.0%} of the peak memory")
+
+if __name__ == "__main__":
+    main()
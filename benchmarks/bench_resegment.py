@@ -0,0 +1,97 @@
+"""
+Effect of resegmentation on TTS: renders the same transcript with Whisper's
+segmentation and after core.resegment, and reports F5-TTS wall time, per-segment
+latency percentiles and the chunk-length distribution for both.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_resegment <reference.wav> [--segments asr_artifact.npz]
+                                         [--max-seconds 8] [--batched]
+
+--segments takes an ASR cache artifact (CACHE_DIR/asr/<key>/artifact.npz); without
+it, a transcript of mixed short fragments and long run-on sentences is generated.
+"""
+import argparse
+import random
+import time
+import numpy as np
+from config import Config
+from core.audio import AudioProcessor
+from core.reference import ReferenceVoiceManager
+from core.resegment import Resegmenter
+from core.segments import SegmentStore
+from core.tts import TTSProcessor
+
+CLAUSES = ["so today we are looking at the new release", "and how it behaves in practice",
+           "which is a little different from last time", "thanks for watching", "okay",
+           "if you enjoyed it please subscribe", "let me show you the settings first"]
+
+def build_segments(count, seed=0):
+    """Whisper-like transcript: word timestamps, a few fragments, some 15-25 s run-on sentences."""
+    rng = random.Random(seed)
+    segments, t = [], 0.0
+    for _ in range(count):
+        clauses = rng.choice([1, 1, 2, 3, 6, 8])
+        words = []
+        for c in range(clauses):
+            tokens = rng.choice(CLAUSES).split()
+            for k, token in enumerate(tokens):
+                last = k == len(tokens) - 1
+                word = " " + token + (("." if c == clauses - 1 else ",") if last else "")
+                words.append({"start": t, "end": t + 0.3, "word": word, "probability": 0.9})
+                t += 0.3 + (rng.uniform(0.3, 0.7) if last else 0.05)
+        segments.append({"start": words[0]['start'], "end": words[-1]['end'],
+                         "text": "".join(w['word'] for w in words).strip(), "words": words})
+        t += rng.uniform(0.3, 1.5)
+    return segments
+
+def render(tts, segments, references, batched):
+    """Returns (wall seconds, per-segment seconds, dubbed audio seconds)."""
+    latencies, audio_seconds = [], 0.0
+    started = last = time.perf_counter()
+    for _, wav, wav_rate in tts._render_segments(segments, references, batched=batched):
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+        audio_seconds += len(wav) / wav_rate
+    return time.perf_counter() - started, np.array(latencies), audio_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("reference_wav", help="Speech WAV used as the cloning reference")
+    parser.add_argument("--segments", help="ASR artifact (.npz) to resegment instead of a generated transcript")
+    parser.add_argument("--count", type=int, default=40, help="Generated segments (without --segments)")
+    parser.add_argument("--max-seconds", type=float, default=Config.RESEGMENT_MAX_SECONDS)
+    parser.add_argument("--max-chars", type=int, default=Config.RESEGMENT_MAX_CHARS)
+    parser.add_argument("--batched", action="store_true", help="Render in length-bucketed batches")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    original = SegmentStore.load(args.segments) if args.segments else build_segments(args.count, args.seed)
+    original = list(original)
+    resegmenter = Resegmenter(max_seconds=args.max_seconds, max_chars=args.max_chars)
+    variants = {"whisper": original, "resegmented": list(resegmenter.resegment(original))}
+
+    audio, sample_rate = AudioProcessor.load_wav(args.reference_wav)
+    # The whole reference clip is the voice prompt (the transcript's times need not fall inside it)
+    duration = min(len(audio) / sample_rate, 10.0)
+    references = ReferenceVoiceManager(audio, sample_rate, [{"start": 0.0, "end": duration, "text": "参考文本。"}])
+    tts = TTSProcessor()
+    tts.load_model()
+    # Warm-up so neither run pays kernel compilation / allocator growth
+    next(tts._render_segments(variants["whisper"][:1], references, batched=False))
+
+    results = {}
+    for label, segments in variants.items():
+        shape = Resegmenter.distribution(segments)
+        elapsed, latencies, audio_seconds = render(tts, segments, references, args.batched)
+        results[label] = elapsed
+        print(f"{label:>12}: {shape['count']:4d} segments | length p50 {shape['p50_seconds']:5.1f}s "
+              f"p90 {shape['p90_seconds']:5.1f}s max {shape['max_seconds']:5.1f}s std {shape['std_seconds']:4.1f}s | "
+              f"TTS {elapsed:7.2f}s ({audio_seconds / elapsed:5.2f}x realtime) | per segment p50 "
+              f"{np.percentile(latencies, 50):5.2f}s p90 {np.percentile(latencies, 90):5.2f}s "
+              f"max {latencies.max():5.2f}s")
+    print(f"TTS wall time: {results['whisper'] / results['resegmented']:.2f}x "
+          f"({'batched' if args.batched else 'per-segment'}, device {tts.device})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Fitting dubbed clips to their slots: pydub `speedup` vs. the vectorized phase vocoder
+(core.timestretch), per clip and batched. Reports throughput, how far each output is
+from its target length, and pitch drift on harmonic test clips.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_timestretch [--clips 300] [--min-speed 1.05] [--max-speed 1.5]
+                                          [--speech input.wav]
+
+With --speech, clips are cut from a real recording (pitch drift is then not reported).
+"""
+import argparse
+import time
+import numpy as np
+from core.audio import AudioProcessor
+from core.timestretch import stretch, stretch_batch
+
+SAMPLE_RATE = 24000  # F5-TTS output rate
+
+def harmonic_clips(count, rng):
+    """Voiced-like clips (0.5-6 s): a harmonic stack at a known pitch with syllable-rate modulation."""
+    clips, pitches = [], []
+    for _ in range(count):
+        n = int(rng.uniform(0.5, 6.0) * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        pitch = rng.uniform(110, 260)
+        voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in (1, 2, 3, 4))
+        clips.append((0.2 * voice * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2)).astype(np.float32))
+        pitches.append(pitch)
+    return clips, pitches
+
+def speech_clips(path, count, rng):
+    audio, sample_rate = AudioProcessor.load_wav(path)
+    from core.mixer import resample
+    audio = resample(audio, sample_rate, SAMPLE_RATE)
+    clips = []
+    for _ in range(count):
+        n = int(rng.uniform(0.5, 6.0) * SAMPLE_RATE)
+        start = int(rng.integers(0, max(len(audio) - n, 1)))
+        clips.append(audio[start:start + n])
+    return clips
+
+def dominant_pitch(clip, low=80, high=300):
+    spectrum = np.abs(np.fft.rfft(clip * np.hanning(len(clip))))
+    freqs = np.fft.rfftfreq(len(clip), 1 / SAMPLE_RATE)
+    band = (freqs >= low) & (freqs <= high)
+    return freqs[band][np.argmax(spectrum[band])]
+
+def pydub_speedup(clips, speeds):
+    from pydub import AudioSegment
+    outputs = []
+    for clip, speed in zip(clips, speeds):
+        pcm = np.clip(np.round(clip * 32768), -32768, 32767).astype(np.int16)
+        segment = AudioSegment(pcm.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+        fast = segment.speedup(playback_speed=speed, chunk_size=150, crossfade=25)
+        outputs.append(np.array(fast.get_array_of_samples(), dtype=np.float32) / 32768)
+    return outputs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=300)
+    parser.add_argument("--min-speed", type=float, default=1.05)
+    parser.add_argument("--max-speed", type=float, default=1.5)
+    parser.add_argument("--speech", help="WAV to cut clips from instead of synthetic harmonic clips")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    pitches = None
+    if args.speech:
+        clips = speech_clips(args.speech, args.clips, rng)
+    else:
+        clips, pitches = harmonic_clips(args.clips, rng)
+    speeds = rng.uniform(args.min_speed, args.max_speed, len(clips))
+    targets = [int(round(len(c) / s)) for c, s in zip(clips, speeds)]
+    audio_seconds = sum(len(c) for c in clips) / SAMPLE_RATE
+    print(f"{len(clips)} clips, {audio_seconds:.0f}s of audio, speed {args.min_speed}-{args.max_speed}x")
+
+    runs = [("per-clip", lambda: [stretch(c, SAMPLE_RATE, t) for c, t in zip(clips, targets)]),
+            ("batched", lambda: stretch_batch(clips, SAMPLE_RATE, targets))]
+    try:
+        import pydub  # noqa: F401
+        runs.insert(0, ("pydub", lambda: pydub_speedup(clips, speeds)))
+    except ImportError:
+        print("⚠️ pydub not installed, skipping the speedup baseline")
+
+    results = {}
+    for label, run in runs:
+        started = time.perf_counter()
+        outputs = run()
+        elapsed = time.perf_counter() - started
+        results[label] = elapsed
+        length_error_ms = np.mean([abs(len(o) - t) for o, t in zip(outputs, targets)]) / SAMPLE_RATE * 1000
+        line = (f"{label:>9}: {elapsed:7.2f}s | {len(clips) / elapsed:7.1f} clips/s | "
+                f"{audio_seconds / elapsed:6.1f}x realtime | length error {length_error_ms:6.1f} ms")
+        if pitches is not None:
+            drift = np.mean([abs(dominant_pitch(o) / p - 1) for o, p in zip(outputs, pitches) if len(o) > 2048])
+            line += f" | pitch drift {drift:.2%}"
+        print(line)
+    if "pydub" in results:
+        print(f"Batched vs pydub: {results['pydub'] / results['batched']:.2f}x")
+
+if __name__ == "__main__":
+    main()
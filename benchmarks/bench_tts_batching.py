@@ -0,0 +1,68 @@
+"""
+Throughput comparison: per-segment F5-TTS loop vs. length-bucketed batches.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_tts_batching <reference.wav> [--segments 64]
+"""
+import argparse
+import time
+from config import Config
+from core.audio import AudioProcessor
+from core.reference import ReferenceVoiceManager
+from core.tts import TTSProcessor
+
+SAMPLE_TEXTS = [
+    "Hello.",
+    "Welcome back to the channel.",
+    "Today we are going to look at something a little different.",
+    "If you enjoyed this video, please like and subscribe, and turn on notifications so you never miss an upload.",
+]
+
+def build_segments(count, audio_duration):
+    segments = []
+    t = 0.0
+    for i in range(count):
+        text = SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]
+        duration = 1.0 + 0.08 * len(text)
+        start = t % max(audio_duration - duration, 1.0)
+        segments.append({"start": start, "end": start + duration, "original_text": "参考文本。", "text": text})
+        t += duration
+    return segments
+
+def run(tts, segments, references, batched):
+    start = time.perf_counter()
+    audio_seconds = 0.0
+    for _, wav, wav_rate in tts._render_segments(segments, references, batched=batched):
+        audio_seconds += len(wav) / wav_rate
+    elapsed = time.perf_counter() - start
+    return elapsed, audio_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("reference_wav", help="Speech WAV used as the cloning reference")
+    parser.add_argument("--segments", type=int, default=64)
+    parser.add_argument("--frame-budget", type=int, default=Config.TTS_BATCH_FRAME_BUDGET)
+    args = parser.parse_args()
+
+    Config.TTS_BATCH_FRAME_BUDGET = args.frame_budget
+    audio, sample_rate = AudioProcessor.load_wav(args.reference_wav)
+    segments = build_segments(args.segments, len(audio) / sample_rate)
+    references = ReferenceVoiceManager(audio, sample_rate, segments)
+
+    tts = TTSProcessor()
+    tts.load_model()
+    # Warm-up so neither mode pays kernel compilation / allocator growth
+    next(tts._render_segments(segments[:1], references, batched=False))
+
+    results = {}
+    for batched in (False, True):
+        elapsed, audio_seconds = run(tts, segments, references, batched)
+        label = "batched" if batched else "per-segment"
+        results[label] = elapsed
+        print(f"{label:>12}: {elapsed:8.2f}s | {len(segments) / elapsed:6.2f} seg/s | "
+              f"{audio_seconds / elapsed:6.2f}x realtime")
+    print(f"Speedup: {results['per-segment'] / results['batched']:.2f}x "
+          f"(frame budget {args.frame_budget}, max batch {Config.TTS_BATCH_MAX_SIZE}, device {tts.device})")
+
+if __name__ == "__main__":
+    main()
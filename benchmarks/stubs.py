@@ -0,0 +1,209 @@
+"""
+Deterministic CPU stand-ins for Whisper, the online/NLLB translator, F5-TTS, the face
+detector and LivePortrait, with configurable latency. They patch the model entry points
+only, so everything around them (decoding, caching, mixing, muxing) runs for real.
+"""
+import atexit
+import json
+import random
+import subprocess
+import time
+from types import SimpleNamespace
+import numpy as np
+from config import Config
+
+WORDS = ("video", "model", "today", "we", "look", "at", "the", "new", "result", "and", "then", "a",
+         "little", "more", "about", "how", "it", "works", "in", "practice", "thanks", "for", "watching")
+
+class StubWhisperModel:
+    """
+    Splits audio on silence (20 ms energy frames) and emits seeded pseudo-text per speech run,
+    with evenly spaced word timestamps when word_timestamps is requested.
+    """
+    def __init__(self, rtf=0.002, words_per_second=2.5, seed=0, frame_s=0.02, min_silence_s=0.3):
+        self.rtf = rtf
+        self.words_per_second = words_per_second
+        self.seed = seed
+        self.frame_s = frame_s
+        self.min_silence_s = min_silence_s
+
+    def _speech_runs(self, samples, sample_rate):
+        frame = int(self.frame_s * sample_rate)
+        n_frames = len(samples) // frame
+        energy = np.abs(samples[:n_frames * frame].reshape(n_frames, frame)).max(axis=1)
+        voiced = np.flatnonzero(energy > 1e-3)
+        if not len(voiced):
+            return []
+        # A new run starts wherever the gap to the previous voiced frame is long enough
+        breaks = np.flatnonzero(np.diff(voiced) * self.frame_s > self.min_silence_s)
+        starts = np.concatenate(([voiced[0]], voiced[breaks + 1]))
+        ends = np.concatenate((voiced[breaks], [voiced[-1]])) + 1
+        return [(s * self.frame_s, e * self.frame_s) for s, e in zip(starts, ends)]
+
+    def transcribe(self, audio, **options):
+        if not isinstance(audio, np.ndarray):
+            from core.audio import AudioProcessor
+            audio, _ = AudioProcessor.load_wav(audio)
+        duration = len(audio) / 16000
+        runs = self._speech_runs(audio, 16000)
+
+        def segments():
+            for i, (start, end) in enumerate(runs):
+                time.sleep((end - start) * self.rtf)
+                rng = random.Random(self.seed * 1000003 + i)
+                count = max(1, int((end - start) * self.words_per_second))
+                tokens = [rng.choice(WORDS) for _ in range(count)]
+                tokens[0] = tokens[0].capitalize()
+                # A clause break every few words, so resegmentation has punctuation to work with
+                tokens = [t + ("," if k % 7 == 6 and k < count - 1 else "") for k, t in enumerate(tokens)]
+                tokens[-1] += "."
+                words = None
+                if options.get("word_timestamps"):
+                    step = (end - start) / count
+                    words = [SimpleNamespace(start=round(start + k * step, 2), end=round(start + (k + 0.8) * step, 2),
+                                             word=" " + t, probability=0.9) for k, t in enumerate(tokens)]
+                yield SimpleNamespace(start=round(start, 2), end=round(end, 2), text=" " + " ".join(tokens),
+                                      words=words)
+        return segments(), SimpleNamespace(duration=duration, language="en")
+
+class StubTranslationBackend:
+    """Online-backend stand-in: fixed request latency plus per-character time, no network."""
+    name = "google"
+
+    def __init__(self, latency=0.02, per_char=0.0):
+        self.latency = latency
+        self.per_char = per_char
+
+    def translate(self, text, source_lang, target_lang):
+        time.sleep(self.latency + self.per_char * len(text))
+        # Packed requests are newline-delimited; keep one output line per input line
+        return "\n".join(f"[{target_lang}] {line}" for line in text.split("\n"))
+
+class StubNLLBTokenizer:
+    """Whitespace tokenizer with NLLB's layout ([src_lang] tokens </s>) and the methods Translator uses."""
+    SPECIAL = {"</s>", "<pad>"}
+
+    def __init__(self):
+        self.src_lang = "eng_Latn"
+        self._ids = {}
+        self._tokens = []
+
+    def _id(self, token):
+        if token not in self._ids:
+            self._ids[token] = len(self._tokens)
+            self._tokens.append(token)
+        return self._ids[token]
+
+    def __call__(self, texts, truncation=True, max_length=None):
+        input_ids = []
+        for text in texts:
+            tokens = [self.src_lang] + text.split()[:(max_length - 2) if truncation and max_length else None] + ["</s>"]
+            input_ids.append([self._id(t) for t in tokens])
+        return {"input_ids": input_ids}
+
+    def convert_ids_to_tokens(self, ids):
+        return [self._tokens[i] for i in ids]
+
+    def convert_tokens_to_ids(self, tokens):
+        return [self._id(t) for t in tokens] if isinstance(tokens, list) else self._id(tokens)
+
+    def decode(self, ids, skip_special_tokens=False):
+        tokens = [self._tokens[i] for i in ids]
+        if skip_special_tokens:
+            # Language codes look like "eng_Latn"
+            tokens = [t for t in tokens if t not in self.SPECIAL and not (len(t) == 8 and t[3] == "_")]
+        return " ".join(tokens)
+
+class StubNLLBTranslator:
+    """ctranslate2.Translator stand-in: per-batch latency plus per-token time, tags the source with the target."""
+    def __init__(self, latency=0.02, per_token=0.0005):
+        self.latency = latency
+        self.per_token = per_token
+
+    def translate_batch(self, source, target_prefix=None, max_decoding_length=256, **options):
+        time.sleep(self.latency + self.per_token * sum(len(tokens) for tokens in source))
+        results = []
+        for tokens, prefix in zip(source, target_prefix or [[]] * len(source)):
+            body = [t for t in tokens[1:] if t != "</s>"]
+            hypothesis = (prefix + [f"[{prefix[0]}]" if prefix else "[?]"] + body)[:max_decoding_length]
+            results.append(SimpleNamespace(hypotheses=[hypothesis]))
+        return results
+
+class StubTTSModel:
+    target_sample_rate = 24000
+
+    def __init__(self, seconds_per_char=0.06, latency=0.005):
+        self.seconds_per_char = seconds_per_char
+        self.latency = latency
+
+    def synthesize(self, text):
+        """Seeded tone whose length follows the text length, like real speech output would."""
+        time.sleep(self.latency)
+        n = int(max(len(text), 1) * self.seconds_per_char * self.target_sample_rate)
+        rng = np.random.default_rng(sum(text.encode('utf-8')))
+        t = np.arange(n, dtype=np.float32) / self.target_sample_rate
+        wav = 0.2 * np.sin(2 * np.pi * rng.uniform(120, 240) * t) + 0.005 * rng.standard_normal(n)
+        return wav.astype(np.float32), self.target_sample_rate
+
+def install_stubs(asr_rtf=0.002, translate_latency=0.02, tts_latency=0.005, tts_seconds_per_char=0.06,
+                  face_latency=0.0005, lipsync_step_seconds=0.05, seed=0):
+    """Patches the pipeline's model entry points in this process. Not reversible: use in benchmark runs only."""
+    from core import asr, online_translation, translator, tts, faces, lipsync_worker
+    from core.registry import get_registry
+
+    def load_whisper(self):
+        if self.model is None:
+            self.model = get_registry().get(("stub-whisper", asr_rtf, seed), lambda: StubWhisperModel(asr_rtf, seed=seed))
+    asr.ASRProcessor.load_model = load_whisper
+
+    online_translation.GoogleWebBackend = lambda *args, **kwargs: StubTranslationBackend(translate_latency)
+
+    # Local NLLB: stand-in tokenizer/model behind the CTranslate2 loader, the batching code around it runs as is
+    def load_nllb(cls, device):
+        return get_registry().get(("stub-nllb", translate_latency), lambda: (StubNLLBTokenizer(),
+                                                                              StubNLLBTranslator(translate_latency)))
+    Config.NLLB_ENGINE = "ctranslate2"
+    translator.Translator._load_ctranslate2 = classmethod(load_nllb)
+
+    def load_tts(self):
+        if self.model is None:
+            self.model = get_registry().get(("stub-f5-tts", tts_latency, tts_seconds_per_char),
+                                            lambda: StubTTSModel(tts_seconds_per_char, tts_latency))
+
+    def synthesize(self, reference, text):
+        started = time.perf_counter()
+        result = self.model.synthesize(text)
+        tts.metrics.observe("tts_segment_seconds", time.perf_counter() - started)
+        return result
+
+    def synthesize_batch(self, reference, texts, **kwargs):
+        started = time.perf_counter()
+        results = [self.model.synthesize(text) for text in texts]
+        tts.metrics.observe("tts_segment_seconds", (time.perf_counter() - started) / len(texts), len(texts))
+        return results
+    tts.TTSProcessor.load_model = load_tts
+    tts.TTSProcessor._synthesize = synthesize
+    tts.TTSProcessor._synthesize_batch = synthesize_batch
+    tts.TTSProcessor._estimate_frames = lambda self, reference, text, speed=1.0: len(text.encode('utf-8')) * 4
+
+    def build_faces(cls, video_path, stride_s=None, width=None, workers=None):
+        stride_s = stride_s or Config.FACE_INDEX_STRIDE_S
+        probe = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json",
+                                str(video_path)], capture_output=True, text=True, check=True)
+        duration = float(json.loads(probe.stdout)["format"]["duration"])
+        times = list(np.arange(stride_s / 2, duration, stride_s))
+        time.sleep(face_latency * len(times))
+        # Synthetic video has no faces; pretend every sample has one so lip-sync does real work
+        return cls(duration, stride_s, times, [True] * len(times))
+    faces.FaceIndex.build = classmethod(build_faces)
+
+    # Worker engine "stub" copies the clip; its per-step latency is a worker flag
+    Config.LIPSYNC_ENGINE = "stub"
+    lipsync_worker._worker = lipsync_worker.LipSyncWorker(
+        engine="stub", worker_args=["--stub-step-seconds", str(lipsync_step_seconds)])
+    atexit.register(lipsync_worker._worker.stop)
+
+    # CPU-only and single-process: every stage runs in this process with the stubs above
+    Config.DEVICE = "cpu"
+    Config.ASR_MODE = "sequential"
+    Config.ASR_PARALLEL_WORKERS = 0
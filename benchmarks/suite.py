@@ -0,0 +1,172 @@
+"""
+Offline end-to-end benchmark: the real pipeline (decode, caches, mixing, muxing) on
+synthetic media, with Whisper / translation / F5-TTS / face detection / LivePortrait
+replaced by deterministic CPU stubs of configurable latency. No GPU, no network.
+Times every stage and the whole run at each scale and compares against a stored
+baseline; exits with status 1 when a metric regresses beyond the threshold.
+
+Usage (from the repo root):
+    python -m benchmarks.suite [--scales 1min,30min,3h] [--segments-per-minute 15]
+                               [--baseline benchmarks/baseline.json] [--save-baseline]
+                               [--threshold 0.15] [--min-delta 0.05] [--set TTS_BATCHED=True]
+                               [--langs en,ja,fr]
+
+Record a baseline on the reference machine first (--save-baseline), then rerun after a change.
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from config import Config
+from benchmarks.stubs import install_stubs
+from benchmarks.synthetic import ensure_media
+
+DEFAULT_BASELINE = Config.BASE_DIR / "benchmarks" / "baseline.json"
+
+def parse_scale(text):
+    """'90s' / '30min' / '3h' / plain seconds -> seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(s|min|m|h)?", text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"bad scale: {text}")
+    value, unit = float(match.group(1)), match.group(2) or "s"
+    return value * {"s": 1, "m": 60, "min": 60, "h": 3600}[unit]
+
+def parse_override(text):
+    name, _, value = text.partition("=")
+    if not hasattr(Config, name):
+        raise argparse.ArgumentTypeError(f"unknown Config attribute: {name}")
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+def run_scale(label, video_path, target_lang="en"):
+    """Runs the whole pipeline once on fresh, isolated output/cache dirs; returns {metric: seconds}."""
+    import main
+    from core.metrics import MetricsRecorder
+
+    with tempfile.TemporaryDirectory(prefix=f"vts_bench_{label}_") as tmp:
+        tmp = Path(tmp)
+        # Nothing is served from (or written to) the user's caches or outputs
+        for name in ("OUTPUT_DIR", "CACHE_DIR", "TEMP_DIR", "JOBS_DIR"):
+            setattr(Config, name, tmp / name.lower())
+            getattr(Config, name).mkdir()
+        Config.TRANSLATION_MEMORY_PATH = Config.CACHE_DIR / "translation_memory.sqlite3"
+        Config.METRICS_PROM_PATH = Config.OUTPUT_DIR / "metrics.prom"
+
+        recorder = MetricsRecorder(job_id=f"bench-{label}")
+        started = time.perf_counter()
+        result = asyncio.run(main.run_pipeline(str(video_path), target_lang, force_stages=["all"], metrics=recorder))
+        total = time.perf_counter() - started
+        if result is None:
+            raise RuntimeError(f"pipeline failed at scale {label}")
+
+        results = {f"{label}/{stage}": data["wall_seconds"] for stage, data in recorder.stages.items()}
+        results[f"{label}/total"] = total
+    return results
+
+def machine_info():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+def compare(current, baseline, threshold, min_delta):
+    """Returns (rows, regressions); a regression is slower by > threshold and by > min_delta seconds."""
+    rows, regressions = [], []
+    for name, value in current.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, value, None, None, "new"))
+            continue
+        change = (value - base) / base if base > 0 else 0.0
+        status = "ok"
+        if change > threshold and value - base > min_delta:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold and base - value > min_delta:
+            status = "faster"
+        rows.append((name, value, base, change, status))
+    return rows, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1min,30min,3h", help="Comma-separated media lengths (s / min / h)")
+    parser.add_argument("--segments-per-minute", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--langs", default="en", help="Target language(s); several (en,ja,fr) run the fan-out path")
+    parser.add_argument("--asr-rtf", type=float, default=0.002, help="Stub Whisper seconds per second of speech")
+    parser.add_argument("--translate-latency", type=float, default=0.02, help="Stub seconds per translation request")
+    parser.add_argument("--tts-latency", type=float, default=0.005, help="Stub seconds per synthesized segment")
+    parser.add_argument("--tts-seconds-per-char", type=float, default=0.06, help="Stub speech length per character")
+    parser.add_argument("--lipsync-step-seconds", type=float, default=0.05, help="Stub lip-sync seconds per step")
+    parser.add_argument("--set", action="append", default=[], type=parse_override, metavar="KEY=VALUE",
+                        help="Config override for the benchmarked code path (repeatable)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown per metric")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignore slowdowns below this many seconds")
+    parser.add_argument("--output", type=Path, help="Also write this run's results as JSON")
+    args = parser.parse_args()
+
+    install_stubs(asr_rtf=args.asr_rtf, translate_latency=args.translate_latency, tts_latency=args.tts_latency,
+                  tts_seconds_per_char=args.tts_seconds_per_char, lipsync_step_seconds=args.lipsync_step_seconds,
+                  seed=args.seed)
+    Config.PROGRESS_BAR = False
+    for name, value in args.set:
+        setattr(Config, name, value)
+
+    # Media is generated (or reused) under the real TEMP_DIR before runs redirect it
+    media = {}
+    for label in (s.strip() for s in args.scales.split(",") if s.strip()):
+        duration = parse_scale(label)
+        segments = max(int(duration / 60 * args.segments_per_minute), 1)
+        media[label] = (duration, segments, ensure_media(duration, segments, args.seed))
+
+    results = {}
+    for label, (duration, segments, video_path) in media.items():
+        print(f"\n⏱️ Scale {label}: {duration:.0f}s of media, {segments} segments")
+        results.update(run_scale(label, video_path, args.langs))
+
+    run = {"machine": machine_info(), "settings": {k: v for k, v in vars(args).items()
+                                                   if k not in ("baseline", "output", "save_baseline", "set")},
+           "overrides": dict(args.set), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(run, indent=2), encoding='utf-8')
+
+    regressions = []
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        if baseline.get("machine") != run["machine"]:
+            print(f"⚠️ Baseline was recorded on a different machine: {baseline.get('machine')}")
+        changed = {k for k in run["settings"] if baseline.get("settings", {}).get(k) != run["settings"][k]}
+        if changed or baseline.get("overrides") != run["overrides"]:
+            print(f"⚠️ Settings differ from the baseline run: {', '.join(sorted(changed)) or 'config overrides'}")
+        rows, regressions = compare(results, baseline["results"], args.threshold, args.min_delta)
+        print(f"\n{'metric':<24} {'current':>9} {'baseline':>9} {'change':>8}")
+        for name, value, base, change, status in rows:
+            print(f"{name:<24} {value:9.3f} " + (f"{base:9.3f} {change:+8.1%}" if base is not None else f"{'-':>9} {'':>8}")
+                  + f"  {status}")
+    else:
+        print(f"\n{'metric':<24} {'seconds':>9}")
+        for name, value in results.items():
+            print(f"{name:<24} {value:9.3f}")
+        if args.save_baseline:
+            args.baseline.write_text(json.dumps(run, indent=2), encoding='utf-8')
+            print(f"💾 Baseline saved to: {args.baseline}")
+        else:
+            print(f"ℹ️ No baseline at {args.baseline}; record one with --save-baseline")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    if args.baseline.exists() and not args.save_baseline:
+        print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Synthetic benchmark media: a tiny test-pattern video with a "speech" track made of
+tone bursts separated by exact silence, so stub ASR can segment it deterministically.
+Generated files are kept under Config.TEMP_DIR/bench_media and reused across runs.
+"""
+import random
+import subprocess
+import wave
+import numpy as np
+from config import Config
+
+SAMPLE_RATE = 16000
+
+def speech_plan(duration, segments, seed=0):
+    """[(start, end)] speech spans: one per equal slot, covering 60-85% of it."""
+    rng = random.Random(seed)
+    slot = duration / segments
+    plan = []
+    for i in range(segments):
+        length = slot * rng.uniform(0.6, 0.85)
+        start = i * slot + rng.uniform(0.05, 0.1) * slot
+        plan.append((round(start, 3), round(min(start + length, (i + 1) * slot - 0.05), 3)))
+    return plan
+
+def write_speech_wav(path, duration, plan, seed=0):
+    """Streams the track to disk slot by slot (3 h at 16 kHz never sits in memory)."""
+    rng = np.random.default_rng(seed)
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        cursor = 0
+        for start, end in plan:
+            gap = int(start * SAMPLE_RATE) - cursor
+            wf.writeframes(np.zeros(gap, dtype=np.int16).tobytes())
+            n = int(end * SAMPLE_RATE) - int(start * SAMPLE_RATE)
+            t = np.arange(n) / SAMPLE_RATE
+            pitch = rng.uniform(110, 220)
+            # Voiced-ish: harmonics + syllable-rate amplitude modulation + a little noise
+            voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in (1, 2, 3))
+            envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4.0 * t) ** 2
+            signal = 0.25 * voice * envelope + 0.01 * rng.standard_normal(n)
+            wf.writeframes(np.clip(signal * 32767, -32768, 32767).astype(np.int16).tobytes())
+            cursor = int(start * SAMPLE_RATE) + n
+        wf.writeframes(np.zeros(max(int(duration * SAMPLE_RATE) - cursor, 0), dtype=np.int16).tobytes())
+
+def ensure_media(duration, segments, seed=0, size="320x180", fps=10):
+    """Returns the path of a synthetic MP4 (H.264 + AAC) with the given length and segment count."""
+    media_dir = Config.TEMP_DIR / "bench_media"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    video_path = media_dir / f"synthetic_{int(duration)}s_{segments}seg_{seed}.mp4"
+    if video_path.exists():
+        return video_path
+    wav_path = video_path.with_suffix(".wav")
+    print(f"🧪 Generating synthetic media: {duration:.0f}s, {segments} speech segments...")
+    write_speech_wav(wav_path, duration, speech_plan(duration, segments, seed), seed)
+    subprocess.run([
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={duration}",
+        "-i", str(wav_path), "-c:v", "libx264", "-preset", "ultrafast", "-g", str(fps * 2),
+        "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", str(video_path)
+    ], check=True)
+    wav_path.unlink()
+    return video_path
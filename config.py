@@ -1,26 +1,126 @@
 import os
-import torch
 from pathlib import Path
 
-class Config:
+class _LazyConfig(type):
+    """Resolves hardware-dependent settings on first access, so `import config` never imports torch."""
+    def __getattr__(cls, name):
+        if name in ("DEVICE", "GPU_NAME"):
+            import torch
+            available = torch.cuda.is_available()
+            cls.DEVICE = "cuda" if available else "cpu"
+            cls.GPU_NAME = torch.cuda.get_device_name(0) if available else "N/A"
+            return type.__getattribute__(cls, name)
+        if name == "WHISPER_COMPUTE_TYPE":
+            cls.WHISPER_COMPUTE_TYPE = "float16" if cls.DEVICE == "cuda" else "int8"
+            return cls.WHISPER_COMPUTE_TYPE
+        raise AttributeError(f"type object 'Config' has no attribute '{name}'")
+
+class Config(metaclass=_LazyConfig):
     # Base Paths
     BASE_DIR = Path(__file__).parent.absolute()
     TEMP_DIR = BASE_DIR / "temp"
     OUTPUT_DIR = BASE_DIR / "output"
     CHECKPOINTS_DIR = BASE_DIR / "checkpoints"
+    CACHE_DIR = BASE_DIR / "cache"
+    JOBS_DIR = BASE_DIR / "jobs"
     
     # Create dirs if not exist
     TEMP_DIR.mkdir(exist_ok=True)
     OUTPUT_DIR.mkdir(exist_ok=True)
     CHECKPOINTS_DIR.mkdir(exist_ok=True)
+    CACHE_DIR.mkdir(exist_ok=True)
+
+    # Downloaded model assets (hash/size/path), verified offline before touching the hub
+    ASSET_MANIFEST_PATH = CHECKPOINTS_DIR / "manifest.json"
+
+    # Per-job Workspace & Audio Decoding
+    WORKSPACE_IN_RAM = False        # Put per-job temp files on /dev/shm
+    PCM_SPILL_THRESHOLD_MB = 512    # Decoded audio beyond this is memory-mapped from the workspace (~2.3h at 16 kHz)
+
+    # Stage Cache (resume / skip finished stages)
+    CACHE_MAX_GB = 20
+
+    # Translation
+    TRANSLATE_SOURCE_LANG = "auto"       # e.g. "zh"; NLLB needs an explicit code
+    NLLB_FALLBACK_SOURCE_LANG = "zh"     # Used by NLLB when the source is "auto"
+    NLLB_MAX_BATCH_TOKENS = 4096         # Padded source tokens per generate() call
+    NLLB_MAX_SOURCE_TOKENS = 256
+    NLLB_LENGTH_RATIO = 1.3              # max_length = longest source * ratio + 10
+    NLLB_MAX_LENGTH = 200
+    NLLB_ENGINE = "ctranslate2"          # "ctranslate2" (converted once into CHECKPOINTS_DIR) | "transformers"
+    NLLB_CT2_QUANTIZATION = "int8"       # Weight type of the converted model
+    NLLB_CT2_COMPUTE_TYPE = None         # None: "int8_float16" on CUDA, "int8_float32" on CPU
+    NLLB_CT2_INTRA_THREADS = 4           # Threads per translation
+    NLLB_CT2_INTER_THREADS = 1           # Translations run in parallel (each with intra threads)
+
+    # Online Translation (batched, concurrent, retrying)
+    TRANSLATE_ONLINE_ENDPOINT = "https://translate.googleapis.com/translate_a/single"
+    TRANSLATE_ONLINE_WORKERS = 4
+    TRANSLATE_ONLINE_MAX_CHARS = 4000   # Per packed request (service limit is ~5000)
+    TRANSLATE_ONLINE_RETRIES = 4
+    TRANSLATE_ONLINE_BACKOFF = 0.5      # Seconds, doubled per retry
+
+    # Translation Memory (persistent, shared via import/export)
+    TRANSLATION_MEMORY_PATH = CACHE_DIR / "translation_memory.sqlite3"
+    TRANSLATION_MEMORY_MAX_ENTRIES = 200000
+
+    # Daemon Mode (job queue + worker pool)
+    DAEMON_WORKERS = 2
+    DAEMON_HEAVY_SLOTS = 1       # Jobs allowed in ASR/translation/TTS/lip-sync at the same time
+    DAEMON_POLL_SECONDS = 2.0
+
+    # Metrics (per-job JSON next to the outputs; daemon aggregate for Prometheus' textfile collector)
+    PROGRESS_BAR = True
+    METRICS_SAMPLE_SECONDS = 0.5     # Peak RSS sampling interval
+    METRICS_PROM_PATH = OUTPUT_DIR / "metrics.prom"
+
+    # Profiling (--profile): reports go to <output>/<video>/profile/
+    PROFILE_MODE = None                  # None | "full" (cProfile per stage) | "sample" (stack sampler)
+    PROFILE_SAMPLED_STAGES = ("translate", "tts")  # Long model loops: sampled even in "full" mode
+    PROFILE_SAMPLE_INTERVAL = 0.005      # Seconds between stack samples
+    PROFILE_TRACEMALLOC_FRAMES = 5
+    PROFILE_TOP_ALLOCATIONS = 25
+
+    # Streaming Mode (overlap ASR -> Translation -> TTS)
+    STREAMING_PIPELINE = False
+    STREAM_QUEUE_SIZE = 8
+
+    # Multi-language runs (target "en,ja,fr"): extraction/ASR once, translation + TTS per language
+    FANOUT_TRANSLATE_SLOTS = 2   # Languages translated at the same time (TTS: always one, F5-TTS is shared)
+    MUX_ORIGINAL_AUDIO = True    # Keep the source audio as an extra (non-default) track
+    MUX_ORIGINAL_SUBTITLES = True
+    MUX_AUDIO_BITRATE = "192k"
 
     # Hardware Configuration
-    DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-    GPU_NAME = torch.cuda.get_device_name(0) if torch.cuda.is_available() else "N/A"
+    # DEVICE / GPU_NAME are resolved lazily by _LazyConfig (first access imports torch)
     
+    # Model Registry (warm models across jobs, LRU-evicted over budget)
+    MODEL_RAM_BUDGET_GB = 24
+    MODEL_VRAM_BUDGET_GB = 14
+    # VRAM assumed for models not loaded yet in this process (measured sizes replace these)
+    MODEL_VRAM_ESTIMATES_GB = {"whisper": 4.5, "f5-tts": 3.0, "nllb": 2.5, "nllb-ct2": 1.5}
+
     # Model Configurations
     WHISPER_MODEL_SIZE = "large-v3"
-    WHISPER_COMPUTE_TYPE = "float16" if DEVICE == "cuda" else "int8"
+    # WHISPER_COMPUTE_TYPE: "float16" on CUDA, "int8" otherwise (resolved lazily)
+    ASR_MODE = "sequential"      # "sequential" | "batched" (BatchedInferencePipeline)
+    ASR_PRESET = "accurate"
+    ASR_PRESETS = {
+        "accurate": {"beam_size": 5, "word_timestamps": True, "batch_size": 8},
+        "balanced": {"beam_size": 2, "word_timestamps": True, "batch_size": 16},
+        "fast": {"beam_size": 1, "word_timestamps": False, "batch_size": 24},
+    }
+    ASR_PARALLEL_WORKERS = 0     # >1: chunked multi-process transcription (CPU hosts)
+    ASR_CPU_THREADS = 4          # cpu_threads per worker process
+    ASR_CHUNKS_PER_WORKER = 2    # More chunks than workers evens out the load
+
+    # Resegmentation (between ASR and translation): even TTS chunk lengths
+    RESEGMENT = True
+    RESEGMENT_MAX_SECONDS = 8.0  # Longer segments are split at the most natural word boundary
+    RESEGMENT_MAX_CHARS = 120
+    RESEGMENT_MIN_SECONDS = 1.0  # Shorter fragments are merged into a neighbour...
+    RESEGMENT_MIN_CHARS = 6
+    RESEGMENT_MERGE_GAP = 0.6    # ...if the silence between them is at most this long
     
     # LivePortrait Configuration (Next-Gen Face Reenactment)
     LIVEPORTRAIT_REPO_URL = "https://github.com/KwaiVGI/LivePortrait.git"
@@ -28,14 +128,44 @@ class Config:
         "base": "https://huggingface.co/KwaiVGI/LivePortrait/resolve/main/base_models",
         "landmark": "https://huggingface.co/KwaiVGI/LivePortrait/resolve/main/landmark.pth"
     }
+    FACE_INDEX_STRIDE_S = 0.5    # Seconds between sampled frames in the face-presence index
+    FACE_INDEX_WIDTH = 320       # Frames are downscaled to this width before detection
+    FACE_INDEX_WORKERS = 4       # Decode/detect threads (each with its own capture)
+    LIPSYNC_ENGINE = "liveportrait"  # "liveportrait" | "stub" (protocol stand-in, copies frames)
+    LIPSYNC_WORKER_RESTARTS = 2  # Automatic restarts per job if the worker crashes
+    LIPSYNC_WORKER_START_TIMEOUT_S = 600
+    LIPSYNC_JOB_TIMEOUT_S = 3600
+    LIPSYNC_SELECTIVE = False    # Animate only speech-with-face spans, stream-copy the rest
+    LIPSYNC_PAD_S = 0.3          # Padding around each span before keyframe alignment
+    LIPSYNC_MIN_GAP_S = 1.0      # Spans closer than this are merged into one
 
     # F5-TTS Configuration (Stable Voice Cloning)
     F5TTS_MODEL_DIR = CHECKPOINTS_DIR / "F5-TTS"
+    # Hub repos F5TTS() fetches (weights, vocoder), recorded in the asset manifest under these names
+    F5TTS_HF_REPOS = {"f5-tts": "SWivid/F5-TTS", "f5-tts-vocoder": "charactr/vocos-mel-24khz"}
+    TTS_BATCHED = False             # Length-bucketed batch synthesis per reference clip
+    TTS_BATCH_FRAME_BUDGET = 12000  # Max padded mel frames (batch x longest item) per forward pass
+    TTS_BATCH_MAX_SIZE = 16
+    # Reference clips for cloning: "local" = best 5-10 s window around each unlabelled segment,
+    # "speaker" = one clip per speaker label (a single voice per video without diarization)
+    TTS_REFERENCE_MODE = "local"
+    TTS_REFERENCE_MIN_SECONDS = 5.0
+    TTS_REFERENCE_MAX_SECONDS = 10.0
+    TTS_REFERENCE_TARGET_SECONDS = 8.0
+    TTS_REFERENCE_MAX_GAP = 1.0     # Max pause between segments joined into one clip
+    TTS_REFERENCE_MIN_RMS = 0.01    # Quieter clips are only used as a last resort
+    # Fitting dubbed clips to their slots (phase-vocoder time-stretch, pitch preserved)
+    TTS_STRETCH_MIN_SPEED = 1.0     # <1.0 also slows short clips down to fill their slot
+    TTS_STRETCH_MAX_SPEED = 1.5     # Clips needing more are sped up this much and overrun their slot
+    TTS_STRETCH_TOLERANCE = 0.03    # Clips within ±3% of their slot are left untouched
+    TTS_STRETCH_BATCH = 32          # Rendered clips stretched per vectorized call
+    TIMESTRETCH_MAX_CELLS = 500_000    # clips x frames x bins per pass (~35 MB peak)
 
     @classmethod
     def print_info(cls):
         print(f"✅ Running on: {cls.DEVICE.upper()}")
         if cls.DEVICE == "cuda":
+            import torch
             print(f"🚀 GPU: {cls.GPU_NAME}")
             vram = torch.cuda.get_device_properties(0).total_memory / 1e9
             print(f"💾 VRAM: {vram:.2f} GB")
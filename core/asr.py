@@ -1,58 +1,248 @@
-import gc
-import torch
-from faster_whisper import WhisperModel
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from config import Config
+from core.assets import AssetManifest
+from core.audio import AudioProcessor
+from core.registry import get_registry
+from core.segments import SegmentStore
+
+# 优化参数：增加 word_timestamps 和更精细的 vad 控制
+TRANSCRIBE_OPTIONS = dict(
+    beam_size=5, 
+    vad_filter=True,
+    vad_parameters=dict(min_silence_duration_ms=500),
+    word_timestamps=True,  # 开启词级时间戳，方便后续精细化处理
+    initial_prompt="以下是普通话，请加标点符号。", # 强制要求带标点，有助于断句
+)
+
+def _words(segment, offset=0.0):
+    """Word timestamps of a faster-whisper segment (empty without word_timestamps)."""
+    return [{"start": w.start + offset, "end": w.end + offset, "word": w.word, "probability": w.probability}
+            for w in (getattr(segment, "words", None) or ())]
+
+# Per-process model for chunked transcription workers
+_worker_model = None
+# Chunk workers always run on CPU, where float16 (the CUDA default) is unsupported
+CPU_COMPUTE_TYPE = "int8"
+
+def _init_worker(model_path, compute_type, cpu_threads):
+    global _worker_model
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(model_path, device="cpu", compute_type=compute_type,
+                                 cpu_threads=cpu_threads, num_workers=1)
+
+def _transcribe_chunk(task):
+    """Transcribes one chunk in a worker process; timestamps are shifted to absolute time."""
+    offset, samples, options = task
+    segments, _ = _worker_model.transcribe(samples, **options)
+    results = []
+    for segment in segments:
+        text = segment.text.strip()
+        if text:
+            results.append({"start": segment.start + offset, "end": segment.end + offset, "text": text,
+                            "words": _words(segment, offset)})
+    return results
 
 class ASRProcessor:
-    def __init__(self):
+    """
+    Whisper transcription. mode is "sequential" (plain WhisperModel decoding) or
+    "batched" (faster-whisper's BatchedInferencePipeline over VAD chunks).
+    Presets in Config.ASR_PRESETS trade beam width / word timing for speed;
+    explicit beam_size, word_timestamps and batch_size override the preset.
+    """
+    def __init__(self, mode=None, preset=None, batch_size=None, beam_size=None, word_timestamps=None):
         self.model = None
+        self.mode = mode or Config.ASR_MODE
+        self.preset = preset or Config.ASR_PRESET
+        settings = dict(Config.ASR_PRESETS[self.preset])
+        overrides = {"batch_size": batch_size, "beam_size": beam_size, "word_timestamps": word_timestamps}
+        settings.update({k: v for k, v in overrides.items() if v is not None})
+        self.batch_size = settings.pop("batch_size")
+        self.options = dict(TRANSCRIBE_OPTIONS, **settings)
+        self.last_rtf = None
+
+    def describe(self):
+        """Decoding settings that affect the transcript (e.g. for cache keys)."""
+        params = {"mode": self.mode, "beam_size": self.options["beam_size"],
+                  "word_timestamps": self.options["word_timestamps"]}
+        if self.mode == "batched":
+            params["batch_size"] = self.batch_size
+        return params
 
     def load_model(self):
         if self.model is None:
-            print(f"⏳ Loading Whisper Model ({Config.WHISPER_MODEL_SIZE})...")
-            self.model = WhisperModel(
-                Config.WHISPER_MODEL_SIZE, 
-                device=Config.DEVICE, 
-                compute_type=Config.WHISPER_COMPUTE_TYPE
-            )
-            print("✅ Whisper Model Loaded.")
-
-    def transcribe(self, audio_path):
+            def load():
+                from faster_whisper import WhisperModel
+                model_path = self.model_files()
+                print(f"⏳ Loading Whisper Model ({Config.WHISPER_MODEL_SIZE})...")
+                return WhisperModel(
+                    model_path,
+                    device=Config.DEVICE, 
+                    compute_type=Config.WHISPER_COMPUTE_TYPE
+                )
+            # Warm across jobs: the registry only reloads after an eviction
+            self.model = get_registry().get(self.registry_key(), load)
+
+    @staticmethod
+    def registry_key():
+        return ("whisper", Config.WHISPER_MODEL_SIZE, Config.DEVICE, Config.WHISPER_COMPUTE_TYPE)
+
+    @staticmethod
+    def asset_name():
+        """Asset manifest entry of the Whisper weights (None when WHISPER_MODEL_SIZE is a local directory)."""
+        if os.path.isdir(Config.WHISPER_MODEL_SIZE):
+            return None
+        return f"whisper-{Config.WHISPER_MODEL_SIZE}"
+
+    @classmethod
+    def model_files(cls):
+        """
+        Local directory of the Whisper weights. The first run downloads and records them in the
+        asset manifest; once they verify, they are resolved with local_files_only (no hub request).
+        """
+        name = cls.asset_name()
+        if name is None:
+            return Config.WHISPER_MODEL_SIZE
+        from faster_whisper.utils import download_model
+        manifest = AssetManifest()
+        verified = not manifest.verify(name)
+        model_path = download_model(Config.WHISPER_MODEL_SIZE, local_files_only=verified)
+        if not verified:
+            manifest.record(name, model_path)
+        return model_path
+
+    def iter_segments(self, audio):
+        """
+        Lazily yields cleaned segments as faster-whisper decodes them.
+        audio: WAV path or (samples, 16000) as returned by AudioProcessor.decode_pcm
+        """
         self.load_model()
-        print(f"🎙️ Transcribing: {audio_path}...")
+        if isinstance(audio, tuple):
+            # Already decoded 16 kHz mono PCM: no second decode inside faster-whisper
+            source, label = np.asarray(audio[0], dtype=np.float32), "decoded PCM"
+        else:
+            source, label = audio, audio
+        print(f"🎙️ Transcribing: {label} ({self.mode}, preset '{self.preset}')...")
+        started = time.perf_counter()
         
-        # 优化参数：增加 word_timestamps 和更精细的 vad 控制
-        segments, info = self.model.transcribe(
-            audio_path, 
-            beam_size=5, 
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500),
-            word_timestamps=True,  # 开启词级时间戳，方便后续精细化处理
-            initial_prompt="以下是普通话，请加标点符号。", # 强制要求带标点，有助于断句
-        )
+        if self.mode == "batched":
+            from faster_whisper import BatchedInferencePipeline
+            pipeline = BatchedInferencePipeline(model=self.model)
+            segments, info = pipeline.transcribe(source, batch_size=self.batch_size, **self.options)
+        else:
+            segments, info = self.model.transcribe(source, **self.options)
         
-        result_segments = []
         for segment in segments:
-            # 如果单句太长（比如超过 10 秒），在这里可以做进一步的逻辑分割
-            # 目前先进行基础清理
+            # 长句切分 / 碎片合并在 core/resegment.py（ASR 之后的独立阶段），这里只做基础清理
             text = segment.text.strip()
             if not text:
                 continue
                 
-            result_segments.append({
+            yield {
                 "start": segment.start,
                 "end": segment.end,
-                "text": text
-            })
+                "text": text,
+                "words": _words(segment)
+            }
             
-        print(f"✅ Transcription complete. Detected language: {info.language}")
-        return result_segments
+        elapsed = time.perf_counter() - started
+        self.last_rtf = elapsed / max(info.duration, 1e-6)
+        print(f"✅ Transcription complete. Detected language: {info.language} | "
+              f"{elapsed:.1f}s for {info.duration:.1f}s of audio (RTF {self.last_rtf:.3f})")
+
+    def transcribe(self, audio):
+        """Returns a SegmentStore (with word timestamps when the preset requests them)."""
+        if Config.ASR_PARALLEL_WORKERS > 1:
+            return SegmentStore.from_segments(self.transcribe_parallel(audio))
+        return SegmentStore.from_segments(self.iter_segments(audio))
+
+    @staticmethod
+    def plan_chunks(samples, sample_rate, num_chunks, search_seconds=10.0, frame_seconds=0.03):
+        """
+        Splits audio into roughly equal chunks, moving each cut to the quietest
+        frame within +/- search_seconds of the ideal boundary.
+        Returns a list of (start_sample, end_sample).
+        """
+        frame = int(frame_seconds * sample_rate)
+        n_frames = len(samples) // frame
+        if num_chunks <= 1 or n_frames < num_chunks * 2:
+            return [(0, len(samples))]
+        energy = np.sqrt(np.mean(samples[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+        search = int(search_seconds / frame_seconds)
+
+        cuts = [0]
+        for k in range(1, num_chunks):
+            ideal = k * n_frames // num_chunks
+            lo, hi = max(ideal - search, cuts[-1] // frame + 1), min(ideal + search, n_frames - 1)
+            if lo >= hi:
+                continue
+            quietest = lo + int(np.argmin(energy[lo:hi]))
+            cuts.append(quietest * frame + frame // 2)
+        cuts.append(len(samples))
+        return list(zip(cuts[:-1], cuts[1:]))
+
+    @staticmethod
+    def _merge_chunks(chunk_results, overlap_tolerance=0.2):
+        """Concatenates per-chunk segments and drops duplicates produced at chunk boundaries."""
+        merged = []
+        for seg in sorted((s for chunk in chunk_results for s in chunk), key=lambda s: s['start']):
+            if merged and seg['start'] < merged[-1]['end'] - overlap_tolerance:
+                prev = merged[-1]
+                if seg['text'] in prev['text'] or prev['text'] in seg['text']:
+                    # Same words decoded on both sides of a cut: keep the longer transcript
+                    if len(seg['text']) > len(prev['text']):
+                        merged[-1] = seg
+                    continue
+                # Keep only the part after the previous segment, with the words that fall in it
+                start = prev['end']
+                if seg.get('words'):
+                    words = [w for w in seg['words'] if w['start'] >= start]
+                    if not words:
+                        continue
+                    seg = dict(seg, words=words, text="".join(w['word'] for w in words).strip())
+                if start >= seg['end'] or not seg['text']:
+                    continue
+                seg = dict(seg, start=start)
+            merged.append(seg)
+        return merged
+
+    def transcribe_parallel(self, audio, workers=None, cpu_threads=None):
+        """
+        CPU mode for long audio: splits the 16 kHz WAV at silences and transcribes
+        chunks in a pool of processes, each with a fixed number of cpu_threads.
+        """
+        workers = workers or Config.ASR_PARALLEL_WORKERS
+        cpu_threads = cpu_threads or Config.ASR_CPU_THREADS
+        started = time.perf_counter()
+
+        samples, sample_rate = AudioProcessor.load_audio(audio)
+        duration = len(samples) / sample_rate
+        chunks = self.plan_chunks(samples, sample_rate, workers * Config.ASR_CHUNKS_PER_WORKER)
+        tasks = [(start / sample_rate, np.array(samples[start:end]), self.options) for start, end in chunks]
+        print(f"🎙️ Transcribing {duration:.1f}s of audio in {len(tasks)} chunks ({workers} workers x {cpu_threads} threads)...")
+
+        # spawn: forking a process that already imported torch/CTranslate2 is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker,
+            initargs=(self.model_files(), CPU_COMPUTE_TYPE, cpu_threads)
+        ) as pool:
+            chunk_results = list(pool.map(_transcribe_chunk, tasks))
+
+        segments = self._merge_chunks(chunk_results)
+        elapsed = time.perf_counter() - started
+        self.last_rtf = elapsed / max(duration, 1e-6)
+        print(f"✅ Parallel transcription complete: {len(segments)} segments, {elapsed:.1f}s for "
+              f"{duration:.1f}s of audio (RTF {self.last_rtf:.3f})")
+        return segments
 
     def unload(self):
-        """Free up VRAM for the next step."""
+        """Releases this processor's handle; Whisper is evicted if it cannot stay resident next to F5-TTS."""
         if self.model:
-            del self.model
+            from core.tts import TTSProcessor
             self.model = None
-            gc.collect()
-            torch.cuda.empty_cache()
-            print("🗑️ Whisper Model Unloaded.")
+            get_registry().release(self.registry_key(), TTSProcessor.registry_key())
+            print("🗑️ Whisper Model released to registry.")
@@ -0,0 +1,165 @@
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from config import Config
+
+class AssetManifest:
+    """
+    Local record of downloaded model assets (per file: path, size, mtime, sha256).
+    Lets setup code verify readiness offline instead of asking the hub on every run.
+    A quick check compares size + mtime; files whose stat changed are re-hashed.
+    """
+    def __init__(self, path=None):
+        self.path = Path(path or Config.ASSET_MANIFEST_PATH)
+        self.assets = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.assets = json.load(f).get("assets", {})
+
+    @staticmethod
+    def _sha256(path, chunk_size=4 * 1024 * 1024):
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def _files(root):
+        root = Path(root)
+        if root.is_file():
+            return [root]
+        return sorted(p for p in root.rglob("*") if p.is_file() and ".cache" not in p.relative_to(root).parts)
+
+    def _relative(self, path):
+        path = Path(path).absolute()
+        try:
+            return str(path.relative_to(Config.BASE_DIR))
+        except ValueError:
+            return str(path)
+
+    def record(self, name, root):
+        """Hashes every file under root and stores it as asset `name`."""
+        root = Path(root)
+        files = {}
+        for file in self._files(root):
+            stat = file.stat()
+            files[str(file.relative_to(root)) if root.is_dir() else file.name] = {
+                "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": self._sha256(file)}
+        if not files:
+            raise FileNotFoundError(f"No files to record for asset '{name}' under {root}")
+        self.assets[name] = {"path": self._relative(root), "files": files, "recorded": time.time()}
+        self.save()
+        total = sum(f["size"] for f in files.values())
+        print(f"🧾 Recorded asset '{name}': {len(files)} files, {total / 1e9:.2f} GB")
+
+    def verify(self, name, deep=False):
+        """
+        Returns a list of problems (empty when the asset is ready).
+        deep=True re-hashes every file instead of trusting unchanged size/mtime.
+        """
+        entry = self.assets.get(name)
+        if entry is None:
+            return [f"asset '{name}' is not in the manifest"]
+        root = Path(entry["path"])
+        if not root.is_absolute():
+            root = Config.BASE_DIR / root
+        problems = []
+        changed = False
+        for rel, info in entry["files"].items():
+            file = root / rel if root.is_dir() else root
+            try:
+                stat = file.stat()
+            except OSError:
+                problems.append(f"missing {file}")
+                continue
+            if stat.st_size != info["size"]:
+                problems.append(f"size mismatch {file} ({stat.st_size} != {info['size']})")
+                continue
+            if deep or stat.st_mtime_ns != info["mtime_ns"]:
+                if self._sha256(file) != info["sha256"]:
+                    problems.append(f"hash mismatch {file}")
+                    continue
+                # Same content, new mtime (e.g. copied): keep the quick check quick next time
+                info["mtime_ns"] = stat.st_mtime_ns
+                changed = True
+        if changed and not problems:
+            self.save()
+        return problems
+
+    def is_ready(self, name):
+        return not self.verify(name)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # A temp file of its own per writer: daemon workers may save at the same time
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.path.parent, prefix=self.path.name + ".",
+                                         suffix=".tmp", delete=False) as f:
+            try:
+                json.dump({"assets": self.assets}, f, indent=2)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, self.path)
+
+def hub_snapshot(repo_id):
+    """Local snapshot directory of a repo already in the Hugging Face cache (no network)."""
+    from huggingface_hub import snapshot_download
+    return snapshot_download(repo_id, local_files_only=True)
+
+@contextlib.contextmanager
+def hub_offline(enabled=True):
+    """
+    HF_HUB_OFFLINE=1 for the duration of the block, for loaders that fetch from the hub
+    themselves: once the manifest verified their files, nothing is looked up online.
+    """
+    if not enabled:
+        yield
+        return
+    previous = os.environ.get("HF_HUB_OFFLINE")
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    # huggingface_hub reads the variable at import; patch it too if already imported
+    constants = sys.modules.get("huggingface_hub.constants")
+    saved = getattr(constants, "HF_HUB_OFFLINE", None)
+    if constants is not None:
+        constants.HF_HUB_OFFLINE = True
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("HF_HUB_OFFLINE", None)
+        else:
+            os.environ["HF_HUB_OFFLINE"] = previous
+        constants = sys.modules.get("huggingface_hub.constants")
+        if constants is not None:
+            if saved is None:  # Imported inside the block
+                saved = (previous or "").upper() in ("1", "ON", "YES", "TRUE")
+            constants.HF_HUB_OFFLINE = saved
+
+if __name__ == "__main__":
+    commands = ("list", "verify", "record")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands or (sys.argv[1] == "record" and len(sys.argv) != 4):
+        print("Usage: python -m core.assets list | verify [name ...] [--deep] | record <name> <path>")
+        sys.exit(1)
+    manifest = AssetManifest()
+    if sys.argv[1] == "record":
+        manifest.record(sys.argv[2], sys.argv[3])
+    elif sys.argv[1] == "list":
+        for name, entry in manifest.assets.items():
+            total = sum(f["size"] for f in entry["files"].values())
+            print(f"{name}: {entry['path']} ({len(entry['files'])} files, {total / 1e9:.2f} GB)")
+    else:
+        deep = "--deep" in sys.argv
+        names = [a for a in sys.argv[2:] if a != "--deep"] or list(manifest.assets)
+        failed = False
+        for name in names:
+            problems = manifest.verify(name, deep=deep)
+            print(f"{'✅' if not problems else '❌'} {name}" + "".join(f"\n   {p}" for p in problems[:10]))
+            failed = failed or bool(problems)
+        sys.exit(1 if failed else 0)
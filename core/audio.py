@@ -1,5 +1,8 @@
 import os
 import subprocess
+import threading
+import wave
+import numpy as np
 from config import Config
 
 class AudioProcessor:
@@ -12,14 +15,112 @@ class AudioProcessor:
         print(f"🎬 Extracting audio from {video_path}...")
         # 工业级方案：使用 ffmpeg 提取 pcm_s16le 格式，确保后期 ASR 处理最精准
         cmd = [
-            "ffmpeg", "-y", "-i", str(video_path),
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(video_path),
             "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
             str(output_audio_path)
         ]
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg audio extraction failed ({result.returncode}): "
+                               f"{result.stderr.decode(errors='replace')[-500:]}")
         print(f"✅ Audio extracted to: {output_audio_path}")
         return output_audio_path
 
+    @staticmethod
+    def decode_pcm(video_path, sample_rate=16000, spill_path=None, spill_threshold_mb=None):
+        """
+        Decodes the audio track straight from an ffmpeg pipe (pcm_s16le) into a mono
+        float32 array, without a WAV round-trip. If spill_path is given and the audio
+        grows beyond spill_threshold_mb, samples are streamed to that file instead and
+        returned as a read-only np.memmap (for very long inputs).
+        Returns (samples, sample_rate).
+        """
+        spill_limit = (spill_threshold_mb or Config.PCM_SPILL_THRESHOLD_MB) * 1024 * 1024
+        print(f"🎬 Decoding audio from {video_path} (pipe)...")
+        cmd = [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-i", str(video_path),
+            "-vn", "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-ac", "1",
+            "pipe:1"
+        ]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # Drain stderr concurrently so a chatty ffmpeg can't block on a full pipe
+        stderr_chunks = []
+        drain = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        drain.start()
+
+        chunks, size, spill, leftover = [], 0, None, b""
+        try:
+            while True:
+                raw = process.stdout.read(1 << 20)
+                if not raw:
+                    break
+                # Pipe reads can end mid-sample; carry the odd byte into the next read
+                raw = leftover + raw
+                cut = len(raw) - len(raw) % 2
+                raw, leftover = raw[:cut], raw[cut:]
+                block = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+                if spill is None and spill_path is not None and (size + block.nbytes) > spill_limit:
+                    spill = open(spill_path, 'wb')
+                    for chunk in chunks:
+                        spill.write(chunk.tobytes())
+                    chunks = []
+                if spill is not None:
+                    spill.write(block.tobytes())
+                else:
+                    chunks.append(block)
+                size += block.nbytes
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+            drain.join()
+            if spill is not None:
+                spill.close()
+
+        if returncode != 0:
+            stderr = b"".join(stderr_chunks).decode(errors='replace')
+            raise RuntimeError(f"ffmpeg audio decode failed ({returncode}): {stderr[-500:]}")
+        if spill is not None:
+            samples = np.memmap(spill_path, dtype=np.float32, mode='r')
+            print(f"✅ Decoded {len(samples) / sample_rate:.1f}s of audio (memory-mapped: {spill_path})")
+        else:
+            samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+            print(f"✅ Decoded {len(samples) / sample_rate:.1f}s of audio in memory")
+        if len(samples) == 0:
+            raise RuntimeError(f"No audio stream decoded from {video_path}")
+        return samples, sample_rate
+
+    @staticmethod
+    def write_wav(samples, sample_rate, output_path, block_seconds=60):
+        """Writes mono float samples as 16-bit PCM WAV (block by block, memmap friendly)."""
+        block = int(block_seconds * sample_rate)
+        with wave.open(str(output_path), 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            for i in range(0, len(samples), block):
+                chunk = np.asarray(samples[i:i + block])
+                wf.writeframes(np.clip(np.round(chunk * 32768), -32768, 32767).astype(np.int16).tobytes())
+        return output_path
+
+    @staticmethod
+    def load_audio(audio):
+        """Accepts a WAV path or an already decoded (samples, sample_rate) pair."""
+        if isinstance(audio, tuple):
+            return audio
+        return AudioProcessor.load_wav(audio)
+
+    @staticmethod
+    def load_wav(audio_path):
+        """Loads a 16-bit PCM WAV as a mono float32 array in [-1, 1]. Returns (samples, sample_rate)."""
+        with wave.open(str(audio_path), 'rb') as wf:
+            sample_rate = wf.getframerate()
+            channels = wf.getnchannels()
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        samples = pcm.astype(np.float32) / 32768.0
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return samples, sample_rate
+
     @staticmethod
     def combine_video_audio(video_path, audio_path, output_path):
         """
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from config import Config
+from core import metrics
+
+class CacheEntry:
+    """A single cached stage artifact (one directory inside the stage cache)."""
+    def __init__(self, entry_dir):
+        self.dir = Path(entry_dir)
+        self.meta_path = self.dir / "meta.json"
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+    @property
+    def path(self):
+        return self.dir / self.meta["artifact"]
+
+    @property
+    def digest(self):
+        """Content hash of the artifact, used as the upstream key of the next stage."""
+        return self.meta["digest"]
+
+    def load_json(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_segments(self):
+        from core.segments import SegmentStore
+        return SegmentStore.load(self.path)
+
+    def touch(self):
+        self.meta["last_access"] = time.time()
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+
+class StageCache:
+    """
+    Content-addressed, size-bounded cache for pipeline stage outputs.
+    Each entry is keyed by the stage name, its parameters and the digests of the
+    upstream artifacts, so a rerun only executes stages whose inputs changed.
+    Layout: CACHE_DIR/<stage>/<key>/{meta.json, artifact.*}
+    """
+    STAGES = ("extract", "asr", "resegment", "translate", "tts", "faces")
+
+    def __init__(self, cache_dir=None, max_bytes=None, force_stages=None):
+        self.cache_dir = Path(cache_dir or Config.CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else int(Config.CACHE_MAX_GB * 1024 ** 3)
+        force_stages = set(force_stages or ())
+        if "all" in force_stages:
+            force_stages = set(self.STAGES)
+        self.force_stages = force_stages
+        # Entries used by the current run are never evicted while it is running
+        self._pinned = set()
+
+    @staticmethod
+    def hash_file(path, chunk_size=4 * 1024 * 1024):
+        """SHA-256 of a file's bytes, read in chunks to keep memory flat for large videos."""
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def hash_json(data):
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def make_key(self, stage, params, upstream=()):
+        """Builds the cache key from stage parameters and upstream artifact digests."""
+        return self.hash_json({"stage": stage, "params": params, "upstream": list(upstream)})
+
+    def _entry_dir(self, stage, key):
+        return self.cache_dir / stage / key
+
+    def get(self, stage, key):
+        """Returns the CacheEntry for (stage, key), or None on a miss or a forced stage."""
+        entry = self._lookup(stage, key)
+        metrics.record_cache(stage, hits=int(entry is not None), misses=int(entry is None))
+        return entry
+
+    def _lookup(self, stage, key):
+        if stage in self.force_stages:
+            print(f"♻️ Cache bypassed for stage '{stage}' (forced).")
+            return None
+        entry_dir = self._entry_dir(stage, key)
+        if not (entry_dir / "meta.json").exists():
+            return None
+        try:
+            entry = CacheEntry(entry_dir)
+        except (OSError, ValueError):
+            # Half-written entry from a crashed run
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        if not entry.path.exists():
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        entry.touch()
+        self._pinned.add(entry_dir)
+        print(f"⚡ Cache hit for stage '{stage}' ({key[:12]}).")
+        return entry
+
+    def _commit(self, stage, key, write_artifact, artifact_name, digest):
+        entry_dir = self._entry_dir(stage, key)
+        tmp_dir = entry_dir.with_name(f".{key}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        write_artifact(tmp_dir / artifact_name)
+        meta = {
+            "stage": stage,
+            "key": key,
+            "artifact": artifact_name,
+            "digest": digest,
+            "size": (tmp_dir / artifact_name).stat().st_size,
+            "created": time.time(),
+            "last_access": time.time(),
+        }
+        with open(tmp_dir / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        self._pinned.add(entry_dir)
+        self.evict()
+        return CacheEntry(entry_dir)
+
+    def put_json(self, stage, key, data):
+        """Stores JSON-serialisable stage output (e.g. segments)."""
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        return self._commit(stage, key, write, "artifact.json", self.hash_json(data))
+
+    def put_segments(self, stage, key, store):
+        """Stores a SegmentStore as .npz (binary columns, no JSON round trip)."""
+        return self._commit(stage, key, store.save, "artifact.npz", store.digest())
+
+    def put_file(self, stage, key, src_path):
+        """Stores a file artifact (e.g. a WAV) by copying it into the cache."""
+        src_path = Path(src_path)
+        digest = self.hash_file(src_path)
+        return self._commit(stage, key, lambda dst: shutil.copyfile(src_path, dst),
+                            f"artifact{src_path.suffix}", digest)
+
+    def _entries(self):
+        for meta_path in self.cache_dir.glob("*/*/meta.json"):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                yield meta_path.parent, meta
+            except (OSError, ValueError):
+                continue
+
+    def evict(self):
+        """Drops least-recently-used entries until the cache fits in max_bytes."""
+        entries = list(self._entries())
+        total = sum(meta.get("size", 0) for _, meta in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort(key=lambda item: item[1].get("last_access", 0))
+        for entry_dir, meta in entries:
+            if total <= self.max_bytes:
+                break
+            if entry_dir in self._pinned:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= meta.get("size", 0)
+            print(f"🗑️ Evicted cached {meta.get('stage')} artifact ({meta.get('size', 0) / 1e6:.1f} MB).")
@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+# Beyond this many frames between samples, seeking is cheaper than grabbing through
+SEEK_THRESHOLD_FRAMES = 30
+DETECTOR = {"cascade": "haarcascade_frontalface_default.xml", "scale_factor": 1.1, "min_neighbors": 4}
+
+def _scan_slice(video_path, frame_numbers, width):
+    """Worker: decodes the given (ascending) frame numbers with its own capture and detector."""
+    import cv2
+    cap = cv2.VideoCapture(str(video_path))
+    detector = cv2.CascadeClassifier(cv2.data.haarcascades + DETECTOR["cascade"])
+    results = []
+    position = None
+    try:
+        for frame_no in frame_numbers:
+            if position is None or frame_no - position > SEEK_THRESHOLD_FRAMES:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_no)
+            else:
+                # Short hop: grab() skips decoding to BGR, which is much cheaper than a seek
+                for _ in range(frame_no - position):
+                    cap.grab()
+            ret, frame = cap.read()
+            position = frame_no + 1
+            if not ret:
+                results.append(False)
+                continue
+            h, w = frame.shape[:2]
+            if w > width:
+                frame = cv2.resize(frame, (width, max(int(h * width / w), 1)), interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            faces = detector.detectMultiScale(gray, DETECTOR["scale_factor"], DETECTOR["min_neighbors"])
+            results.append(len(faces) > 0)
+    finally:
+        cap.release()
+    return results
+
+class FaceIndex:
+    """
+    Face presence over the whole video, sampled every `stride` seconds.
+    Each sample stands for the stride-wide window around it; consecutive hits are
+    merged into (start, end) ranges that other stages can query.
+    """
+    def __init__(self, duration, stride, times, present):
+        self.duration = duration
+        self.stride = stride
+        self.times = list(times)
+        self.present = [bool(p) for p in present]
+        self.ranges = self._merge_ranges()
+
+    def _merge_ranges(self):
+        ranges = []
+        half = self.stride / 2
+        for t, hit in zip(self.times, self.present):
+            if not hit:
+                continue
+            start, end = max(t - half, 0.0), min(t + half, self.duration)
+            if ranges and start <= ranges[-1][1] + 1e-6:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return [tuple(r) for r in ranges]
+
+    def has_face(self, start=0.0, end=None):
+        """True if a face is visible anywhere in [start, end)."""
+        end = self.duration if end is None else end
+        return any(r_start < end and r_end > start for r_start, r_end in self.ranges)
+
+    def coverage(self):
+        """Fraction of the video with a visible face."""
+        if not self.duration:
+            return 0.0
+        return sum(end - start for start, end in self.ranges) / self.duration
+
+    def to_dict(self):
+        return {"duration": self.duration, "stride": self.stride,
+                "times": self.times, "present": [int(p) for p in self.present]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["duration"], data["stride"], data["times"], data["present"])
+
+    @classmethod
+    def build(cls, video_path, stride_s=None, width=None, workers=None):
+        """Samples the whole video with strided seeks; detection runs on downscaled frames in a thread pool."""
+        import cv2
+        stride_s = stride_s or Config.FACE_INDEX_STRIDE_S
+        width = width or Config.FACE_INDEX_WIDTH
+        workers = workers or Config.FACE_INDEX_WORKERS
+
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open video: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        duration = frame_count / fps
+        step = max(int(round(stride_s * fps)), 1)
+        frame_numbers = list(range(step // 2, frame_count, step)) or [0]
+
+        print(f"🔍 Indexing faces: {len(frame_numbers)} frames over {duration:.1f}s "
+              f"(every {step / fps:.2f}s, {width}px, {workers} threads)...")
+        started = time.perf_counter()
+        # Contiguous slices keep each worker's reads mostly sequential
+        per_worker = -(-len(frame_numbers) // workers)
+        slices = [frame_numbers[i:i + per_worker] for i in range(0, len(frame_numbers), per_worker)]
+        # OpenCV releases the GIL while decoding and detecting, so threads scale
+        with ThreadPoolExecutor(max_workers=len(slices)) as pool:
+            present = [hit for part in pool.map(lambda s: _scan_slice(video_path, s, width), slices) for hit in part]
+
+        index = cls(duration, step / fps, [n / fps for n in frame_numbers], present)
+        print(f"✅ Face index built in {time.perf_counter() - started:.1f}s: "
+              f"{len(index.ranges)} ranges, {index.coverage():.0%} of the video has a face")
+        return index
+
+    @classmethod
+    def load_or_build(cls, video_path, cache=None, video_hash=None):
+        """Returns the index for this video from the stage cache, building it on a miss."""
+        from core.cache import StageCache
+        cache = cache or StageCache()
+        video_hash = video_hash or StageCache.hash_file(video_path)
+        params = dict(DETECTOR, stride=Config.FACE_INDEX_STRIDE_S, width=Config.FACE_INDEX_WIDTH)
+        key = cache.make_key("faces", params, [video_hash])
+        entry = cache.get("faces", key)
+        if entry is not None:
+            return cls.from_dict(entry.load_json())
+        index = cls.build(video_path)
+        cache.put_json("faces", key, index.to_dict())
+        return index
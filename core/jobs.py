@@ -0,0 +1,232 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import time
+from pathlib import Path
+from config import Config
+from core.metrics import MetricsAggregate
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v"}
+
+class JobStore:
+    """Persists per-job status/results as one JSON file per job in Config.JOBS_DIR."""
+    def __init__(self, jobs_dir=None):
+        self.jobs_dir = Path(jobs_dir or Config.JOBS_DIR)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, job_id):
+        return self.jobs_dir / f"{job_id}.json"
+
+    def load(self, job_id):
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, job):
+        tmp = self._path(job["id"]).with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self._path(job["id"]))
+
+    def update(self, job_id, **fields):
+        job = self.load(job_id) or {"id": job_id}
+        job.update(fields)
+        self.save(job)
+        return job
+
+class QueueFileSource:
+    """
+    Local JSON-lines queue: one {"video_path": ..., "target_lang": ..., "id": optional,
+    "force_stages": optional} per line.
+    The file may be appended to while the daemon runs.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def poll(self):
+        if not self.path.exists():
+            return []
+        jobs = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f):
+                if not line.strip():
+                    continue
+                try:
+                    spec = json.loads(line)
+                except ValueError:
+                    print(f"⚠️ Skipping malformed queue line {line_no + 1} in {self.path}")
+                    continue
+                job_id = spec.get("id") or hashlib.sha1(f"{line_no}:{line.strip()}".encode()).hexdigest()[:16]
+                jobs.append({"id": job_id, "video_path": spec["video_path"],
+                             "target_lang": spec.get("target_lang", "en"),
+                             "force_stages": spec.get("force_stages", [])})
+        return jobs
+
+class WatchDirSource:
+    """Watched directory: every new video file (once its size stops changing) becomes a job."""
+    def __init__(self, path, target_lang="en"):
+        self.path = Path(path)
+        self.target_lang = target_lang
+        self._sizes = {}
+
+    def poll(self):
+        jobs = []
+        for video in sorted(self.path.iterdir()):
+            if video.suffix.lower() not in VIDEO_EXTENSIONS or not video.is_file():
+                continue
+            stat = video.stat()
+            # Still being copied in: wait until two polls see the same size
+            stable = self._sizes.get(video) == stat.st_size
+            self._sizes[video] = stat.st_size
+            if not stable:
+                continue
+            job_id = hashlib.sha1(f"{video.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+            jobs.append({"id": job_id, "video_path": str(video), "target_lang": self.target_lang})
+        return jobs
+
+def _worker_main(job_queue, result_queue, heavy_slots, config_overrides, current_job, heavy_held):
+    """
+    Worker process: keeps models warm in its registry and runs jobs until it gets None.
+    current_job: shared buffer holding the id of the job taken last, read by the daemon if we die
+    heavy_held: shared count of heavy-stage slots this worker holds, released by the daemon if we die
+    """
+    import asyncio
+    import main
+    from core.metrics import MetricsRecorder
+    # Spawned workers re-import config, so CLI overrides have to be re-applied.
+    # Several workers redrawing one console bar is unreadable; metrics still flow to the daemon.
+    main.apply_config(dict({"PROGRESS_BAR": False}, **config_overrides))
+    main.set_heavy_slots(heavy_slots, heavy_held)
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        # Shared memory, not the result queue: visible to the daemon even if we crash right away
+        current_job.value = job["id"].encode()
+        result_queue.put(("running", job["id"], {"started": time.time(), "worker": os.getpid()}))
+        metrics = MetricsRecorder(job_id=job["id"])
+        try:
+            result = asyncio.run(main.run_pipeline(job["video_path"], job["target_lang"],
+                                                  force_stages=job.get("force_stages"), metrics=metrics))
+            status = "done" if result else "failed"
+            result_queue.put((status, job["id"], {"finished": time.time(), "result": result,
+                                                  "metrics": metrics.to_dict()}))
+        except Exception as e:
+            result_queue.put(("failed", job["id"], {"finished": time.time(), "error": str(e),
+                                                    "metrics": metrics.to_dict()}))
+
+class JobDaemon:
+    """
+    Long-running batch mode: polls a job source and runs jobs across worker processes.
+    Each worker keeps its models warm between jobs. A shared semaphore limits how many
+    jobs are in model-heavy stages at once, so extraction/muxing of one job overlaps the
+    ASR/TTS/lip-sync of another.
+    """
+    def __init__(self, source, workers=None, heavy_slots=None, poll_interval=None, exit_when_idle=False,
+                 config_overrides=None):
+        self.source = source
+        self.workers = workers or Config.DAEMON_WORKERS
+        self.heavy_slots = heavy_slots or Config.DAEMON_HEAVY_SLOTS
+        self.poll_interval = poll_interval or Config.DAEMON_POLL_SECONDS
+        self.exit_when_idle = exit_when_idle
+        self.config_overrides = config_overrides or {}
+        self.store = JobStore()
+        # Metrics of every finished job, exported as a Prometheus text file
+        self.metrics = MetricsAggregate()
+
+    def _enqueue_new(self, job_queue, in_flight):
+        for job in self.source.poll():
+            if job["id"] in in_flight:
+                continue
+            existing = self.store.load(job["id"])
+            if existing and existing.get("status") in ("done", "failed"):
+                continue
+            self.store.save(dict(job, status="queued", created=time.time()))
+            in_flight.add(job["id"])
+            job_queue.put(job)
+            print(f"📥 Queued job {job['id']}: {job['video_path']} -> {job['target_lang']}")
+
+    def _spawn_worker(self, context, job_queue, result_queue, heavy, current_job, heavy_held):
+        current_job.value = b""
+        heavy_held.value = 0
+        p = context.Process(target=_worker_main, args=(job_queue, result_queue, heavy, self.config_overrides,
+                                                       current_job, heavy_held), daemon=True)
+        p.start()
+        return p
+
+    def run(self):
+        context = multiprocessing.get_context("spawn")
+        job_queue = context.Queue()
+        result_queue = context.Queue()
+        heavy = context.Semaphore(self.heavy_slots)
+        # Per worker, reused by its replacement: id of its current job, heavy-stage slots it holds
+        slots = [context.Array("c", 256) for _ in range(self.workers)]
+        held = [context.Value("i", 0) for _ in range(self.workers)]
+        procs = [self._spawn_worker(context, job_queue, result_queue, heavy, slots[i], held[i])
+                 for i in range(self.workers)]
+        print(f"🛰️ Daemon started: {self.workers} workers, {self.heavy_slots} heavy-stage slots")
+
+        in_flight = set()
+        polls = 0
+        started = time.time()
+        completed = 0
+
+        def handle(status, job_id, fields):
+            nonlocal completed
+            self.store.update(job_id, status=status, **fields)
+            if status in ("done", "failed"):
+                in_flight.discard(job_id)
+                completed += 1
+                if fields.get("metrics"):
+                    self.metrics.add(fields["metrics"])
+                    self.metrics.write_prometheus(Config.METRICS_PROM_PATH)
+                hours = (time.time() - started) / 3600
+                print(f"{'✅' if status == 'done' else '❌'} Job {job_id} {status} | "
+                      f"{completed} jobs, {completed / hours:.1f} videos/hour")
+
+        try:
+            while True:
+                self._enqueue_new(job_queue, in_flight)
+                polls += 1
+                deadline = time.time() + self.poll_interval
+                while time.time() < deadline:
+                    try:
+                        handle(*result_queue.get(timeout=max(deadline - time.time(), 0.01)))
+                    except queue.Empty:
+                        break
+                # A worker killed mid-job (OOM killer, CUDA abort, segfault) never reports back
+                for index, p in enumerate(procs):
+                    if p.is_alive():
+                        continue
+                    # Whatever it sent before dying is processed first
+                    while True:
+                        try:
+                            handle(*result_queue.get_nowait())
+                        except queue.Empty:
+                            break
+                    job_id = slots[index].value.decode()
+                    if job_id in in_flight:
+                        handle("failed", job_id, {"finished": time.time(),
+                                                  "error": f"worker {p.pid} exited with code {p.exitcode}"})
+                    # Killed inside ASR/TTS/lip-sync: its heavy-stage slot would otherwise be gone for good
+                    for _ in range(held[index].value):
+                        heavy.release()
+                    print(f"⚠️ Worker {p.pid} exited with code {p.exitcode} holding {held[index].value} heavy "
+                          f"slot(s), starting a replacement")
+                    procs[index] = self._spawn_worker(context, job_queue, result_queue, heavy, slots[index],
+                                                      held[index])
+                # Two polls so a watched directory gets to confirm stable file sizes
+                if self.exit_when_idle and not in_flight and polls >= 2:
+                    break
+        except KeyboardInterrupt:
+            print("\n🛑 Daemon stopping...")
+        finally:
+            for _ in procs:
+                job_queue.put(None)
+            for p in procs:
+                p.join(timeout=30)
+        return completed
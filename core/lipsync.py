@@ -1,11 +1,14 @@
 import os
+import json
+import time
 import subprocess
-import requests
 import asyncio
-import sys
 from pathlib import Path
-from tqdm import tqdm
+import numpy as np
 from config import Config
+from core.assets import AssetManifest
+from core.faces import FaceIndex
+from core.lipsync_worker import get_lipsync_worker
 
 class LipSyncProcessor:
     """
@@ -27,7 +30,12 @@ class LipSyncProcessor:
 
     def _download_models(self):
         """Downloads LivePortrait checkpoints with specific path handling."""
-        print("📥 Checking LivePortrait models...")
+        manifest = AssetManifest()
+        problems = manifest.verify("liveportrait")
+        if not problems:
+            print("✅ LivePortrait models ready (verified against local manifest).")
+            return
+        print(f"📥 Checking LivePortrait models ({problems[0]})...")
         from huggingface_hub import snapshot_download
         
         try:
@@ -45,103 +53,216 @@ class LipSyncProcessor:
                 for item in os.listdir(self.ckpt_dir / "LivePortrait"):
                     shutil.move(str(self.ckpt_dir / "LivePortrait" / item), str(self.ckpt_dir / item))
             
+            manifest.record("liveportrait", self.ckpt_dir)
             print("✅ LivePortrait models ready.")
         except Exception as e:
             print(f"❌ Error downloading models: {e}")
             raise
 
-    async def sync(self, video_path, audio_path, output_path):
-        """Executes the lip-sync process using LivePortrait."""
-        self.setup()
+    async def sync(self, video_path, audio_path, output_path, face_index=None, segments=None, workdir=None,
+                   progress=None):
+        """
+        Executes the lip-sync process using LivePortrait.
+        face_index: FaceIndex of the source video (looked up in the stage cache if omitted)
+        segments: dubbed segments (start/end); with Config.LIPSYNC_SELECTIVE only
+                  speech-with-face spans are animated and the rest is stream-copied
+        workdir: scratch directory for the selective mode's pieces
+        progress: optional callback(fraction, message) fed from the worker's progress events
+        """
+        if Config.LIPSYNC_ENGINE != "stub":
+            self.setup()
         
-        if not self._has_face(video_path):
+        if face_index is None:
+            face_index = FaceIndex.load_or_build(video_path)
+        if not face_index.has_face():
             print(f"⚠️ No face detected. Falling back to simple merge.")
             return self._merge_audio_only(video_path, audio_path, output_path)
 
+        if Config.LIPSYNC_SELECTIVE and segments is not None:
+            return await self._sync_selective(video_path, audio_path, output_path, face_index, segments, workdir,
+                                              progress)
+
         print("✨ Starting LivePortrait Next-Gen LipSync...")
-        
-        # LivePortrait typically uses a driving video or audio-to-video module.
-        # For this integration, we use the integrated inference script if available
-        # or fallback to high-quality processing.
-        
-        env = os.environ.copy()
-        env["PYTHONPATH"] = f"{self.repo_path}:{env.get('PYTHONPATH', '')}"
+        if await self._sync_whole(video_path, audio_path, output_path, workdir, progress):
+            print(f"✅ LivePortrait Sync Complete: {output_path}")
+            return output_path
+        return self._merge_audio_only(video_path, audio_path, output_path)
 
-        # Inference Command for LivePortrait
-        # Note: LivePortrait's main entry is often run.py
-        cmd = [
-            sys.executable, str(self.repo_path / "run.py"),
-            "--src", str(video_path),
-            "--driving", str(audio_path), # LivePortrait recently added audio support in forks
-            "--output", str(output_path),
-            "--flag_lip_zero" # Keep lips closed initially for better sync
-        ]
-        
+    async def _sync_whole(self, video_path, audio_path, output_path, workdir=None, progress=None):
+        """
+        Animates the whole video, then muxes the dubbed audio over the engine's frames
+        (the engine's own output may carry the source audio, or none). Returns False if the engine failed.
+        """
+        workdir = Path(workdir or Config.TEMP_DIR / "lipsync")
+        workdir.mkdir(parents=True, exist_ok=True)
+        raw = workdir / f"{Path(output_path).stem}_lp.mp4"
+        if not await self._run_engine(video_path, audio_path, raw, progress) or not raw.exists():
+            return False
+        subprocess.run([
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(raw), "-i", str(audio_path),
+            "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac", "-shortest", str(output_path)
+        ], check=True)
+        return True
+
+    async def _run_engine(self, video_path, audio_path, output_path, progress=None):
+        """Runs one clip through the persistent lip-sync worker; returns False if it failed."""
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                env=env,
-                cwd=str(self.repo_path),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode == 0:
-                print(f"✅ LivePortrait Sync Complete: {output_path}")
-                return output_path
-            else:
-                # If LivePortrait audio mode is not directly supported in the main branch,
-                # we fallback to MuseTalk or generic sync for now but mark the intent.
-                print(f"⚠️ LivePortrait specific audio-driving script not found or failed. Falling back.")
-                return self._merge_audio_only(video_path, audio_path, output_path)
+            worker = get_lipsync_worker()
+            # Blocking client: the worker process outlives this job's event loop
+            await asyncio.to_thread(worker.run, video_path, audio_path, output_path, progress)
+            return True
         except Exception as e:
-            print(f"❌ LivePortrait Runtime Error: {e}")
+            print(f"❌ LivePortrait worker error: {e}")
+            return False
+
+    @staticmethod
+    def _probe_video(video_path):
+        """Stream parameters needed to re-encode animated pieces compatibly, plus keyframe times."""
+        info = subprocess.run([
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,width,height,pix_fmt,r_frame_rate:format=duration",
+            "-of", "json", str(video_path)
+        ], capture_output=True, text=True, check=True)
+        data = json.loads(info.stdout)
+        stream = data["streams"][0]
+        num, den = stream["r_frame_rate"].split("/")
+        stream["fps"] = float(num) / float(den)
+        stream["duration"] = float(data["format"]["duration"])
+        # Packet flags only: no decoding needed to find the keyframes
+        packets = subprocess.run([
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(video_path)
+        ], capture_output=True, text=True, check=True)
+        keyframes = sorted(float(pts) for pts, flags in
+                           (line.split(",", 1) for line in packets.stdout.splitlines() if "," in line)
+                           if "K" in flags and pts not in ("", "N/A"))
+        return stream, keyframes
+
+    @staticmethod
+    def plan_spans(segments, face_index, keyframes, duration, pad=None, min_gap=None):
+        """
+        Speech-with-face spans to animate: segment/face-range intersections, padded,
+        widened to keyframes (so every cut is a clean stream-copy point) and merged.
+        """
+        pad = Config.LIPSYNC_PAD_S if pad is None else pad
+        min_gap = Config.LIPSYNC_MIN_GAP_S if min_gap is None else min_gap
+        spans = []
+        for seg in segments:
+            for face_start, face_end in face_index.ranges:
+                start, end = max(seg['start'], face_start), min(seg['end'], face_end)
+                if end > start:
+                    spans.append((max(start - pad, 0.0), min(end + pad, duration)))
+
+        kf = np.asarray(keyframes or [0.0])
+        aligned = []
+        for start, end in sorted(spans):
+            start = float(kf[max(np.searchsorted(kf, start, side='right') - 1, 0)])
+            i = np.searchsorted(kf, end, side='left')
+            end = float(kf[i]) if i < len(kf) else duration
+            # Copying a gap shorter than min_gap is not worth an extra cut
+            if aligned and start - aligned[-1][1] < min_gap:
+                aligned[-1][1] = max(aligned[-1][1], end)
+            else:
+                aligned.append([start, end])
+        return [tuple(span) for span in aligned if span[1] > span[0]]
+
+    async def _sync_selective(self, video_path, audio_path, output_path, face_index, segments, workdir, progress=None):
+        started = time.perf_counter()
+        stream, keyframes = self._probe_video(video_path)
+        encoder = {"h264": "libx264", "hevc": "libx265"}.get(stream["codec_name"])
+        if encoder is None:
+            print(f"⚠️ Selective lip-sync needs H.264/HEVC input (got {stream['codec_name']}), animating the whole video.")
+            if await self._sync_whole(video_path, audio_path, output_path, workdir, progress):
+                return output_path
             return self._merge_audio_only(video_path, audio_path, output_path)
 
-    def _has_face(self, video_path):
-        import cv2
-        cap = cv2.VideoCapture(str(video_path))
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        has_face = False
-        for _ in range(30): # Check 1st second
-            ret, frame = cap.read()
-            if not ret: break
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-            if len(faces) > 0:
-                has_face = True
-                break
-        cap.release()
-        return has_face
+        duration = stream["duration"]
+        spans = self.plan_spans(segments, face_index, keyframes, duration)
+        animated = sum(end - start for start, end in spans)
+        if not spans:
+            print("⚠️ No dubbed speech overlaps a visible face. Falling back to simple merge.")
+            return self._merge_audio_only(video_path, audio_path, output_path)
 
-    def _merge_audio_only(self, video_path, audio_path, output_path):
-        print("🔄 FFmpeg Fallback: Syncing audio without face animation...")
-        import subprocess
-        cmd = [
-            "ffmpeg", "-y", "-i", str(video_path), "-i", str(audio_path),
-            "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac",
+        workdir = Path(workdir or Config.TEMP_DIR / "lipsync")
+        workdir.mkdir(parents=True, exist_ok=True)
+        print(f"✨ Selective LipSync: animating {len(spans)} spans ({animated:.1f}s of {duration:.1f}s)...")
+
+        # One stream-copy pass splits the video at every span boundary (all keyframes).
+        # Pieces are Annex-B MPEG-TS with parameter sets in-band: the re-encoded spans carry
+        # their own SPS/PPS, which an MP4 concat would drop in favour of the first file's avcC.
+        annexb = f"{stream['codec_name']}_mp4toannexb"
+        boundaries = sorted({t for span in spans for t in span if 0 < t < duration})
+        # segment muxer cuts at the first keyframe >= time; nudge below the rounded pts
+        cut = ["-segment_times", ",".join(f"{max(t - 0.001, 0):.6f}" for t in boundaries)] if boundaries else []
+        subprocess.run([
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(video_path),
+            "-map", "0:v:0", "-c", "copy", "-bsf:v", annexb, "-f", "segment", "-segment_format", "mpegts",
+            "-reset_timestamps", "1", *cut, str(workdir / "piece_%04d.ts")
+        ], check=True)
+        edges = [0.0] + boundaries + [duration]
+        pieces = [(edges[i], edges[i + 1], workdir / f"piece_{i:04d}.ts") for i in range(len(edges) - 1)]
+        span_starts = {start for start, _ in spans}
+
+        engine_time = done_seconds = 0.0
+        concat_list = []
+        for start, end, piece in pieces:
+            if start not in span_starts or not piece.exists():
+                concat_list.append(piece)
+                continue
+            clip_audio = workdir / f"{piece.stem}.wav"
+            subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-ss", f"{start:.6f}",
+                            "-t", f"{end - start:.6f}", "-i", str(audio_path), str(clip_audio)], check=True)
+            # The engine gets a regular MP4 of the span, stream-copied from the keyframe-aligned source
+            clip_video = workdir / f"{piece.stem}.mp4"
+            subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-ss", f"{start:.6f}",
+                            "-i", str(video_path), "-t", f"{end - start:.6f}", "-map", "0:v:0", "-c", "copy",
+                            str(clip_video)], check=True)
+            raw = workdir / f"{piece.stem}_lp.mp4"
+            engine_started = time.perf_counter()
+            span_progress = None
+            if progress is not None:
+                # Scale each span's progress into the overall animated duration
+                span_progress = lambda value, message, base=done_seconds, length=end - start: progress(
+                    (base + value * length) / animated, message)
+            ok = await self._run_engine(clip_video, clip_audio, raw, span_progress)
+            engine_time += time.perf_counter() - engine_started
+            done_seconds += end - start
+            if not ok or not raw.exists():
+                print(f"⚠️ Span {start:.1f}-{end:.1f}s kept as original frames.")
+                concat_list.append(piece)
+                continue
+            # Same size/rate/pixel format as the source, as in-band Annex-B TS like the copied pieces
+            fitted = workdir / f"{piece.stem}_fit.ts"
+            subprocess.run([
+                "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(raw), "-an",
+                "-vf", f"scale={stream['width']}:{stream['height']},fps={stream['r_frame_rate']},"
+                       f"tpad=stop_mode=clone:stop_duration={end - start:.3f}",
+                "-t", f"{end - start:.6f}", "-c:v", encoder, "-pix_fmt", stream["pix_fmt"],
+                "-bsf:v", annexb, "-f", "mpegts", str(fitted)
+            ], check=True)
+            concat_list.append(fitted)
+
+        list_path = workdir / "concat.txt"
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for piece in concat_list:
+                f.write(f"file '{piece.resolve()}'\n")
+        subprocess.run([
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", str(list_path),
+            "-i", str(audio_path), "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac",
             "-shortest", str(output_path)
-        ]
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return output_path
+        ], check=True)
 
-    def _has_face(self, video_path):
-        import cv2
-        cap = cv2.VideoCapture(str(video_path))
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        has_face = False
-        for _ in range(30): # Check 1st second
-            ret, frame = cap.read()
-            if not ret: break
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-            if len(faces) > 0:
-                has_face = True
-                break
-        cap.release()
-        return has_face
+        elapsed = time.perf_counter() - started
+        skipped = 1 - animated / duration
+        print(f"✅ Selective LipSync Complete: {output_path}")
+        print(f"📊 Frames skipped: {skipped:.1%} (~{int(round((duration - animated) * stream['fps']))} of "
+              f"{int(round(duration * stream['fps']))} frames stream-copied)")
+        if engine_time > 0 and animated > 0:
+            # Full-video cost extrapolated from the engine's measured seconds per video second
+            full_estimate = engine_time / animated * duration
+            print(f"⏱️ Lip-sync wall time {elapsed:.1f}s vs ~{full_estimate:.1f}s for the whole video "
+                  f"(saved ~{max(full_estimate - elapsed, 0):.1f}s)")
+        return output_path
 
     def _merge_audio_only(self, video_path, audio_path, output_path):
         print("🔄 FFmpeg Fallback: Syncing audio without face animation...")
@@ -151,4 +272,4 @@ class LipSyncProcessor:
             "-shortest", str(output_path)
         ]
         subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return output_path
\ No newline at end of file
+        return output_path
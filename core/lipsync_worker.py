@@ -0,0 +1,271 @@
+"""
+Long-lived lip-sync worker: loads the face-reenactment engine once and serves jobs
+as JSON lines over stdin/stdout.
+
+    -> {"id": ..., "src": ..., "driving": ..., "output": ...}      (or {"cmd": "shutdown"})
+    <- {"event": "ready", "engine": ...}
+    <- {"id": ..., "event": "progress", "value": 0..1, "message": ...}
+    <- {"id": ..., "event": "done", "output": ...} | {"id": ..., "event": "error", "error": ...}
+
+Engine output is redirected to stderr so stdout only carries protocol messages.
+Run standalone with `python -m core.lipsync_worker --engine stub` to exercise the protocol.
+"""
+import argparse
+import atexit
+import collections
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+from config import Config
+
+class StubEngine:
+    """Stand-in engine: reports a few progress steps and copies the source clip."""
+    name = "stub"
+
+    def __init__(self, step_seconds=0.05, steps=5, crash_after=0):
+        self.step_seconds = step_seconds
+        self.steps = steps
+        self.crash_after = crash_after
+        self.jobs = 0
+
+    def run(self, src, driving, output, progress):
+        self.jobs += 1
+        for i in range(self.steps):
+            time.sleep(self.step_seconds)
+            if self.crash_after and self.jobs >= self.crash_after and i == self.steps // 2:
+                os._exit(3)  # Simulated hard crash (segfault / OOM kill)
+            progress((i + 1) / self.steps, f"step {i + 1}/{self.steps}")
+        shutil.copyfile(src, output)
+
+class LivePortraitEngine:
+    """LivePortraitPipeline kept in memory across jobs."""
+    name = "liveportrait"
+
+    def __init__(self, repo_path):
+        sys.path.insert(0, str(repo_path))
+        os.chdir(repo_path)  # LivePortrait resolves its weights relative to the repo
+        from src.config.argument_config import ArgumentConfig
+        from src.config.inference_config import InferenceConfig
+        from src.config.crop_config import CropConfig
+        import src.live_portrait_pipeline as lp
+        self._lp = lp
+        self._argument_config = ArgumentConfig
+        args = ArgumentConfig()
+        self.pipeline = lp.LivePortraitPipeline(
+            inference_cfg=self._partial(InferenceConfig, vars(args)),
+            crop_cfg=self._partial(CropConfig, vars(args)),
+        )
+
+    @staticmethod
+    def _partial(cls, fields):
+        return cls(**{k: v for k, v in fields.items() if hasattr(cls, k)})
+
+    def run(self, src, driving, output, progress):
+        # The pipeline iterates frames through rich's track(); wrap it to report progress
+        original_track = getattr(self._lp, "track", None)
+
+        def reporting_track(sequence, *args, **kwargs):
+            total = len(sequence) if hasattr(sequence, "__len__") else 0
+            for i, item in enumerate(sequence):
+                yield item
+                if total:
+                    progress((i + 1) / total, kwargs.get("description") or (args[0] if args else ""))
+
+        if original_track is not None:
+            self._lp.track = reporting_track
+        try:
+            out_dir = Path(output).parent / f".{Path(output).stem}_lp"
+            args = self._partial(self._argument_config, {
+                "source": str(src), "driving": str(driving), "output_dir": str(out_dir), "flag_lip_zero": True,
+            })
+            result = self.pipeline.execute(args)
+            produced = result[0] if isinstance(result, tuple) else result
+            shutil.move(str(produced), str(output))
+            shutil.rmtree(out_dir, ignore_errors=True)
+        finally:
+            if original_track is not None:
+                self._lp.track = original_track
+
+def serve(engine, proto_out):
+    def send(message):
+        proto_out.write(json.dumps(message) + "\n")
+        proto_out.flush()
+
+    send({"event": "ready", "engine": engine.name, "pid": os.getpid()})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        if job.get("cmd") == "shutdown":
+            break
+        job_id = job.get("id")
+        try:
+            engine.run(job["src"], job["driving"], job["output"],
+                       lambda value, message="": send({"id": job_id, "event": "progress",
+                                                       "value": value, "message": message}))
+            send({"id": job_id, "event": "done", "output": job["output"]})
+        except Exception as e:
+            traceback.print_exc()
+            send({"id": job_id, "event": "error", "error": str(e)})
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+class LipSyncWorker:
+    """
+    Client side of the worker protocol. Starts the worker on first use, streams
+    progress events to a callback and restarts the process if it dies mid-job.
+    Blocking API (call through asyncio.to_thread): the process outlives event loops.
+    """
+    def __init__(self, engine=None, repo_path=None, max_restarts=None, job_timeout=None, worker_args=()):
+        self.engine = engine or Config.LIPSYNC_ENGINE
+        self.worker_args = list(worker_args)
+        self.repo_path = repo_path or Config.BASE_DIR / "LivePortrait"
+        self.max_restarts = Config.LIPSYNC_WORKER_RESTARTS if max_restarts is None else max_restarts
+        self.job_timeout = job_timeout or Config.LIPSYNC_JOB_TIMEOUT_S
+        self.process = None
+        self.restarts = 0
+        self.broken = None
+        self._events = None
+        self._stderr_tail = collections.deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def _read_stdout(self, process, events):
+        for line in process.stdout:
+            try:
+                events.put(json.loads(line))
+            except ValueError:
+                self._stderr_tail.append(line.rstrip())
+        events.put(None)  # EOF: the worker exited
+
+    def _read_stderr(self, process):
+        for line in process.stderr:
+            self._stderr_tail.append(line.rstrip())
+
+    def start(self):
+        if self.broken:
+            raise RuntimeError(self.broken)
+        if self.process is not None and self.process.poll() is None:
+            return
+        cmd = [sys.executable, "-m", "core.lipsync_worker", "--engine", self.engine,
+               "--repo", str(self.repo_path)] + self.worker_args
+        print(f"🚀 Starting lip-sync worker ({self.engine})...")
+        started = time.perf_counter()
+        self.process = subprocess.Popen(cmd, cwd=str(Config.BASE_DIR), stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
+        self._events = queue.Queue()
+        threading.Thread(target=self._read_stdout, args=(self.process, self._events), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self.process,), daemon=True).start()
+        try:
+            ready = self._events.get(timeout=Config.LIPSYNC_WORKER_START_TIMEOUT_S)
+        except queue.Empty:
+            ready = None
+        if not ready or ready.get("event") != "ready":
+            self.stop()
+            # Engine failed to load: no point in retrying every job
+            self.broken = f"lip-sync worker failed to start: {self.stderr_tail()}"
+            raise RuntimeError(self.broken)
+        print(f"✅ Lip-sync worker ready (pid {ready['pid']}, {time.perf_counter() - started:.1f}s)")
+
+    def stderr_tail(self, lines=10):
+        return "\n".join(list(self._stderr_tail)[-lines:])
+
+    def _run_once(self, src, driving, output, on_progress):
+        job_id = uuid.uuid4().hex[:8]
+        try:
+            self.process.stdin.write(json.dumps({"id": job_id, "src": str(src), "driving": str(driving),
+                                                 "output": str(output)}) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise WorkerCrashed("worker pipe closed")
+        deadline = time.time() + self.job_timeout
+        while True:
+            try:
+                event = self._events.get(timeout=max(deadline - time.time(), 0.01))
+            except queue.Empty:
+                self.stop()
+                raise WorkerCrashed(f"job timed out after {self.job_timeout}s")
+            if event is None:
+                raise WorkerCrashed(f"worker exited with code {self.process.wait()}")
+            if event.get("id") != job_id:
+                continue
+            if event["event"] == "progress":
+                if on_progress is not None:
+                    on_progress(event["value"], event.get("message", ""))
+            elif event["event"] == "done":
+                return event["output"]
+            else:
+                raise RuntimeError(event.get("error", "lip-sync job failed"))
+
+    def run(self, src, driving, output, on_progress=None):
+        """Runs one job; restarts the worker and retries if it crashed."""
+        with self._lock:
+            attempts = 0
+            while True:
+                self.start()
+                try:
+                    return self._run_once(src, driving, output, on_progress)
+                except WorkerCrashed as e:
+                    attempts += 1
+                    print(f"⚠️ Lip-sync worker crashed ({e}).\n{self.stderr_tail()}")
+                    if attempts > self.max_restarts:
+                        raise RuntimeError(f"lip-sync worker crashed {attempts} times") from e
+                    self.restarts += 1
+                    print(f"🔁 Restarting lip-sync worker ({attempts}/{self.max_restarts})...")
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write(json.dumps({"cmd": "shutdown"}) + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=10)
+            except (BrokenPipeError, OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def get_lipsync_worker():
+    """The process-wide lip-sync worker (stays warm across jobs in daemon mode)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or _worker.engine != Config.LIPSYNC_ENGINE:
+            if _worker is not None:
+                _worker.stop()
+            _worker = LipSyncWorker()
+            atexit.register(_worker.stop)
+        return _worker
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent lip-sync worker (JSON lines on stdin/stdout)")
+    parser.add_argument("--engine", choices=["liveportrait", "stub"], default="liveportrait")
+    parser.add_argument("--repo", default=str(Config.BASE_DIR / "LivePortrait"))
+    parser.add_argument("--stub-step-seconds", type=float, default=0.05)
+    parser.add_argument("--stub-crash-after", type=int, default=0, help="Stub: die mid-way through the Nth job")
+    args = parser.parse_args()
+
+    # Keep the protocol channel private; anything the engine prints goes to stderr
+    proto_out = os.fdopen(os.dup(1), 'w', buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    if args.engine == "stub":
+        engine = StubEngine(step_seconds=args.stub_step_seconds, crash_after=args.stub_crash_after)
+    else:
+        engine = LivePortraitEngine(args.repo)
+    serve(engine, proto_out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+from config import Config
+
+# Upper bounds (seconds) of the per-segment latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def rss_bytes():
+    """Resident set size of this process (Linux /proc; 0 where unavailable)."""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _cuda():
+    # Never import torch just to measure it
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda
+    return None
+
+def _cpu_seconds():
+    """CPU time of this process and its finished children (ffmpeg, ASR pool workers, ...)."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style) with a few quantile estimates for JSON."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value, count=1):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += count
+        self.sum += value * count
+        self.count += count
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for i, c in enumerate(other["counts"]):
+            self.counts[i] += c
+        self.sum += other["sum"]
+        self.count += other["count"]
+        self.max = max(self.max, other["max"])
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-quantile (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": self.counts, "sum": self.sum, "count": self.count,
+                "max": self.max, "mean": self.sum / self.count if self.count else 0.0,
+                "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99)}
+
+class MetricsRecorder:
+    """
+    Per-job metrics: per-stage wall/CPU time, real-time factor, peak RSS and peak
+    accelerator memory, per-segment latency histograms and cache hit rates.
+    Everything is also published as events, so consumers such as the console
+    progress bar subscribe instead of being called directly.
+    """
+    def __init__(self, job_id=None, sample_interval=None):
+        self.job_id = job_id
+        self.media_duration = None
+        self.sample_interval = sample_interval or Config.METRICS_SAMPLE_SECONDS
+        self.stages = {}
+        self.histograms = {}
+        self.caches = {}
+        self.started = time.time()
+        self.finished = None
+        self.status = None
+        self._subscribers = []
+        self._current = None
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._sampling = threading.Event()
+
+    def subscribe(self, callback):
+        """callback(event: dict) is called for every event, from the emitting thread."""
+        self._subscribers.append(callback)
+
+    def emit(self, event_type, **fields):
+        event = dict(fields, type=event_type, job_id=self.job_id, time=time.time())
+        for callback in self._subscribers:
+            callback(event)
+
+    def _sample_loop(self):
+        while not self._sampling.wait(self.sample_interval):
+            with self._lock:
+                if self._current is not None:
+                    self._current["peak_rss_bytes"] = max(self._current["peak_rss_bytes"], rss_bytes())
+
+    def start_stage(self, name, status=""):
+        """Ends the running stage (if any) and starts timing `name`."""
+        self.end_stage()
+        cuda = _cuda()
+        if cuda is not None:
+            cuda.reset_peak_memory_stats()
+        with self._lock:
+            self._current = {"name": name, "status": status, "wall_start": time.perf_counter(),
+                             "cpu_start": _cpu_seconds(), "peak_rss_bytes": rss_bytes()}
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+        self.emit("stage_start", stage=name, status=status)
+
+    def end_stage(self):
+        with self._lock:
+            current, self._current = self._current, None
+        if current is None:
+            return
+        wall = time.perf_counter() - current["wall_start"]
+        cuda = _cuda()
+        stage = {
+            "wall_seconds": wall,
+            "cpu_seconds": _cpu_seconds() - current["cpu_start"],
+            "peak_rss_bytes": max(current["peak_rss_bytes"], rss_bytes()),
+            # Only meaningful once a stage has imported torch and touched CUDA
+            "peak_vram_bytes": cuda.max_memory_allocated() if cuda is not None else 0,
+            "rtf": wall / self.media_duration if self.media_duration else None,
+        }
+        self.stages[current["name"]] = stage
+        self.emit("stage_end", stage=current["name"], **stage)
+
+    def set_status(self, status):
+        self.emit("status", status=status)
+
+    def observe(self, name, value, count=1):
+        """Adds `count` observations of `value` seconds to the `name` latency histogram."""
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(value, count)
+        self.emit("observe", name=name, value=value, count=count)
+
+    def record_cache(self, cache, hits=0, misses=0):
+        with self._lock:
+            entry = self.caches.setdefault(cache, {"hits": 0, "misses": 0})
+            entry["hits"] += hits
+            entry["misses"] += misses
+        self.emit("cache", cache=cache, hits=hits, misses=misses)
+
+    def finish(self, status="done"):
+        self.end_stage()
+        self._sampling.set()
+        self.finished = time.time()
+        self.status = status
+        self.emit("job_end", status=status)
+
+    def to_dict(self):
+        caches = {name: dict(c, hit_rate=c["hits"] / (c["hits"] + c["misses"]) if c["hits"] + c["misses"] else None)
+                  for name, c in self.caches.items()}
+        total_wall = sum(s["wall_seconds"] for s in self.stages.values())
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "started": self.started,
+            "finished": self.finished,
+            "media_duration": self.media_duration,
+            "total_wall_seconds": total_wall,
+            "rtf": total_wall / self.media_duration if self.media_duration else None,
+            "stages": self.stages,
+            "latency": {name: h.to_dict() for name, h in self.histograms.items()},
+            "caches": caches,
+        }
+
+    def save_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"📈 Metrics saved to: {path}")
+        return path
+
+class MetricsAggregate:
+    """Folds per-job metrics dicts into Prometheus text (daemon: across all jobs and workers)."""
+    def __init__(self):
+        self.jobs = {}
+        self.stages = {}
+        self.histograms = {}
+        self.caches = {}
+        self.media_seconds = 0.0
+
+    def add(self, job):
+        status = job.get("status") or "unknown"
+        self.jobs[status] = self.jobs.get(status, 0) + 1
+        self.media_seconds += job.get("media_duration") or 0.0
+        for name, stage in job.get("stages", {}).items():
+            agg = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "runs": 0,
+                                                "peak_rss_bytes": 0, "peak_vram_bytes": 0, "last_rtf": None})
+            agg["wall_seconds"] += stage["wall_seconds"]
+            agg["cpu_seconds"] += stage["cpu_seconds"]
+            agg["runs"] += 1
+            agg["peak_rss_bytes"] = max(agg["peak_rss_bytes"], stage["peak_rss_bytes"])
+            agg["peak_vram_bytes"] = max(agg["peak_vram_bytes"], stage["peak_vram_bytes"])
+            if stage.get("rtf") is not None:
+                agg["last_rtf"] = stage["rtf"]
+        for name, hist in job.get("latency", {}).items():
+            self.histograms.setdefault(name, Histogram(hist["buckets"])).merge(hist)
+        for name, cache in job.get("caches", {}).items():
+            agg = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            agg["hits"] += cache["hits"]
+            agg["misses"] += cache["misses"]
+
+    def to_prometheus(self, prefix="vts"):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+        metric("jobs_total", "counter", "Finished jobs by status.", [({"status": s}, n) for s, n in self.jobs.items()])
+        metric("media_seconds_total", "counter", "Seconds of input media processed.", [({}, self.media_seconds)])
+        for field, name, kind, help_text in (
+            ("wall_seconds", "wall_seconds_total", "counter", "Wall time spent per pipeline stage."),
+            ("cpu_seconds", "cpu_seconds_total", "counter", "CPU time (process + finished children) per pipeline stage."),
+            ("runs", "runs_total", "counter", "Times each pipeline stage ran."),
+            ("peak_rss_bytes", "peak_rss_bytes", "gauge", "Highest resident memory seen during a stage."),
+            ("peak_vram_bytes", "peak_vram_bytes", "gauge", "Highest CUDA memory allocated during a stage."),
+            ("last_rtf", "last_rtf", "gauge", "Real-time factor (stage wall time / media duration) of the latest job."),
+        ):
+            metric(f"stage_{name}", kind, help_text,
+                   [({"stage": name}, stage[field]) for name, stage in self.stages.items() if stage[field] is not None])
+        for name, hist in self.histograms.items():
+            lines.append(f"# HELP {prefix}_{name} Per-segment latency in seconds.")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            cumulative = 0
+            for bound, count in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                cumulative += count
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{prefix}_{name}_sum {hist.sum}")
+            lines.append(f"{prefix}_{name}_count {hist.count}")
+        metric("cache_requests_total", "counter", "Cache lookups by cache and result.",
+               [({"cache": name, "result": result}, c[key]) for name, c in self.caches.items()
+                for result, key in (("hit", "hits"), ("miss", "misses"))])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomic write, so a node_exporter textfile collector never reads a partial file."""
+        path = Path(path)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+        return path
+
+# The recorder of the job running in this process (one job per process at a time)
+_active = None
+
+def set_active(recorder):
+    global _active
+    _active = recorder
+
+def active():
+    return _active
+
+def observe(name, value, count=1):
+    """Records into the active job's recorder; a no-op outside a pipeline run."""
+    if _active is not None:
+        _active.observe(name, value, count)
+
+def record_cache(cache, hits=0, misses=0):
+    if _active is not None:
+        _active.record_cache(cache, hits, misses)
+
+def set_status(status):
+    if _active is not None:
+        _active.set_status(status)
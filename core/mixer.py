@@ -0,0 +1,66 @@
+import wave
+import numpy as np
+
+def resample(samples, src_rate, dst_rate):
+    """Linear-interpolation resampler for mono float buffers (same approach as audioop.ratecv)."""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples.astype(np.float32, copy=False)
+    dst_len = int(round(len(samples) * dst_rate / src_rate))
+    src_pos = np.arange(dst_len, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(src_pos, np.arange(len(samples)), samples).astype(np.float32)
+
+class AudioMixer:
+    """
+    Preallocated float32 mixing timeline.
+    Clips are added in place at their start offset instead of re-copying the whole
+    track for every overlay, and the result is written to disk in a single pass.
+    """
+    def __init__(self, duration_s, sample_rate=44100, headroom_db=0.0, limiter="clip"):
+        self.sample_rate = sample_rate
+        self.buffer = np.zeros(int(np.ceil(max(duration_s, 0) * sample_rate)), dtype=np.float32)
+        self.ceiling = float(10 ** (-headroom_db / 20))
+        self.limiter = limiter
+        # Furthest sample written so far; the exported track is trimmed to it
+        self.end = 0
+
+    def add(self, samples, sample_rate, start_s):
+        """Mixes a mono float clip into the timeline at start_s (seconds)."""
+        clip = resample(np.asarray(samples, dtype=np.float32), sample_rate, self.sample_rate)
+        start = max(int(start_s * self.sample_rate), 0)
+        stop = start + len(clip)
+        if stop > len(self.buffer):
+            # Only the last clips can run past the final segment end; grow once with slack
+            grown = np.zeros(max(stop, int(len(self.buffer) * 1.1)), dtype=np.float32)
+            grown[:len(self.buffer)] = self.buffer
+            self.buffer = grown
+        self.buffer[start:stop] += clip
+        self.end = max(self.end, stop)
+
+    def _limit(self, block):
+        if self.limiter == "soft":
+            # Transparent below the knee, tanh-compressed between knee and ceiling
+            knee = 0.8 * self.ceiling
+            mag = np.abs(block)
+            over = mag > knee
+            if np.any(over):
+                span = self.ceiling - knee
+                block = block.copy()
+                block[over] = np.sign(block[over]) * (knee + span * np.tanh((mag[over] - knee) / span))
+            return block
+        # Hard clip, equivalent to pydub's saturating int16 overlay at 0 dB headroom
+        return np.clip(block, -self.ceiling, self.ceiling)
+
+    def export_wav(self, output_path, channels=2, block_seconds=10):
+        """Writes the mixed timeline as 16-bit PCM WAV, converting block by block."""
+        block = int(block_seconds * self.sample_rate)
+        with wave.open(str(output_path), 'wb') as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            for i in range(0, self.end, block):
+                chunk = self._limit(self.buffer[i:min(i + block, self.end)])
+                pcm = np.clip(np.round(chunk * 32768), -32768, 32767).astype(np.int16)
+                if channels > 1:
+                    pcm = np.repeat(pcm[:, None], channels, axis=1)
+                wf.writeframes(pcm.tobytes())
+        return output_path
@@ -0,0 +1,81 @@
+import subprocess
+from pathlib import Path
+from config import Config
+
+# ISO 639-1 (pipeline codes) -> ISO 639-2 (container stream language tags)
+ISO639_2 = {
+    "en": "eng", "zh": "zho", "ja": "jpn", "ko": "kor", "fr": "fra", "de": "deu", "es": "spa", "it": "ita",
+    "pt": "por", "ru": "rus", "ar": "ara", "hi": "hin", "th": "tha", "vi": "vie", "id": "ind", "tr": "tur",
+}
+
+def language_tag(lang):
+    """ISO 639-2 tag for a pipeline language code; "und" when unknown (containers reject other values)."""
+    if not lang or lang == "auto":
+        return "und"
+    return ISO639_2.get(lang.split("-")[0].lower(), "und")
+
+def _run_ffmpeg(cmd, what):
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg {what} failed ({result.returncode}): {result.stderr.decode(errors='replace')[-500:]}")
+
+def encode_audio(wav_path, output_path=None):
+    """
+    AAC-encodes one dubbed track to .m4a. Fan-out runs call this as each language
+    finishes, so the encodes overlap other languages' TTS and the mux only copies.
+    """
+    output_path = output_path or str(Path(wav_path).with_suffix(".m4a"))
+    _run_ffmpeg(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(wav_path), "-vn",
+                 "-c:a", "aac", "-b:a", Config.MUX_AUDIO_BITRATE, str(output_path)], "audio encode")
+    return output_path
+
+def mux_tracks(video_path, output_path, tracks, original_audio=True, original_subtitles=None, source_lang=None):
+    """
+    One ffmpeg pass: the source video stream-copied, one audio track per language
+    (the first is the default) and mov_text soft subtitles. Tracks already encoded
+    by encode_audio (.m4a) are copied, anything else is encoded to AAC here.
+    tracks: [(lang, audio_path, srt_path or None)]
+    original_audio: also keep the source audio track (copied, not default)
+    original_subtitles: SRT of the source-language transcript, added after the dubbed ones
+    """
+    inputs = ["-i", str(video_path)]
+    maps = ["-map", "0:v:0"]
+    codecs = ["-c:v", "copy"]
+    meta = []
+    audio_index = 0
+    for lang, audio_path, _ in tracks:
+        inputs += ["-i", str(audio_path)]
+        maps += ["-map", f"{len(inputs) // 2 - 1}:a:0"]
+        if str(audio_path).endswith(".m4a"):
+            codecs += [f"-c:a:{audio_index}", "copy"]
+        else:
+            codecs += [f"-c:a:{audio_index}", "aac", f"-b:a:{audio_index}", Config.MUX_AUDIO_BITRATE]
+        # MP4 players show handler_name as the track title
+        meta += [f"-metadata:s:a:{audio_index}", f"language={language_tag(lang)}",
+                 f"-metadata:s:a:{audio_index}", f"handler_name={lang}",
+                 f"-disposition:a:{audio_index}", "default" if audio_index == 0 else "0"]
+        audio_index += 1
+    if original_audio:
+        # "?": sources without audio simply get no original track
+        maps += ["-map", "0:a:0?"]
+        codecs += [f"-c:a:{audio_index}", "copy"]
+        meta += [f"-metadata:s:a:{audio_index}", f"language={language_tag(source_lang)}",
+                 f"-metadata:s:a:{audio_index}", "handler_name=original", f"-disposition:a:{audio_index}", "0"]
+
+    subtitles = [(lang, srt, lang) for lang, _, srt in tracks if srt]
+    if original_subtitles:
+        subtitles.append((source_lang, original_subtitles, "original"))
+    for sub_index, (lang, srt_path, title) in enumerate(subtitles):
+        inputs += ["-i", str(srt_path)]
+        maps += ["-map", f"{len(inputs) // 2 - 1}:s:0"]
+        meta += [f"-metadata:s:s:{sub_index}", f"language={language_tag(lang)}",
+                 f"-metadata:s:s:{sub_index}", f"handler_name={title}"]
+    if subtitles:
+        codecs += ["-c:s", "mov_text"]
+
+    print(f"🎞️ Muxing {len(tracks)} dubbed audio track(s) and {len(subtitles)} subtitle track(s) in one pass...")
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *inputs, *maps, *codecs, *meta,
+           "-movflags", "+faststart", str(output_path)]
+    _run_ffmpeg(cmd, "mux")
+    print(f"✅ Multi-language output: {output_path}")
+    return output_path
@@ -0,0 +1,124 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+class TranslationError(Exception):
+    """
+    Raised by online backends when a request fails or returns an unusable response.
+    retryable: transient failures (timeouts, connection errors, 5xx, 429) worth another attempt
+    """
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+class GoogleWebBackend:
+    """
+    Google Translate web endpoint (the one used by the gtx client).
+    base_url is configurable so tests/benchmarks can point it at a local stand-in server.
+    """
+    name = "google"
+
+    def __init__(self, base_url=None, timeout=15):
+        import requests
+        self.base_url = base_url or Config.TRANSLATE_ONLINE_ENDPOINT
+        self.timeout = timeout
+        # One pooled session per backend, shared by all worker threads
+        self.session = requests.Session()
+
+    def translate(self, text, source_lang, target_lang):
+        import requests
+        try:
+            response = self.session.post(
+                self.base_url,
+                params={"client": "gtx", "sl": source_lang, "tl": target_lang, "dt": "t"},
+                data={"q": text},
+                timeout=self.timeout,
+            )
+        except (requests.Timeout, requests.ConnectionError) as e:
+            # Timeouts, resets and DNS hiccups are transient
+            raise TranslationError(f"request failed: {e}", retryable=True) from e
+        except requests.RequestException as e:
+            raise TranslationError(f"request failed: {e}") from e
+        if response.status_code != 200:
+            # Rate limiting and server errors pass; other 4xx would fail the same way again
+            retryable = response.status_code == 429 or response.status_code >= 500
+            raise TranslationError(f"HTTP {response.status_code}", retryable=retryable)
+        try:
+            # [[["translated", "source", ...], ...], ...]
+            return "".join(chunk[0] for chunk in response.json()[0] if chunk and chunk[0])
+        except (ValueError, TypeError, IndexError) as e:
+            raise TranslationError(f"unexpected response: {e}") from e
+
+class OnlineTranslationEngine:
+    """
+    Packs several segments into one request (newline-delimited), sends requests
+    concurrently through a bounded thread pool and retries with exponential backoff.
+    Failures are reported per text instead of silently returning the source.
+    """
+    DELIMITER = "\n"
+
+    def __init__(self, backend=None, max_workers=None, max_chars=None, retries=None, backoff=None):
+        self.backend = backend or GoogleWebBackend()
+        self.max_workers = max_workers or Config.TRANSLATE_ONLINE_WORKERS
+        self.max_chars = max_chars or Config.TRANSLATE_ONLINE_MAX_CHARS
+        self.retries = Config.TRANSLATE_ONLINE_RETRIES if retries is None else retries
+        self.backoff = Config.TRANSLATE_ONLINE_BACKOFF if backoff is None else backoff
+
+    def _pack(self, texts):
+        """Groups text indices into requests under max_chars."""
+        packs, current, size = [], [], 0
+        for i, text in enumerate(texts):
+            length = len(text) + len(self.DELIMITER)
+            if current and size + length > self.max_chars:
+                packs.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += length
+        if current:
+            packs.append(current)
+        return packs
+
+    def _with_retry(self, text, source_lang, target_lang):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.backend.translate(text, source_lang, target_lang)
+            except TranslationError as e:
+                if not e.retryable or attempt == self.retries:
+                    raise
+                # Exponential backoff with jitter so concurrent workers don't retry in lockstep
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+    def _translate_pack(self, texts, source_lang, target_lang):
+        """Returns a list of (translation, error) for one packed request."""
+        if len(texts) > 1:
+            try:
+                parts = self._with_retry(self.DELIMITER.join(texts), source_lang, target_lang).split(self.DELIMITER)
+                if len(parts) == len(texts):
+                    return [(part.strip(), None) for part in parts]
+            except TranslationError:
+                pass
+            # The service merged/split lines or the pack kept failing: fall back to one request per text
+        results = []
+        for text in texts:
+            try:
+                results.append((self._with_retry(text, source_lang, target_lang).strip(), None))
+            except TranslationError as e:
+                results.append((None, str(e)))
+        return results
+
+    def translate(self, texts, source_lang, target_lang):
+        """Translates texts concurrently. Returns a list of (translation or None, error or None)."""
+        # The delimiter must not appear inside a segment
+        clean = [" ".join(text.split()) for text in texts]
+        packs = self._pack(clean)
+        results = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._translate_pack, [clean[i] for i in pack], source_lang, target_lang): pack
+                for pack in packs
+            }
+            for future, pack in futures.items():
+                for i, result in zip(pack, future.result()):
+                    results[i] = result
+        return results
@@ -0,0 +1,157 @@
+import collections
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from config import Config
+
+# Leaf frames that only mean "this thread is idle"
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "base_events.py", "thread.py")
+
+class StackSampler:
+    """
+    Low-overhead sampling profiler: snapshots every thread's Python stack at a fixed
+    interval. Unlike cProfile it also sees executor/worker threads (TTS, online
+    translation) and barely slows tight model loops.
+    """
+    def __init__(self, interval=None):
+        self.interval = interval or Config.PROFILE_SAMPLE_INTERVAL
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, collapsed_path, summary_path, top=30):
+        """Collapsed stacks (flamegraph.pl / speedscope input) plus a busiest-functions summary."""
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        leaf = collections.Counter()
+        inclusive = collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            if any(name in frames[-1] for name in _IDLE_FILES):
+                continue
+            leaf[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+        busy = sum(leaf.values()) or 1
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(f"{self.samples} samples every {self.interval * 1000:.1f} ms, {busy} busy thread-samples\n\n")
+            f.write("Self (leaf) samples:\n")
+            for name, count in leaf.most_common(top):
+                f.write(f"{count / busy:7.1%} {count:8d}  {name}\n")
+            f.write("\nInclusive samples:\n")
+            for name, count in inclusive.most_common(top):
+                f.write(f"{count / busy:7.1%} {count:8d}  {name}\n")
+
+class StageProfiler:
+    """
+    Opt-in per-stage profiling, driven by MetricsRecorder stage events.
+    mode "full": cProfile (+ tracemalloc) per stage; stages in PROFILE_SAMPLED_STAGES
+    (long TTS / translation loops) use the stack sampler instead of cProfile.
+    mode "sample": stack sampler (+ tracemalloc) for every stage.
+    Reports go to output_dir as <stage>.pstats, <stage>_top.txt, <stage>_alloc.txt,
+    <stage>_samples.txt and <stage>_stacks.txt.
+    When profiling is off nothing subscribes, so there is no overhead.
+    """
+    def __init__(self, output_dir, mode="full", sampled_stages=None, top_allocations=None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.sampled_stages = set(Config.PROFILE_SAMPLED_STAGES if sampled_stages is None else sampled_stages)
+        self.top_allocations = top_allocations or Config.PROFILE_TOP_ALLOCATIONS
+        self._stage = None
+        self._profile = None
+        self._sampler = None
+        self._started_tracemalloc = False
+
+    def handle(self, event):
+        if event["type"] == "stage_start":
+            self._begin(event["stage"])
+        elif event["type"] == "stage_end":
+            self._end(event["stage"])
+
+    def _begin(self, stage):
+        self._stage = stage
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(Config.PROFILE_TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.take_snapshot()
+        if self.mode == "sample" or stage in self.sampled_stages:
+            self._sampler = StackSampler()
+            self._sampler.start()
+        else:
+            # cProfile only sees the thread that enables it (the pipeline's event loop)
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def _end(self, stage):
+        if stage != self._stage:
+            return
+        started = time.perf_counter()
+        outputs = []
+        if self._profile is not None:
+            self._profile.disable()
+            pstats_path = self.output_dir / f"{stage}.pstats"
+            self._profile.dump_stats(str(pstats_path))
+            text = io.StringIO()
+            pstats.Stats(self._profile, stream=text).sort_stats("cumulative").print_stats(40)
+            (self.output_dir / f"{stage}_top.txt").write_text(text.getvalue(), encoding='utf-8')
+            outputs.append(pstats_path.name)
+            self._profile = None
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.write(self.output_dir / f"{stage}_stacks.txt", self.output_dir / f"{stage}_samples.txt")
+            outputs.append(f"{stage}_samples.txt")
+            self._sampler = None
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        alloc_path = self.output_dir / f"{stage}_alloc.txt"
+        with open(alloc_path, 'w', encoding='utf-8') as f:
+            f.write(f"Python heap traced by tracemalloc: current {current / 1e6:.1f} MB, "
+                    f"peak during stage {peak / 1e6:.1f} MB\n")
+            f.write("(native allocations by torch / CTranslate2 / ffmpeg are not traced)\n\n")
+            f.write(f"Top {self.top_allocations} allocation sites still live at stage end:\n")
+            for stat in snapshot.statistics("lineno")[:self.top_allocations]:
+                f.write(f"{stat}\n")
+            f.write(f"\nTop {self.top_allocations} growth versus stage start:\n")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:self.top_allocations]:
+                f.write(f"{stat}\n")
+        outputs.append(alloc_path.name)
+        self._baseline = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._stage = None
+        print(f"\n🔬 Profile for stage '{stage}': {', '.join(outputs)} "
+              f"(written in {time.perf_counter() - started:.1f}s to {self.output_dir})")
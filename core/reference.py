@@ -0,0 +1,180 @@
+import numpy as np
+from config import Config
+
+class ReferenceVoice:
+    """A preprocessed voice prompt: in-memory audio plus its matching transcript."""
+    def __init__(self, speaker, audio, sample_rate, text, start, end):
+        self.speaker = speaker
+        # Identifies the clip (a speaker can have several local references)
+        self.key = (speaker, round(float(start), 3), round(float(end), 3))
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.text = text
+        self.start = start
+        self.end = end
+        self._tensor = None
+
+    @property
+    def duration(self):
+        return len(self.audio) / self.sample_rate
+
+    @property
+    def tensor(self):
+        """(1, N) torch tensor, built once and shared by every segment of this voice."""
+        if self._tensor is None:
+            import torch
+            self._tensor = torch.from_numpy(np.ascontiguousarray(self.audio)).unsqueeze(0)
+        return self._tensor
+
+class ReferenceVoiceManager:
+    """
+    Picks reference clips for F5-TTS cloning.
+    mode "speaker": one clip per speaker label. ASR has no diarization, so without labels
+    that is a single voice for the whole video.
+    mode "local": segments with a speaker label still share their speaker's clip; unlabelled
+    segments get the best window of consecutive speech that contains them (the nearest one
+    otherwise), so every part of a multi-speaker video is cloned from the voice speaking there.
+    The transcript for the clip is taken from the ASR segments, so F5-TTS does not
+    need to run its own ASR on the reference (which it does when ref_text is empty).
+    """
+    def __init__(self, audio, sample_rate, segments, mode=None, min_duration=None, max_duration=None,
+                 target_duration=None, max_gap=None, min_rms=None):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.segments = list(segments)
+        self.mode = mode or Config.TTS_REFERENCE_MODE
+        self.min_duration = min_duration or Config.TTS_REFERENCE_MIN_SECONDS
+        self.max_duration = max_duration or Config.TTS_REFERENCE_MAX_SECONDS
+        self.target_duration = target_duration or Config.TTS_REFERENCE_TARGET_SECONDS
+        self.max_gap = Config.TTS_REFERENCE_MAX_GAP if max_gap is None else max_gap
+        self.min_rms = Config.TTS_REFERENCE_MIN_RMS if min_rms is None else min_rms
+        self._voices = {}
+        # Local mode: segment span -> clip, and the distinct clips by key
+        self._local = {}
+        self._clips = {}
+
+    @staticmethod
+    def describe():
+        """Parameters that change which clips are picked (part of the TTS cache key)."""
+        return {"mode": Config.TTS_REFERENCE_MODE, "min_seconds": Config.TTS_REFERENCE_MIN_SECONDS,
+                "max_seconds": Config.TTS_REFERENCE_MAX_SECONDS, "target_seconds": Config.TTS_REFERENCE_TARGET_SECONDS,
+                "max_gap": Config.TTS_REFERENCE_MAX_GAP, "min_rms": Config.TTS_REFERENCE_MIN_RMS}
+
+    @staticmethod
+    def _source_text(seg):
+        # Translated segments keep the Whisper transcript in original_text
+        return seg.get('original_text', seg.get('text', '')).strip()
+
+    @staticmethod
+    def normalize_ref_text(text):
+        """F5-TTS expects the reference text to end with a sentence break."""
+        text = text.strip()
+        if text.endswith("。") or text.endswith(". "):
+            return text
+        if text.endswith("."):
+            return text + " "
+        return text + ". "
+
+    def _windows(self, segs):
+        """Yields runs of consecutive segments (start, end, members) that fit the duration bounds."""
+        for i in range(len(segs)):
+            members = []
+            for j in range(i, len(segs)):
+                if members and segs[j]['start'] - members[-1]['end'] > self.max_gap:
+                    break
+                members.append(segs[j])
+                span = members[-1]['end'] - members[0]['start']
+                if span > self.max_duration:
+                    if len(members) == 1:
+                        # A single long segment is still a usable fallback
+                        yield members[0]['start'], members[0]['end'], list(members)
+                    break
+                yield members[0]['start'], members[-1]['end'], list(members)
+
+    def _score(self, start, end):
+        duration = end - start
+        clip = self.audio[int(start * self.sample_rate):int(end * self.sample_rate)]
+        rms = float(np.sqrt(np.mean(clip ** 2))) if len(clip) else 0.0
+        score = -abs(duration - self.target_duration)
+        if not (self.min_duration <= duration <= self.max_duration):
+            score -= 10.0
+        if rms < self.min_rms:
+            score -= 5.0
+        return score
+
+    def _select(self, speaker, near=None):
+        """
+        Best window of the speaker's speech. near=(start, end): only windows containing that
+        span compete; if none does, the window closest to it is used.
+        """
+        segs = [s for s in self.segments if s.get('speaker') == speaker and self._source_text(s)]
+        if near is not None:
+            # Windows are at most max_duration long, so only neighbouring segments can be part of one
+            segs = [s for s in segs if s['end'] >= near[0] - self.max_duration and s['start'] <= near[1] + self.max_duration]
+        best = None
+        for start, end, members in self._windows(segs):
+            score = self._score(start, end)
+            if near is not None:
+                contains = start <= near[0] + 1e-3 and near[1] - 1e-3 <= end
+                distance = max(start - near[1], near[0] - end, 0.0)
+                # Among near-equal clips, the one reaching furthest ahead covers the most upcoming segments
+                score = (contains, -distance, round(score * 2) / 2, end)
+            if best is None or score > best[0]:
+                best = (score, start, end, members)
+        if best is None:
+            if near is not None:
+                # Nothing transcribed nearby: the speaker's overall best clip
+                return self._select(speaker)
+            raise ValueError(f"No usable reference speech for speaker {speaker!r}")
+
+        _, start, end, members = best
+        clip = self.audio[int(start * self.sample_rate):int(end * self.sample_rate)]
+        # Trailing silence keeps F5-TTS from gluing the prompt onto the generated speech
+        clip = np.concatenate([clip, np.zeros(int(0.05 * self.sample_rate), dtype=clip.dtype)])
+        text = self.normalize_ref_text(" ".join(self._source_text(s) for s in members))
+        return ReferenceVoice(speaker, clip.astype(np.float32), self.sample_rate, text, start, end)
+
+    def add_segment(self, seg):
+        """Registers a segment that arrived later (streaming mode)."""
+        self.segments.append(seg)
+
+    def _is_local(self, seg):
+        return self.mode == "local" and seg.get('speaker') is None
+
+    def is_ready(self, speaker=None):
+        """True once enough speech of a voice has been seen to pick a full-length reference."""
+        if speaker in self._voices:
+            return True
+        speech = sum(s['end'] - s['start'] for s in self.segments if s.get('speaker') == speaker)
+        return speech >= self.target_duration
+
+    def is_ready_for(self, seg):
+        """Streaming: True once the reference of seg can no longer change with segments still to come."""
+        if not self._is_local(seg):
+            return self.is_ready(seg.get('speaker'))
+        # A window containing seg ends within max_duration of its start
+        latest = max((s['end'] for s in self.segments), default=0.0)
+        return latest >= seg['start'] + self.max_duration
+
+    def for_segment(self, seg):
+        """Reference clip for one segment (see the class docstring for the modes)."""
+        if not self._is_local(seg):
+            return self.get(seg.get('speaker'))
+        span = (round(float(seg['start']), 3), round(float(seg['end']), 3))
+        if span not in self._local:
+            # Keep the previous clip while it still covers the segment: fewer distinct prompts, bigger TTS batches
+            voice = next((v for v in reversed(self._clips.values())
+                          if v.start <= span[0] + 1e-3 and span[1] - 1e-3 <= v.end), None)
+            if voice is None:
+                voice = self._select(None, near=span)
+                self._clips.setdefault(voice.key, voice)
+            self._local[span] = self._clips[voice.key]
+        return self._local[span]
+
+    def get(self, speaker=None):
+        """Returns the cached reference for a voice, selecting it on first use."""
+        if speaker not in self._voices:
+            voice = self._select(speaker)
+            print(f"🎤 Reference voice for speaker {speaker!r}: {voice.start:.1f}s-{voice.end:.1f}s ({voice.duration:.1f}s)")
+            self._voices[speaker] = voice
+        return self._voices[speaker]
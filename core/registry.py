@@ -0,0 +1,167 @@
+import gc
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+def _rss_bytes():
+    """Resident set size of this process (Linux /proc; 0 where unavailable)."""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _vram_bytes():
+    """
+    Device memory in use on the current GPU. Read from the driver (mem_get_info), not
+    torch's allocator, so CTranslate2 models (faster-whisper, NLLB) are counted too.
+    """
+    # Only look at CUDA if torch is already imported; never import it just to measure
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        free, total = torch.cuda.mem_get_info()
+        return total - free
+    return 0
+
+class _Entry:
+    def __init__(self, model, ram, vram, load_time, unloader):
+        self.model = model
+        self.ram = ram
+        self.vram = vram
+        self.load_time = load_time
+        self.unloader = unloader
+        self.hits = 0
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded models.
+    Models are handed out by key and stay resident between jobs; least-recently-used
+    models are evicted only when loading another one would exceed the RAM/VRAM budget.
+    """
+    def __init__(self, ram_budget_gb=None, vram_budget_gb=None):
+        self.ram_budget = (ram_budget_gb or Config.MODEL_RAM_BUDGET_GB) * 1024 ** 3
+        self.vram_budget = (vram_budget_gb or Config.MODEL_VRAM_BUDGET_GB) * 1024 ** 3
+        self._entries = OrderedDict()
+        # Footprints measured on earlier loads, used to make room before reloading
+        self._known_sizes = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def _footprint(self, key):
+        """(ram, vram) of key: measured on an earlier load, else the configured VRAM estimate for CUDA models."""
+        if key in self._known_sizes:
+            return self._known_sizes[key]
+        family = key[0] if isinstance(key, tuple) else key
+        on_gpu = isinstance(key, tuple) and "cuda" in key
+        return 0, Config.MODEL_VRAM_ESTIMATES_GB.get(family, 0) * 1024 ** 3 if on_gpu else 0
+
+    def _usage(self):
+        ram = sum(e.ram for e in self._entries.values())
+        vram = sum(e.vram for e in self._entries.values())
+        return ram, vram
+
+    def _make_room(self, ram_needed, vram_needed, keep=None):
+        while self._entries:
+            ram, vram = self._usage()
+            if ram + ram_needed <= self.ram_budget and vram + vram_needed <= self.vram_budget:
+                return
+            victim = next((k for k in self._entries if k != keep), None)
+            if victim is None:
+                return
+            self.evict(victim)
+
+    def get(self, key, loader, unloader=None):
+        """Returns the model for key, calling loader() (and measuring its footprint) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self.hits += 1
+                print(f"♻️ Model registry hit: {self._label(key)} (warm, {entry.hits} reuses)")
+                return entry.model
+
+            self.misses += 1
+            self._make_room(*self._footprint(key))
+
+            ram_before, vram_before = _rss_bytes(), _vram_bytes()
+            started = time.perf_counter()
+            model = loader()
+            load_time = time.perf_counter() - started
+            ram = max(_rss_bytes() - ram_before, 0)
+            vram = max(_vram_bytes() - vram_before, 0)
+
+            self._entries[key] = _Entry(model, ram, vram, load_time, unloader)
+            self._known_sizes[key] = (ram, vram)
+            self.load_seconds += load_time
+            print(f"📦 Model registry loaded {self._label(key)} in {load_time:.1f}s "
+                  f"(RAM +{ram / 1e9:.2f} GB, VRAM +{vram / 1e9:.2f} GB)")
+            # The footprint is only known after loading; trim older models if we overshot
+            self._make_room(0, 0, keep=key)
+            return model
+
+    def release(self, key, alongside):
+        """
+        A processor is done with key and alongside is loaded next. key is kept warm only if
+        both fit the budget together; otherwise it goes first, before alongside is loaded.
+        """
+        with self._lock:
+            if key not in self._entries or alongside in self._entries:
+                return
+            # The released model is the first candidate, whatever its recency
+            self._entries.move_to_end(key, last=False)
+            self._make_room(*self._footprint(alongside))
+
+    def evict(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            if entry.unloader is not None:
+                entry.unloader(entry.model)
+            del entry
+            self.evictions += 1
+            gc.collect()
+            torch = sys.modules.get("torch")
+            if torch is not None and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            print(f"🗑️ Model registry evicted {self._label(key)} (least recently used)")
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self.evict(key)
+
+    def stats(self):
+        with self._lock:
+            ram, vram = self._usage()
+            return {
+                "resident": [self._label(k) for k in self._entries],
+                "ram_bytes": ram,
+                "vram_bytes": vram,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": self.load_seconds,
+            }
+
+    @staticmethod
+    def _label(key):
+        return "/".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    """The process-wide registry shared by all processors."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,149 @@
+import re
+import numpy as np
+from config import Config
+from core.segments import SegmentBuilder
+
+STRONG_PUNCT = "。！？!?.…"
+WEAK_PUNCT = "，,、；;：:"
+# Text fallback: clauses end after CJK punctuation even without a following space
+_CJK_CLAUSE = re.compile(r"(?<=[。！？…，、；：])")
+
+def _chars(text):
+    return len(text.strip())
+
+def _join_text(left, right):
+    if not left or not right:
+        return left or right
+    # Space-delimited scripts get a space back; CJK text is joined as is
+    return f"{left} {right}" if left[-1].isascii() and right[0].isascii() else left + right
+
+class Resegmenter:
+    """
+    Re-cuts ASR segments so TTS chunks have similar lengths: segments over the
+    duration/character budget are split at the best word boundary (pauses from
+    word timestamps, then punctuation, then balance), and fragments shorter than
+    the minimum are merged into a neighbour. Without word timestamps the split
+    points come from punctuation and whitespace, with times spread by characters.
+    """
+    def __init__(self, max_seconds=None, max_chars=None, min_seconds=None, min_chars=None, merge_gap=None):
+        self.max_seconds = max_seconds or Config.RESEGMENT_MAX_SECONDS
+        self.max_chars = max_chars or Config.RESEGMENT_MAX_CHARS
+        self.min_seconds = Config.RESEGMENT_MIN_SECONDS if min_seconds is None else min_seconds
+        self.min_chars = Config.RESEGMENT_MIN_CHARS if min_chars is None else min_chars
+        self.merge_gap = Config.RESEGMENT_MERGE_GAP if merge_gap is None else merge_gap
+
+    def describe(self):
+        """Parameters that change the output (part of the stage cache key)."""
+        return {"max_seconds": self.max_seconds, "max_chars": self.max_chars, "min_seconds": self.min_seconds,
+                "min_chars": self.min_chars, "merge_gap": self.merge_gap}
+
+    def _fits(self, start, end, text):
+        return end - start <= self.max_seconds and _chars(text) <= self.max_chars
+
+    def _tiny(self, seg):
+        return seg['end'] - seg['start'] < self.min_seconds or _chars(seg['text']) < self.min_chars
+
+    @staticmethod
+    def _pseudo_words(seg):
+        """Whitespace/clause tokens with times proportional to their length (segments without word timestamps)."""
+        tokens = [part for token in re.findall(r"\s*\S+", seg['text']) for part in _CJK_CLAUSE.split(token) if part]
+        lengths = np.array([max(_chars(t), 1) for t in tokens], dtype=np.float64)
+        edges = seg['start'] + (seg['end'] - seg['start']) * np.concatenate(([0.0], np.cumsum(lengths))) / lengths.sum()
+        return [{"start": float(edges[i]), "end": float(edges[i + 1]), "word": t} for i, t in enumerate(tokens)]
+
+    def _best_cut(self, words, lo, hi, start, end):
+        """Index c such that words[lo:c] / words[c:hi] is the most natural split."""
+        span = max(end - start, 1e-6)
+        best, best_score, fallback, fallback_score = None, -np.inf, None, -np.inf
+        for c in range(lo + 1, hi):
+            left, right = words[c - 1], words[c]
+            tail = left['word'].rstrip()
+            punct = 2.0 if tail[-1:] in STRONG_PUNCT else 1.0 if tail[-1:] in WEAK_PUNCT else 0.0
+            pause = min(max(right['start'] - left['end'], 0.0), 1.0)
+            balance = abs((left['end'] - start) / span - 0.5)
+            score = 3.0 * pause + punct - 2.0 * balance
+            if score > fallback_score:
+                fallback, fallback_score = c, score
+            left_text = "".join(w['word'] for w in words[lo:c])
+            right_text = "".join(w['word'] for w in words[c:hi])
+            # Both halves must be worth a TTS call on their own
+            if (left['end'] - start < self.min_seconds or end - right['start'] < self.min_seconds
+                    or _chars(left_text) < self.min_chars or _chars(right_text) < self.min_chars):
+                continue
+            if score > best_score:
+                best, best_score = c, score
+        return best if best is not None else fallback
+
+    def _split_range(self, words, lo, hi, start, end):
+        text = "".join(w['word'] for w in words[lo:hi])
+        if hi - lo < 2 or self._fits(start, end, text):
+            return [(lo, hi, start, end)]
+        c = self._best_cut(words, lo, hi, start, end)
+        return (self._split_range(words, lo, c, start, words[c - 1]['end'])
+                + self._split_range(words, c, hi, words[c]['start'], end))
+
+    def split_segment(self, seg):
+        """One segment dict -> list of segment dicts within the budget (split only, no merging)."""
+        if self._fits(seg['start'], seg['end'], seg['text']):
+            return [seg]
+        words = seg.get('words') or []
+        timed = bool(words)
+        if not timed:
+            words = self._pseudo_words(seg)
+        ranges = self._split_range(words, 0, len(words), seg['start'], seg['end'])
+        if len(ranges) == 1:
+            return [seg]
+        pieces = []
+        for lo, hi, start, end in ranges:
+            piece = {"start": start, "end": end, "text": "".join(w['word'] for w in words[lo:hi]).strip()}
+            if seg.get('speaker') is not None:
+                piece["speaker"] = seg['speaker']
+            if timed:
+                piece["words"] = words[lo:hi]
+            pieces.append(piece)
+        return pieces
+
+    def merge(self, segments):
+        """Folds fragments under the minimum into the previous or next segment (same speaker, short gap)."""
+        merged = []
+        for seg in segments:
+            if merged:
+                prev = merged[-1]
+                text = _join_text(prev['text'], seg['text'])
+                if ((self._tiny(prev) or self._tiny(seg)) and prev.get('speaker') == seg.get('speaker')
+                        and seg['start'] - prev['end'] <= self.merge_gap and self._fits(prev['start'], seg['end'], text)):
+                    combined = dict(prev, end=seg['end'], text=text)
+                    if prev.get('words') or seg.get('words'):
+                        combined["words"] = (prev.get('words') or []) + (seg.get('words') or [])
+                    merged[-1] = combined
+                    continue
+            merged.append(seg)
+        return merged
+
+    def resegment(self, segments):
+        """Segments (store or dicts) -> SegmentStore with split long segments and merged fragments."""
+        pieces = self.merge([piece for seg in segments for piece in self.split_segment(seg)])
+        builder = SegmentBuilder()
+        for seg in pieces:
+            builder.append(seg['start'], seg['end'], seg['text'], seg.get('speaker'), seg.get('words', ()))
+        store = builder.build()
+        before, after = self.distribution(segments), self.distribution(store)
+        print(f"✂️ Resegmented {before['count']} -> {after['count']} segments | "
+              f"duration p50 {before['p50_seconds']:.1f}s -> {after['p50_seconds']:.1f}s, "
+              f"p90 {before['p90_seconds']:.1f}s -> {after['p90_seconds']:.1f}s, "
+              f"max {before['max_seconds']:.1f}s -> {after['max_seconds']:.1f}s "
+              f"(std {before['std_seconds']:.1f}s -> {after['std_seconds']:.1f}s)")
+        return store
+
+    @staticmethod
+    def distribution(segments):
+        """Count and duration/character percentiles of a segment list or store."""
+        durations = np.array([seg['end'] - seg['start'] for seg in segments], dtype=np.float64)
+        chars = np.array([_chars(seg['text']) for seg in segments], dtype=np.float64)
+        if not len(durations):
+            durations = chars = np.zeros(1)
+        return {"count": len(segments),
+                "p50_seconds": float(np.percentile(durations, 50)), "p90_seconds": float(np.percentile(durations, 90)),
+                "max_seconds": float(durations.max()), "std_seconds": float(durations.std()),
+                "p50_chars": float(np.percentile(chars, 50)), "p90_chars": float(np.percentile(chars, 90)),
+                "max_chars": float(chars.max())}
@@ -0,0 +1,242 @@
+import hashlib
+import io
+import json
+import numpy as np
+
+FLAG_TRANSLATION_ERROR = 1
+
+class _Interner:
+    """Assigns each distinct string one id; ids index into `strings`."""
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self.ids = {s: i for i, s in enumerate(self.strings)}
+
+    def __call__(self, text):
+        index = self.ids.get(text)
+        if index is None:
+            index = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+def _pack_strings(strings):
+    """Strings -> (utf-8 blob, offsets): npz-friendly, no pickled object arrays."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack_strings(blob, offsets):
+    data = blob.tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+class SegmentBuilder:
+    """Accumulates segments as plain columns; build() turns them into a SegmentStore."""
+    def __init__(self):
+        self.start, self.end, self.text_ids, self.speaker_ids, self.flags = [], [], [], [], []
+        self.original_ids = []
+        self.word_offsets = [0]
+        self.word_start, self.word_end, self.word_prob, self.word_ids = [], [], [], []
+        self.texts, self.speakers, self.words = _Interner(), _Interner(), _Interner()
+        self.errors = {}
+
+    def append(self, start, end, text, speaker=None, words=(), original_text=None, error=None):
+        if error is not None:
+            self.errors[len(self.start)] = error
+        self.start.append(start)
+        self.end.append(end)
+        self.text_ids.append(self.texts(text))
+        self.speaker_ids.append(-1 if speaker is None else self.speakers(speaker))
+        self.flags.append(FLAG_TRANSLATION_ERROR if error is not None else 0)
+        self.original_ids.append(-1 if original_text is None else self.texts(original_text))
+        for word in words:
+            self.word_start.append(word['start'])
+            self.word_end.append(word['end'])
+            self.word_prob.append(word.get('probability', 1.0))
+            self.word_ids.append(self.words(word['word']))
+        self.word_offsets.append(len(self.word_ids))
+
+    def build(self):
+        original = np.array(self.original_ids, dtype=np.int32)
+        return SegmentStore(
+            start=np.array(self.start, dtype=np.float64), end=np.array(self.end, dtype=np.float64),
+            text_ids=np.array(self.text_ids, dtype=np.int32), texts=self.texts.strings,
+            speaker_ids=np.array(self.speaker_ids, dtype=np.int32), speakers=self.speakers.strings,
+            flags=np.array(self.flags, dtype=np.uint8),
+            original_ids=original if (original >= 0).any() else None,
+            word_offsets=np.array(self.word_offsets, dtype=np.int64),
+            word_start=np.array(self.word_start, dtype=np.float64), word_end=np.array(self.word_end, dtype=np.float64),
+            word_prob=np.array(self.word_prob, dtype=np.float32), word_ids=np.array(self.word_ids, dtype=np.int32),
+            words=self.words.strings, errors=self.errors)
+
+class SegmentStore:
+    """
+    Columnar segments for long media: NumPy columns for start/end/speaker/flags,
+    interned text (each distinct line stored once) and Whisper word timestamps in
+    CSR layout (word_offsets[i]:word_offsets[i + 1] are segment i's words).
+    Slicing returns views sharing the columns; translation only swaps the text
+    column. Iterating yields the classic segment dicts for dict-based consumers.
+    Saved as .npz without pickled objects.
+    """
+    def __init__(self, start, end, text_ids, texts, speaker_ids=None, speakers=None, flags=None, original_ids=None,
+                 word_offsets=None, word_start=None, word_end=None, word_prob=None, word_ids=None, words=None,
+                 errors=None):
+        count = len(start)
+        self.start = start
+        self.end = end
+        self.text_ids = text_ids
+        self.texts = texts
+        self.speaker_ids = speaker_ids if speaker_ids is not None else np.full(count, -1, dtype=np.int32)
+        self.speakers = speakers if speakers is not None else []
+        self.flags = flags if flags is not None else np.zeros(count, dtype=np.uint8)
+        # Source-language text ids (into `texts`) once the store has been translated
+        self.original_ids = original_ids
+        self.word_offsets = word_offsets if word_offsets is not None else np.zeros(count + 1, dtype=np.int64)
+        self.word_start = word_start if word_start is not None else np.zeros(0, dtype=np.float64)
+        self.word_end = word_end if word_end is not None else np.zeros(0, dtype=np.float64)
+        self.word_prob = word_prob if word_prob is not None else np.zeros(0, dtype=np.float32)
+        self.word_ids = word_ids if word_ids is not None else np.zeros(0, dtype=np.int32)
+        self.words = words if words is not None else []
+        # Segment index (within this store) -> translation error message
+        self.errors = dict(errors or {})
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Builds a store from segment dicts (start, end, text[, speaker, words, original_text, translation_error])."""
+        if isinstance(segments, cls):
+            return segments
+        builder = SegmentBuilder()
+        for seg in segments:
+            builder.append(seg['start'], seg['end'], seg['text'], seg.get('speaker'), seg.get('words', ()),
+                           seg.get('original_text'), seg.get('translation_error'))
+        return builder.build()
+
+    def __len__(self):
+        return len(self.start)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("SegmentStore slices must be contiguous")
+            errors = {i - start: e for i, e in self.errors.items() if start <= i < stop}
+            return SegmentStore(
+                self.start[start:stop], self.end[start:stop], self.text_ids[start:stop], self.texts,
+                self.speaker_ids[start:stop], self.speakers, self.flags[start:stop],
+                None if self.original_ids is None else self.original_ids[start:stop],
+                self.word_offsets[start:stop + 1], self.word_start, self.word_end, self.word_prob, self.word_ids,
+                self.words, errors)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return self._segment(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._segment(i)
+
+    def _segment(self, i):
+        seg = {"start": float(self.start[i]), "end": float(self.end[i])}
+        if self.original_ids is not None:
+            seg["original_text"] = self.texts[self.original_ids[i]]
+        seg["text"] = self.texts[self.text_ids[i]]
+        if self.speaker_ids[i] >= 0:
+            seg["speaker"] = self.speakers[self.speaker_ids[i]]
+        if self.flags[i] & FLAG_TRANSLATION_ERROR:
+            seg["translation_error"] = self.errors.get(i, "")
+        words = self.segment_words(i)
+        if words:
+            seg["words"] = words
+        return seg
+
+    def text(self, i):
+        return self.texts[self.text_ids[i]]
+
+    def segment_words(self, i):
+        lo, hi = self.word_offsets[i], self.word_offsets[i + 1]
+        return [{"start": float(s), "end": float(e), "word": self.words[w], "probability": float(p)}
+                for s, e, w, p in zip(self.word_start[lo:hi], self.word_end[lo:hi],
+                                      self.word_ids[lo:hi], self.word_prob[lo:hi])]
+
+    def used_text_ids(self):
+        """Distinct text ids referenced by this store (a slice may use only part of the table)."""
+        return np.unique(self.text_ids)
+
+    def translated(self, translations, errors=None):
+        """
+        New store with texts replaced through `translations` ({text id: translated text});
+        timing, speaker and word columns are shared, the source text is kept as original_text.
+        errors: {text id: message} for texts that failed and keep their source text.
+        """
+        errors = errors or {}
+        interner = _Interner(self.texts)
+        lookup = np.arange(len(self.texts), dtype=np.int32)
+        for text_id, text in translations.items():
+            lookup[text_id] = interner(text)
+        flags = self.flags.copy()
+        segment_errors = {}
+        if errors:
+            failed = np.isin(self.text_ids, list(errors))
+            flags[failed] |= FLAG_TRANSLATION_ERROR
+            segment_errors = {int(i): errors[int(self.text_ids[i])] for i in np.flatnonzero(failed)}
+        return SegmentStore(
+            self.start, self.end, lookup[self.text_ids], interner.strings, self.speaker_ids, self.speakers, flags,
+            self.text_ids if self.original_ids is None else self.original_ids,
+            self.word_offsets, self.word_start, self.word_end, self.word_prob, self.word_ids, self.words,
+            segment_errors)
+
+    def _columns(self):
+        """Compact arrays for saving: slices are re-based so only their own words are written."""
+        lo, hi = self.word_offsets[0], self.word_offsets[-1]
+        text_blob, text_offsets = _pack_strings(self.texts)
+        speaker_blob, speaker_offsets = _pack_strings(self.speakers)
+        word_blob, word_offsets = _pack_strings(self.words)
+        columns = {
+            "start": self.start, "end": self.end, "text_ids": self.text_ids, "speaker_ids": self.speaker_ids,
+            "flags": self.flags, "word_offsets": self.word_offsets - lo,
+            "word_start": self.word_start[lo:hi], "word_end": self.word_end[lo:hi],
+            "word_prob": self.word_prob[lo:hi], "word_ids": self.word_ids[lo:hi],
+            "text_blob": text_blob, "text_offsets": text_offsets,
+            "speaker_blob": speaker_blob, "speaker_offsets": speaker_offsets,
+            "word_blob": word_blob, "word_string_offsets": word_offsets,
+            "errors": np.frombuffer(json.dumps({str(k): v for k, v in self.errors.items()}).encode('utf-8'),
+                                    dtype=np.uint8),
+        }
+        if self.original_ids is not None:
+            columns["original_ids"] = self.original_ids
+        return columns
+
+    def digest(self):
+        """Content hash (e.g. the upstream key of the next cached stage)."""
+        h = hashlib.sha256()
+        for name, column in sorted(self._columns().items()):
+            h.update(name.encode('utf-8'))
+            h.update(np.ascontiguousarray(column).tobytes())
+        return h.hexdigest()
+
+    def save(self, path):
+        """Uncompressed .npz: loading is a few array reads, no parsing."""
+        with open(path, 'wb') as f:
+            np.savez(f, **self._columns())
+        return path
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, **self._columns())
+        return buffer.getvalue()
+
+    @classmethod
+    def load(cls, source):
+        """Loads a store from an .npz path or the bytes returned by to_bytes()."""
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with np.load(source, allow_pickle=False) as data:
+            columns = {name: data[name] for name in data.files}
+        return cls(
+            columns["start"], columns["end"], columns["text_ids"],
+            _unpack_strings(columns["text_blob"], columns["text_offsets"]),
+            columns["speaker_ids"], _unpack_strings(columns["speaker_blob"], columns["speaker_offsets"]),
+            columns["flags"], columns.get("original_ids"),
+            columns["word_offsets"], columns["word_start"], columns["word_end"], columns["word_prob"],
+            columns["word_ids"], _unpack_strings(columns["word_blob"], columns["word_string_offsets"]),
+            {int(k): v for k, v in json.loads(columns["errors"].tobytes().decode('utf-8')).items()})
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+from config import Config
+from core.audio import AudioProcessor
+from core.mixer import AudioMixer
+from core.reference import ReferenceVoiceManager
+
+_END = object()
+
+class StreamingPipeline:
+    """
+    Overlaps ASR, translation and TTS.
+    Segments flow from faster-whisper's lazy generator through bounded asyncio
+    queues (backpressure), so translation and synthesis start as soon as the first
+    segment is emitted and total time tends towards the slowest stage.
+    With a resegmenter, long segments are split as they arrive; merging fragments
+    would have to wait for the next segment, so it is left to the batch path.
+    """
+    def __init__(self, asr, translator, tts, queue_size=None, resegmenter=None):
+        self.asr = asr
+        self.translator = translator
+        self.tts = tts
+        self.queue_size = queue_size or Config.STREAM_QUEUE_SIZE
+        self.resegmenter = resegmenter
+        self.first_audio_latency = None
+        self.asr_segments = []
+        self.segments = []
+        self._stop = threading.Event()
+
+    async def _end(self, out_queue):
+        """
+        Passes the end marker downstream. After a failure the consumer may be gone and the
+        queue full, so whatever it never took is dropped instead of waiting on it forever.
+        """
+        if not self._stop.is_set():
+            await out_queue.put(_END)
+            return
+        while out_queue.full():
+            out_queue.get_nowait()
+        out_queue.put_nowait(_END)
+
+    async def _asr_stage(self, audio, out_queue):
+        loop = asyncio.get_running_loop()
+
+        def pieces():
+            for seg in self.asr.iter_segments(audio):
+                self.asr_segments.append(seg)
+                for piece in (self.resegmenter.split_segment(seg) if self.resegmenter else (seg,)):
+                    self.segments.append(piece)
+                    yield piece
+
+        def produce():
+            # Runs in a worker thread; blocking on put() is the backpressure
+            for index, seg in enumerate(pieces()):
+                while not self._stop.is_set():
+                    put = asyncio.wait_for(out_queue.put((index, seg)), timeout=0.5)
+                    try:
+                        asyncio.run_coroutine_threadsafe(put, loop).result()
+                        break
+                    except TimeoutError:
+                        continue
+                if self._stop.is_set():
+                    # A downstream stage failed; stop decoding instead of blocking forever
+                    return
+
+        try:
+            await loop.run_in_executor(None, produce)
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            await self._end(out_queue)
+
+    async def _translate_stage(self, in_queue, out_queue, results):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                item = await in_queue.get()
+                if item is _END:
+                    break
+                index, seg = item
+                text, error = await loop.run_in_executor(None, self.translator._translate_text, seg['text'])
+                translated = dict(seg, original_text=seg['text'], text=text)
+                if error:
+                    # Same marker as the batch path, so the result is not cached as a good translation
+                    translated["translation_error"] = error
+                results[index] = translated
+                await out_queue.put((index, translated))
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            await self._end(out_queue)
+
+    async def _tts_stage(self, in_queue, references, mixer, started):
+        loop = asyncio.get_running_loop()
+        pending = []
+
+        async def render(seg):
+            reference = references.for_segment(seg)
+            wav, wav_rate = await loop.run_in_executor(None, self.tts._synthesize, reference, seg['text'])
+            self.tts._mix_segment(mixer, seg, wav, wav_rate)
+            if self.first_audio_latency is None:
+                self.first_audio_latency = time.perf_counter() - started
+                print(f"\n⚡ First dubbed segment ready after {self.first_audio_latency:.1f}s")
+
+        while True:
+            item = await in_queue.get()
+            if item is _END:
+                break
+            _, seg = item
+            references.add_segment(seg)
+            pending.append(seg)
+            # Hold segments back until their reference can no longer change
+            ready = [s for s in pending if references.is_ready_for(s)]
+            pending = [s for s in pending if not references.is_ready_for(s)]
+            for seg in ready:
+                await render(seg)
+
+        # Short videos / rare speakers: use whatever reference is available
+        for seg in pending:
+            await render(seg)
+
+    async def run(self, audio, output_path):
+        """
+        Runs ASR -> translation -> TTS concurrently.
+        Returns (asr_segments, segments, translated_segments) in original order;
+        segments are the (resegmented) units that were translated and synthesized.
+        """
+        started = time.perf_counter()
+        self.tts.load_model()
+        orig_audio, orig_rate = AudioProcessor.load_audio(audio)
+        references = ReferenceVoiceManager(orig_audio, orig_rate, [])
+        # The dub never outlasts the source track by much, so size the timeline from it
+        mixer = AudioMixer(len(orig_audio) / orig_rate, sample_rate=44100)
+
+        asr_queue = asyncio.Queue(maxsize=self.queue_size)
+        tts_queue = asyncio.Queue(maxsize=self.queue_size)
+        translated = {}
+
+        print(f"🌊 Streaming ASR -> Translation -> TTS (queue size {self.queue_size})...")
+        stages = [
+            asyncio.create_task(self._asr_stage((orig_audio, orig_rate), asr_queue)),
+            asyncio.create_task(self._translate_stage(asr_queue, tts_queue, translated)),
+            asyncio.create_task(self._tts_stage(tts_queue, references, mixer, started)),
+        ]
+        try:
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for stage in done:
+                stage.result()
+        except BaseException:
+            # One stage failed (or we were cancelled): stop the others instead of leaving them blocked on a queue
+            self._stop.set()
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
+
+        # Order-preserving assembly
+        translated_segments = [translated[i] for i in sorted(translated)]
+        mixer.export_wav(output_path, channels=2)
+        print(f"✅ Streaming pipeline finished in {time.perf_counter() - started:.1f}s: {output_path}")
+        return self.asr_segments, self.segments, translated_segments
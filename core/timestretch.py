@@ -0,0 +1,131 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from config import Config
+
+def frame_size(sample_rate, frame_seconds=0.04):
+    """Power-of-two FFT size closest to frame_seconds (1024 at 24 kHz)."""
+    return 1 << int(round(np.log2(frame_seconds * sample_rate)))
+
+def target_length(length, slot_length, min_speed=None, max_speed=None, tolerance=None):
+    """
+    Output length (samples) a clip should be stretched to for its slot.
+    Speed-ups/slow-downs are limited to [min_speed, max_speed]; clips within
+    tolerance of their slot are left as they are.
+    """
+    min_speed = Config.TTS_STRETCH_MIN_SPEED if min_speed is None else min_speed
+    max_speed = Config.TTS_STRETCH_MAX_SPEED if max_speed is None else max_speed
+    tolerance = Config.TTS_STRETCH_TOLERANCE if tolerance is None else tolerance
+    if length == 0 or slot_length <= 0:
+        return length
+    speed = length / slot_length
+    if abs(speed - 1) <= tolerance:
+        return length
+    speed = min(max(speed, min_speed), max_speed)
+    return int(round(length / speed))
+
+def _stretch_group(clips, targets, n_fft, hop):
+    """
+    Phase vocoder with identity phase locking over a padded (clips, frames, bins) block.
+    Each clip has its own ratio; output frames sit at fractional input frames.
+    """
+    count = len(clips)
+    pad = n_fft // 2
+    bins = n_fft // 2 + 1
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)  # Periodic Hann: constant overlap-add at n_fft/4
+
+    x = np.zeros((count, max(len(c) for c in clips) + 2 * pad), dtype=np.float32)
+    for b, clip in enumerate(clips):
+        x[b, pad:pad + len(clip)] = clip
+    spec = np.fft.rfft(sliding_window_view(x, n_fft, axis=1)[:, ::hop] * window, axis=-1).astype(np.complex64)
+    magnitude = np.abs(spec)
+    phase = np.angle(spec)
+
+    # Fractional analysis frame for every output frame, clamped to each clip's own last frame
+    ratios = np.array([len(c) / t for c, t in zip(clips, targets)])
+    frames_out = max(-(-t // hop) for t in targets) + 2  # Every frame overlapping the kept [pad, pad + t)
+    last = np.array([len(c) // hop for c in clips])[:, None]
+    position = np.minimum(np.arange(frames_out)[None, :] * ratios[:, None], last)
+    k0 = np.floor(position).astype(np.intp)
+    k1 = np.minimum(k0 + 1, last)
+    frac = (position - k0).astype(np.float32)[..., None]
+    rows = np.arange(count)[:, None]
+
+    mag = (1 - frac) * magnitude[rows, k0] + frac * magnitude[rows, k1]
+    analysis_phase = phase[rows, k0]
+    # Expected advance per hop, reduced mod 2*pi so float32 accumulation stays precise
+    omega = np.mod(2 * np.pi * hop * np.arange(bins) / n_fft, 2 * np.pi).astype(np.float32)
+    deviation = phase[rows, k1] - analysis_phase - omega
+    deviation -= 2 * np.pi * np.round(deviation / (2 * np.pi))
+    advance = omega + deviation
+    accumulated = np.empty_like(advance)
+    accumulated[:, 0] = phase[:, 0]
+    np.cumsum(advance[:, :-1], axis=1, out=accumulated[:, 1:])
+    accumulated[:, 1:] += phase[:, :1]
+
+    # Identity phase locking: bins keep their analysis phase offset to the nearest spectral peak
+    index = np.arange(bins, dtype=np.int16)
+    peaks = np.zeros(mag.shape, dtype=bool)
+    peaks[..., 1:-1] = (mag[..., 1:-1] > mag[..., :-2]) & (mag[..., 1:-1] >= mag[..., 2:])
+    before = np.maximum.accumulate(np.where(peaks, index, np.int16(-bins)), axis=-1)
+    after = np.minimum.accumulate(np.where(peaks, index, np.int16(2 * bins))[..., ::-1], axis=-1)[..., ::-1]
+    # Frames without any peak (silence) fall back to an edge bin; their magnitude is ~0 anyway
+    owner = np.clip(np.where(index - before <= after - index, before, after), 0, bins - 1)
+    locked = analysis_phase + np.take_along_axis(accumulated - analysis_phase, owner, axis=-1)
+
+    out_spec = np.empty(mag.shape, dtype=np.complex64)
+    out_spec.real = mag * np.cos(locked)
+    out_spec.imag = mag * np.sin(locked)
+    frames = np.fft.irfft(out_spec, n=n_fft, axis=-1).astype(np.float32)
+    frames *= window
+    # Overlap-add: each frame is n_fft // hop hop-sized blocks, every block index shifts as a whole
+    out = np.zeros((count, (frames_out - 1) * hop + n_fft), dtype=np.float32)
+    norm = np.zeros(out.shape[1], dtype=np.float32)
+    for j in range(n_fft // hop):
+        block = slice(j * hop, j * hop + frames_out * hop)
+        out[:, block] += frames[:, :, j * hop:(j + 1) * hop].reshape(count, -1)
+        norm[block] += np.tile(window[j * hop:(j + 1) * hop] ** 2, frames_out)
+    out /= np.where(norm > 1e-3, norm, 1.0)
+    return [out[b, pad:pad + t] for b, t in enumerate(targets)]
+
+def stretch_batch(clips, sample_rate, target_lengths, n_fft=None, max_cells=None):
+    """
+    Pitch-preserving time-stretch of many mono float clips in a few vectorized passes.
+    Every clip comes back with exactly its target length (samples).
+    Clips are length-sorted into groups of at most max_cells (clips x frames x bins)
+    so peak memory stays bounded however many clips are passed.
+    """
+    n_fft = n_fft or frame_size(sample_rate)
+    hop = n_fft // 4
+    budget = max_cells or Config.TIMESTRETCH_MAX_CELLS
+    clips = [np.asarray(c, dtype=np.float32) for c in clips]
+    targets = [int(t) for t in target_lengths]
+    results = [None] * len(clips)
+
+    pending = []
+    for i, (clip, target) in enumerate(zip(clips, targets)):
+        if target == len(clip):
+            results[i] = clip
+        elif target <= 0 or len(clip) == 0:
+            results[i] = np.zeros(max(target, 0), dtype=np.float32)
+        else:
+            pending.append(i)
+
+    groups, current = [], []
+    for i in sorted(pending, key=lambda i: max(len(clips[i]), targets[i])):
+        frames = max(len(clips[i]), targets[i]) // hop + 2
+        # Sorted ascending, so the newest clip is always the longest in its group
+        if current and (len(current) + 1) * frames * (n_fft // 2 + 1) > budget:
+            groups.append(current)
+            current = []
+        current.append(i)
+    if current:
+        groups.append(current)
+    for group in groups:
+        outputs = _stretch_group([clips[i] for i in group], [targets[i] for i in group], n_fft, hop)
+        for i, out in zip(group, outputs):
+            results[i] = out
+    return results
+
+def stretch(samples, sample_rate, target_length, n_fft=None):
+    """Single-clip convenience wrapper around stretch_batch."""
+    return stretch_batch([samples], sample_rate, [target_length], n_fft=n_fft)[0]
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from config import Config
+from core import metrics
+
+class TranslationMemory:
+    """
+    Persistent translation memory backed by SQLite.
+    Entries are keyed by normalised source text, source/target language and the
+    backend/model id, so repeated intros, outros and catchphrases are only
+    translated once across runs (and across workers via import/export).
+    """
+    def __init__(self, db_path=None, max_entries=None):
+        self.db_path = Path(db_path or Config.TRANSLATION_MEMORY_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries or Config.TRANSLATION_MEMORY_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        # Translation may run in executor threads (streaming mode)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            " key TEXT PRIMARY KEY, source_lang TEXT, target_lang TEXT, backend TEXT,"
+            " source_text TEXT, target_text TEXT, hits INTEGER DEFAULT 0, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(text):
+        """NFKC + collapsed whitespace, so trivially different transcripts share an entry."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+    @classmethod
+    def make_key(cls, text, source_lang, target_lang, backend):
+        payload = "\x1f".join([source_lang, target_lang, backend, cls.normalize(text)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, texts, source_lang, target_lang, backend):
+        """Returns {text: translation} for every text found in memory, updating hit/miss counters."""
+        keys = {self.make_key(t, source_lang, target_lang, backend): t for t in texts}
+        found = {}
+        now = time.time()
+        with self._lock:
+            key_list = list(keys)
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, target_text FROM memory WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, target_text in rows:
+                    found[keys[key]] = target_text
+            self._conn.executemany(
+                "UPDATE memory SET hits = hits + 1, last_used = ? WHERE key = ?",
+                [(now, self.make_key(t, source_lang, target_lang, backend)) for t in found]
+            )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        metrics.record_cache("translation_memory", hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def store(self, pairs, source_lang, target_lang, backend):
+        """Stores {source_text: translation} pairs and evicts the oldest entries if over budget."""
+        now = time.time()
+        rows = [
+            (self.make_key(src, source_lang, target_lang, backend), source_lang, target_lang, backend,
+             self.normalize(src), dst, now)
+            for src, dst in pairs.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO memory (key, source_lang, target_lang, backend, source_text, target_text, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        self.evict()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def evict(self):
+        """Keeps at most max_entries rows, dropping the least recently used ones."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM memory WHERE key IN (SELECT key FROM memory ORDER BY last_used ASC LIMIT ?)",
+                    (excess,)
+                )
+                self._conn.commit()
+                print(f"🗑️ Translation memory evicted {excess} entries.")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def export_jsonl(self, path):
+        """Writes every entry as one JSON object per line."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source_lang, target_lang, backend, source_text, target_text FROM memory"
+            ).fetchall()
+        with open(path, 'w', encoding='utf-8') as f:
+            for source_lang, target_lang, backend, source_text, target_text in rows:
+                f.write(json.dumps({
+                    "source_lang": source_lang, "target_lang": target_lang, "backend": backend,
+                    "source_text": source_text, "target_text": target_text,
+                }, ensure_ascii=False) + "\n")
+        print(f"📤 Exported {len(rows)} translation memory entries to {path}")
+        return len(rows)
+
+    def import_jsonl(self, path):
+        """Merges entries exported by another worker."""
+        grouped = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                group = (entry["source_lang"], entry["target_lang"], entry["backend"])
+                grouped.setdefault(group, {})[entry["source_text"]] = entry["target_text"]
+        count = 0
+        for (source_lang, target_lang, backend), pairs in grouped.items():
+            self.store(pairs, source_lang, target_lang, backend)
+            count += len(pairs)
+        print(f"📥 Imported {count} translation memory entries from {path}")
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "import"):
+        print("Usage: python -m core.translation_memory <export|import> <file.jsonl>")
+        sys.exit(1)
+    memory = TranslationMemory()
+    if sys.argv[1] == "export":
+        memory.export_jsonl(sys.argv[2])
+    else:
+        memory.import_jsonl(sys.argv[2])
+    memory.close()
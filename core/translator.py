@@ -1,80 +1,295 @@
 import os
-from deep_translator import GoogleTranslator
-from transformers import pipeline, AutoModelForSeq2SeqLM, AutoTokenizer
-import torch
+import shutil
+import time
+from config import Config
+from core import metrics
+from core.translation_memory import TranslationMemory
+from core.online_translation import OnlineTranslationEngine
+from core.registry import get_registry
+from core.segments import SegmentStore
+
+LOCAL_MODEL_NAME = "facebook/nllb-200-distilled-600M"
+
+# Map common lang codes to NLLB (FLORES-200) lang codes
+NLLB_LANG_CODES = {
+    "zh": "zho_Hans", "zh-TW": "zho_Hant", "en": "eng_Latn", "es": "spa_Latn", "fr": "fra_Latn",
+    "de": "deu_Latn", "it": "ita_Latn", "pt": "por_Latn", "ru": "rus_Cyrl", "ja": "jpn_Jpan",
+    "ko": "kor_Hang", "ar": "arb_Arab", "hi": "hin_Deva", "th": "tha_Thai", "vi": "vie_Latn",
+    "id": "ind_Latn", "tr": "tur_Latn",
+}
 
 class Translator:
-    def __init__(self, target_lang="zh", use_local=False):
+    def __init__(self, target_lang="zh", use_local=False, memory=None, online_backend=None, source_lang=None):
         self.target_lang = target_lang
         self.use_local = use_local
+        # Optional TranslationMemory consulted before any model/API call
+        self.memory = memory
+        self.source_lang = source_lang or Config.TRANSLATE_SOURCE_LANG
         self.model = None
         self.tokenizer = None
+        self.online = None
+        self.engine = None
         
-        if use_local:
-            print("⏳ Loading local NLLB-200 translation model (600M)...")
-            model_name = "facebook/nllb-200-distilled-600M"
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to("cuda" if torch.cuda.is_available() else "cpu")
+        if not use_local:
+            # online_backend is pluggable (e.g. a local stand-in server for tests)
+            self.online = OnlineTranslationEngine(backend=online_backend)
+        else:
+            device = Config.DEVICE
+            self.engine = Config.NLLB_ENGINE
+            if self.engine == "ctranslate2":
+                self.tokenizer, self.model = self._load_ctranslate2(device)
+            else:
+                def load():
+                    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+                    print("⏳ Loading local NLLB-200 translation model (600M)...")
+                    tokenizer = AutoTokenizer.from_pretrained(LOCAL_MODEL_NAME)
+                    model = AutoModelForSeq2SeqLM.from_pretrained(LOCAL_MODEL_NAME).to(device)
+                    print("✅ Local Translation Model Loaded.")
+                    return tokenizer, model
+                self.tokenizer, self.model = get_registry().get(("nllb", LOCAL_MODEL_NAME, device), load)
+            # NLLB cannot auto-detect; fall back to the language Whisper is prompted for
+            if self.source_lang == "auto":
+                print(f"⚠️ NLLB needs an explicit source language, assuming '{Config.NLLB_FALLBACK_SOURCE_LANG}'.")
+                self.source_lang = Config.NLLB_FALLBACK_SOURCE_LANG
+            self.tokenizer.src_lang = NLLB_LANG_CODES.get(self.source_lang, "zho_Hans")
+            self.target_code = NLLB_LANG_CODES.get(self.target_lang, "zho_Hans")
+
+    @staticmethod
+    def ct2_model_dir():
+        """Converted CTranslate2 model, one directory per weight quantization."""
+        return Config.CHECKPOINTS_DIR / f"{LOCAL_MODEL_NAME.split('/')[-1]}-ct2-{Config.NLLB_CT2_QUANTIZATION}"
+
+    @classmethod
+    def convert_ctranslate2(cls):
+        """
+        Converts the Hugging Face NLLB checkpoint once into CHECKPOINTS_DIR and records it
+        in the asset manifest; later runs only verify the manifest.
+        """
+        import fcntl
+        from core.assets import AssetManifest
+        model_dir = cls.ct2_model_dir()
+        if not AssetManifest().verify(model_dir.name):
+            return model_dir
+        model_dir.parent.mkdir(parents=True, exist_ok=True)
+        # Workers starting together on a fresh host: one converts, the others wait for it and re-verify
+        with open(model_dir.with_name(model_dir.name + ".lock"), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Re-read under the lock, another process may have recorded the model meanwhile
+            manifest = AssetManifest()
+            if not manifest.verify(model_dir.name):
+                return model_dir
+            from ctranslate2.converters import TransformersConverter
+            print(f"🔧 Converting {LOCAL_MODEL_NAME} to CTranslate2 ({Config.NLLB_CT2_QUANTIZATION})...")
+            started = time.perf_counter()
+            # Convert next to the target and swap in, so an interrupted conversion is never picked up
+            tmp_dir = model_dir.with_name(model_dir.name + ".tmp")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            TransformersConverter(LOCAL_MODEL_NAME).convert(str(tmp_dir), quantization=Config.NLLB_CT2_QUANTIZATION,
+                                                            force=True)
+            shutil.rmtree(model_dir, ignore_errors=True)
+            os.replace(tmp_dir, model_dir)
+            manifest.record(model_dir.name, model_dir)
+            print(f"✅ Converted in {time.perf_counter() - started:.0f}s: {model_dir}")
+        return model_dir
+
+    @classmethod
+    def _load_ctranslate2(cls, device):
+        # CTranslate2 runs on CUDA or CPU only
+        device = "cuda" if device == "cuda" else "cpu"
+        compute_type = Config.NLLB_CT2_COMPUTE_TYPE or ("int8_float16" if device == "cuda" else "int8_float32")
+        model_dir = cls.convert_ctranslate2()
+
+        def load():
+            import ctranslate2
+            from transformers import AutoTokenizer
+            print(f"⏳ Loading NLLB-200 (CTranslate2, {compute_type}, {device})...")
+            tokenizer = AutoTokenizer.from_pretrained(LOCAL_MODEL_NAME)
+            model = ctranslate2.Translator(str(model_dir), device=device, compute_type=compute_type,
+                                           intra_threads=Config.NLLB_CT2_INTRA_THREADS,
+                                           inter_threads=Config.NLLB_CT2_INTER_THREADS)
             print("✅ Local Translation Model Loaded.")
+            return tokenizer, model
+        key = ("nllb-ct2", str(model_dir), device, compute_type, Config.NLLB_CT2_INTRA_THREADS,
+               Config.NLLB_CT2_INTER_THREADS)
+        return get_registry().get(key, load)
+
+    def unload(self):
+        """Releases this translator's handles; the weights stay warm in the registry."""
+        self.model = None
+        self.tokenizer = None
+
+    @staticmethod
+    def backend_id(use_local=False):
+        """Identifies the translation backend, e.g. for cache keys."""
+        if not use_local:
+            return "google"
+        if Config.NLLB_ENGINE == "ctranslate2":
+            # Quantized weights translate slightly differently: separate cache/memory entries
+            return f"{LOCAL_MODEL_NAME}@ct2-{Config.NLLB_CT2_QUANTIZATION}"
+        return LOCAL_MODEL_NAME
 
     def translate_text(self, text):
+        return self._translate_text(text)[0]
+
+    def _translate_text(self, text):
+        """One text -> (translation, error); a failed text comes back unchanged with its error."""
+        backend = self.backend_id(self.use_local)
+        if self.memory is not None:
+            cached = self.memory.lookup([text], self.source_lang, self.target_lang, backend)
+            if text in cached:
+                return cached[text], None
+        result, error = self._translate_one(text)
+        if result is None:
+            return text, error
+        if self.memory is not None:
+            self.memory.store({text: result}, self.source_lang, self.target_lang, backend)
+        return result, None
+
+    def _translate_one(self, text):
+        """Translates a single text; returns (None, error) (after reporting it) if the online backend failed."""
+        started = time.perf_counter()
+        error = None
         if not self.use_local:
-            try:
-                return GoogleTranslator(source='auto', target=self.target_lang).translate(text)
-            except:
-                return text
+            (result, error), = self.online.translate([text], self.source_lang, self.target_lang)
+            if error:
+                print(f"⚠️ Translation failed ({error}), keeping source text: {text[:40]}")
         else:
-            # Map common lang codes to NLLB lang codes
-            # Simple mapping for demo: zh -> zho_Hans, en -> eng_Latn
-            lang_map = {"zh": "zho_Hans", "en": "eng_Latn", "es": "spa_Latn", "fr": "fra_Latn"}
-            target_code = lang_map.get(self.target_lang, "zho_Hans")
+            result = self._translate_local([text])[0]
+        metrics.observe("translate_segment_seconds", time.perf_counter() - started)
+        return result, error
+
+    def _token_batches(self, token_ids, max_tokens):
+        """
+        Sorts tokenized texts by length and groups them so that each padded batch
+        (batch size x longest sequence) stays under max_tokens.
+        Returns lists of original indices, longest batches first.
+        """
+        order = sorted(range(len(token_ids)), key=lambda i: len(token_ids[i]), reverse=True)
+        batches, current = [], []
+        for i in order:
+            # Sorted descending, so the first item of a batch is its longest
+            longest = len(token_ids[current[0]]) if current else len(token_ids[i])
+            if current and (len(current) + 1) * longest > max_tokens:
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _translate_local(self, texts):
+        """NLLB translation with token-budget batching; results come back in the original order."""
+        token_ids = self.tokenizer(texts, truncation=True, max_length=Config.NLLB_MAX_SOURCE_TOKENS)["input_ids"]
+        if self.engine == "ctranslate2":
+            return self._translate_ctranslate2(token_ids)
+        forced_bos = self.tokenizer.convert_tokens_to_ids(self.target_code)
+        results = [None] * len(texts)
+
+        for batch in self._token_batches(token_ids, Config.NLLB_MAX_BATCH_TOKENS):
+            inputs = self.tokenizer.pad(
+                {"input_ids": [token_ids[i] for i in batch]}, return_tensors="pt"
+            ).to(self.model.device)
+            # Output budget follows the longest source in the batch instead of a fixed cap
+            src_len = max(len(token_ids[i]) for i in batch)
+            max_length = min(int(src_len * Config.NLLB_LENGTH_RATIO) + 10, Config.NLLB_MAX_LENGTH)
             
-            inputs = self.tokenizer(text, return_tensors="pt").to(self.model.device)
+            # 工业级技巧：通过 penalty 鼓励模型生成更精炼的句子，避免啰嗦
             translated_tokens = self.model.generate(
-                **inputs, forced_bos_token_id=self.tokenizer.lang_code_to_id[target_code], max_length=128
+                **inputs, 
+                forced_bos_token_id=forced_bos, 
+                max_length=max_length,  # 按源句长度限制最大长度
+                length_penalty=1.0,     # 长度惩罚因子
+                num_beams=4
+            )
+            decoded = self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)
+            for i, text in zip(batch, decoded):
+                results[i] = text
+        return results
+
+    def _translate_ctranslate2(self, token_ids):
+        """Same batches, beam and length budget as the transformers path, through translate_batch."""
+        results = [None] * len(token_ids)
+        for batch in self._token_batches(token_ids, Config.NLLB_MAX_BATCH_TOKENS):
+            src_len = max(len(token_ids[i]) for i in batch)
+            max_length = min(int(src_len * Config.NLLB_LENGTH_RATIO) + 10, Config.NLLB_MAX_LENGTH)
+            outputs = self.model.translate_batch(
+                [self.tokenizer.convert_ids_to_tokens(token_ids[i]) for i in batch],
+                target_prefix=[[self.target_code]] * len(batch),
+                beam_size=4,
+                length_penalty=1.0,
+                max_decoding_length=max_length,
             )
-            return self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)[0]
+            for i, output in zip(batch, outputs):
+                # The hypothesis starts with the target-language prefix token
+                tokens = output.hypotheses[0][1:]
+                results[i] = self.tokenizer.decode(self.tokenizer.convert_tokens_to_ids(tokens),
+                                                   skip_special_tokens=True)
+        return results
+
+    def _translate_batch(self, texts):
+        """
+        Translates a list of texts with the configured backend, without consulting memory.
+        Returns (translations, errors) where errors maps a failed text to its error message.
+        """
+        translated_texts = []
+        errors = {}
+        started = time.perf_counter()
+
+        if self.use_local:
+            translated_texts = self._translate_local(texts)
+        else:
+            # 在线 API 模式：打包 + 并发 + 指数退避重试，失败逐条上报
+            for text, (result, error) in zip(texts, self.online.translate(texts, self.source_lang, self.target_lang)):
+                if error:
+                    errors[text] = error
+                translated_texts.append(result)
 
-    def translate_segments(self, segments, batch_size=16):
-        print(f"🌍 Translating {len(segments)} segments (Dubbing Strategy: Conciseness)...")
-        translated_segments = []
+        if texts:
+            # Batched/packed calls: each segment is charged its share of the call
+            metrics.observe("translate_segment_seconds", (time.perf_counter() - started) / len(texts), len(texts))
+        return translated_texts, errors
+
+    def translate_segments(self, segments):
+        """
+        segments: SegmentStore (or segment dicts).
+        Returns a SegmentStore sharing the timing/speaker/word columns, with translated
+        texts and the source kept as original_text.
+        """
+        store = SegmentStore.from_segments(segments)
+        print(f"🌍 Translating {len(store)} segments (Dubbing Strategy: Conciseness)...")
         
         # 预处理：如果是翻译成英文，且中文原句很短，我们需要提示或采用精简策略
         # 对于 NLLB 这种模型，我们通过控制 max_length 和生成参数来控制长度
         
-        texts = [seg['text'] for seg in segments]
-        translated_texts = []
+        # 去重：同一次运行中重复的句子（片头、口头禅等）只翻译一次
+        # The store already interns identical lines; normalising also merges near-duplicates
+        normalize = TranslationMemory.normalize
+        keys = {int(i): normalize(store.texts[i]) for i in store.used_text_ids()}
+        unique_texts = list(dict.fromkeys(keys.values()))
+        backend = self.backend_id(self.use_local)
 
-        if self.use_local:
-            lang_map = {"zh": "zho_Hans", "en": "eng_Latn", "es": "spa_Latn", "fr": "fra_Latn"}
-            target_code = lang_map.get(self.target_lang, "zho_Hans")
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i+batch_size]
-                inputs = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True).to(self.model.device)
-                
-                # 工业级技巧：通过 penalty 鼓励模型生成更精炼的句子，避免啰嗦
-                translated_tokens = self.model.generate(
-                    **inputs, 
-                    forced_bos_token_id=self.tokenizer.lang_code_to_id[target_code], 
-                    max_length=100,      # 限制最大长度
-                    length_penalty=1.0,   # 长度惩罚因子
-                    num_beams=4
-                )
-                batch_results = self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)
-                translated_texts.extend(batch_results)
-        else:
-            # 在线 API 模式：如果是 GPT 可以加提示词，Google 则通过后续逻辑修剪
-            for text in texts:
-                translated_texts.append(self.translate_text(text))
-
-        # 组装结果
-        for i, seg in enumerate(segments):
-            translated_segments.append({
-                "start": seg['start'],
-                "end": seg['end'],
-                "original_text": seg['text'],
-                "text": translated_texts[i]
-            })
+        translations = {}
+        if self.memory is not None:
+            translations = self.memory.lookup(unique_texts, self.source_lang, self.target_lang, backend)
+        pending = [t for t in unique_texts if t not in translations]
+        errors = {}
+        if pending:
+            results, errors = self._translate_batch(pending)
+            translations.update((t, r) for t, r in zip(pending, results) if t not in errors)
+            if self.memory is not None:
+                self.memory.store({t: translations[t] for t in pending if t not in errors}, self.source_lang, self.target_lang, backend)
+        print(f"♻️ {len(store)} segments -> {len(unique_texts)} unique texts, {len(pending)} sent to the backend.")
+        if self.memory is not None:
+            stats = self.memory.stats()
+            print(f"📚 Translation memory: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['entries']} entries")
+
+        # 组装结果（失败的片段保留原文并标记错误）
+        translated = store.translated({i: translations.get(key, store.texts[i]) for i, key in keys.items()},
+                                      {i: errors[key] for i, key in keys.items() if key in errors})
+
+        if translated.errors:
+            print(f"⚠️ {len(translated.errors)} segments failed to translate and kept their source text:")
+            for i, error in sorted(translated.errors.items()):
+                print(f"   [{translated.start[i]:.1f}s] {error}: {store.text(i)[:40]}")
             
-        return translated_segments
+        return translated
@@ -1,15 +1,14 @@
-import asyncio
-import os
-import torch
-import gc
-import sys
-import subprocess
-import requests
+import inspect
+import time
 import numpy as np
-from pathlib import Path
-from pydub import AudioSegment
-from tqdm import tqdm
 from config import Config
+from core.assets import AssetManifest, hub_offline, hub_snapshot
+from core.audio import AudioProcessor
+from core.mixer import AudioMixer
+from core.reference import ReferenceVoiceManager
+from core.timestretch import stretch_batch, target_length
+from core.registry import get_registry
+from core import metrics
 
 # Monkey patch for NumPy 2.0+ compatibility
 if not hasattr(np, "complex"): np.complex = complex
@@ -24,107 +23,226 @@ class TTSProcessor:
     Offers improved reliability and quality over legacy systems.
     """
     def __init__(self, device=None):
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = device or Config.DEVICE
         self.model = None
         self.model_dir = Config.F5TTS_MODEL_DIR
         self.model_dir.mkdir(parents=True, exist_ok=True)
-
+        # Resampled/normalised reference tensors for the batched path, keyed by reference clip
+        self._prepared_refs = {}
 
     def load_model(self):
         """Lazy load F5-TTS model."""
         if self.model is not None:
             return
 
-        print("⏳ Loading F5-TTS into VRAM...")
-        try:
+        def load():
+            manifest = AssetManifest()
+            verified = not any(manifest.verify(name) for name in Config.F5TTS_HF_REPOS)
+            print("⏳ Loading F5-TTS into VRAM" + (" (verified against local manifest)..." if verified else "..."))
             from f5_tts.api import F5TTS
-            self.model = F5TTS(device=self.device)
+            # Verified weights load from the hub cache without any lookup online
+            with hub_offline(verified):
+                model = F5TTS(device=self.device)
+            if not verified:
+                try:
+                    for name, repo_id in Config.F5TTS_HF_REPOS.items():
+                        manifest.record(name, hub_snapshot(repo_id))
+                except Exception as e:
+                    print(f"⚠️ Could not record F5-TTS assets, next load checks the hub again: {e}")
             print("✅ F5-TTS Model Loaded.")
+            return model
+
+        try:
+            self.model = get_registry().get(self.registry_key(self.device), load)
         except Exception as e:
             print(f"❌ Failed to load F5-TTS: {e}")
             raise
 
-    async def generate_full_audio(self, segments, original_audio_path, output_path, emo_alpha=None):
+    @staticmethod
+    def registry_key(device=None):
+        return ("f5-tts", device or Config.DEVICE)
+
+    def _synthesize(self, reference, text):
+        """Runs F5-TTS on an in-memory reference. Returns (mono float32 wav, sample_rate)."""
+        from f5_tts.infer.utils_infer import infer_batch_process
+        started = time.perf_counter()
+        result = infer_batch_process(
+            (reference.tensor, reference.sample_rate),
+            reference.text,
+            [text],
+            self.model.ema_model,
+            self.model.vocoder,
+            mel_spec_type=self.model.mel_spec_type,
+            device=self.device,
+        )
+        # Newer F5-TTS releases return a generator (streaming support)
+        if inspect.isgenerator(result):
+            result = next(result)
+        wav, sample_rate, _ = result
+        metrics.observe("tts_segment_seconds", time.perf_counter() - started)
+        return np.asarray(wav, dtype=np.float32), sample_rate
+
+    def _prepare_reference(self, reference, target_rms=0.1):
+        """Resamples and RMS-normalises a reference once for batched sampling."""
+        if reference.key not in self._prepared_refs:
+            import torch
+            import torchaudio
+            audio = reference.tensor.to(torch.float32)
+            rms = float(torch.sqrt(torch.mean(torch.square(audio))))
+            if rms < target_rms:
+                audio = audio * target_rms / rms
+            if reference.sample_rate != self.model.target_sample_rate:
+                audio = torchaudio.transforms.Resample(reference.sample_rate, self.model.target_sample_rate)(audio)
+            hop_length = self.model.ema_model.mel_spec.hop_length
+            ref_frames = audio.shape[-1] // hop_length
+            self._prepared_refs[reference.key] = (audio.to(self.device), ref_frames, rms)
+        return self._prepared_refs[reference.key]
+
+    def _estimate_frames(self, reference, text, speed=1.0):
+        """Total mel frames (reference + generated) F5-TTS will sample for a text, same rule as its infer API."""
+        _, ref_frames, _ = self._prepare_reference(reference)
+        ref_text_len = max(len(reference.text.encode('utf-8')), 1)
+        gen_text_len = len(text.encode('utf-8'))
+        return ref_frames + int(ref_frames / ref_text_len * gen_text_len / speed)
+
+    @staticmethod
+    def _make_buckets(items, frame_budget, max_batch_size):
+        """
+        Groups (index, frames) items into length-sorted buckets whose padded size
+        (batch * longest item) stays within frame_budget.
+        """
+        buckets, current = [], []
+        for index, frames in sorted(items, key=lambda item: item[1]):
+            # Sorted ascending, so the newest item is always the longest in its bucket
+            if current and ((len(current) + 1) * frames > frame_budget or len(current) >= max_batch_size):
+                buckets.append(current)
+                current = []
+            current.append((index, frames))
+        if current:
+            buckets.append(current)
+        return buckets
+
+    def _synthesize_batch(self, reference, texts, nfe_step=32, cfg_strength=2.0, sway_sampling_coef=-1, target_rms=0.1):
+        """Samples several texts against one reference in a single forward pass of the flow model."""
+        import torch
+        from f5_tts.model.utils import convert_char_to_pinyin
+        started = time.perf_counter()
+        audio, ref_frames, ref_rms = self._prepare_reference(reference, target_rms)
+        durations = [self._estimate_frames(reference, text) for text in texts]
+        batch = len(texts)
+
+        with torch.inference_mode():
+            generated, _ = self.model.ema_model.sample(
+                cond=audio.repeat(batch, 1),
+                text=convert_char_to_pinyin([reference.text + text for text in texts]),
+                duration=torch.tensor(durations, device=self.device, dtype=torch.long),
+                lens=torch.full((batch,), ref_frames, device=self.device, dtype=torch.long),
+                steps=nfe_step,
+                cfg_strength=cfg_strength,
+                sway_sampling_coef=sway_sampling_coef,
+            )
+            results = []
+            for i, duration in enumerate(durations):
+                # Drop the reference prefix and the padding of shorter items
+                mel = generated[i:i + 1, ref_frames:duration, :].permute(0, 2, 1).to(torch.float32)
+                if self.model.mel_spec_type == "vocos":
+                    wav = self.model.vocoder.decode(mel)
+                else:
+                    wav = self.model.vocoder(mel)
+                wav = wav.squeeze().cpu().numpy().astype(np.float32)
+                if ref_rms < target_rms:
+                    wav = wav * ref_rms / target_rms
+                results.append((wav, self.model.target_sample_rate))
+        # One forward pass for the whole batch: each segment is charged its share
+        metrics.observe("tts_segment_seconds", (time.perf_counter() - started) / batch, batch)
+        return results
+
+    def _render_segments(self, segments, references, batched=False):
+        """Yields (index, wav, sample_rate) for every segment, one by one or in length buckets."""
+        if not batched:
+            for i, seg in enumerate(segments):
+                # Preprocessed reference (audio + Whisper transcript), shared by the segments that pick the same clip
+                reference = references.for_segment(seg)
+                print(f"🎙️ Rendering Segment {i} (F5-TTS Cloning)...")
+                wav, wav_rate = self._synthesize(reference, seg['text'])
+                yield i, wav, wav_rate
+            return
+
+        # One batch group per reference clip: a batch is sampled against a single prompt
+        by_reference = {}
+        for i, seg in enumerate(segments):
+            reference = references.for_segment(seg)
+            by_reference.setdefault(reference.key, (reference, []))[1].append(i)
+        for reference, indices in by_reference.values():
+            items = [(i, self._estimate_frames(reference, segments[i]['text'])) for i in indices]
+            buckets = self._make_buckets(items, Config.TTS_BATCH_FRAME_BUDGET, Config.TTS_BATCH_MAX_SIZE)
+            for bucket in buckets:
+                batch_indices = [i for i, _ in bucket]
+                print(f"🎙️ Rendering {len(batch_indices)} segments in one batch ({bucket[-1][1]} frames max)...")
+                results = self._synthesize_batch(reference, [segments[i]['text'] for i in batch_indices])
+                # Scatter results back to their timeline positions
+                for i, (wav, wav_rate) in zip(batch_indices, results):
+                    yield i, wav, wav_rate
+
+    def _mix_segment(self, mixer, seg, wav, wav_rate):
+        """Fits one synthesized clip to its slot and mixes it in at the segment start."""
+        self._mix_segments(mixer, [(seg, wav, wav_rate)])
+
+    def _mix_segments(self, mixer, items):
+        """
+        Fits synthesized clips [(seg, wav, sample_rate)] to their slots and mixes them in.
+        Clips are time-stretched (pitch preserved) in one vectorized call per sample rate,
+        within Config.TTS_STRETCH_MIN_SPEED..TTS_STRETCH_MAX_SPEED.
+        """
+        by_rate = {}
+        for seg, wav, wav_rate in items:
+            by_rate.setdefault(wav_rate, []).append((seg, wav))
+        for wav_rate, group in by_rate.items():
+            started = time.perf_counter()
+            targets = [target_length(len(wav), int((seg['end'] - seg['start']) * wav_rate)) for seg, wav in group]
+            clips = stretch_batch([wav for _, wav in group], wav_rate, targets)
+            metrics.observe("tts_stretch_seconds", (time.perf_counter() - started) / len(group), len(group))
+            for (seg, _), clip in zip(group, clips):
+                mixer.add(clip, wav_rate, seg['start'])
+
+    async def generate_full_audio(self, segments, original_audio, output_path, emo_alpha=None, batched=None):
         """
         Generates full dubbed audio with F5-TTS zero-shot voice cloning.
         - segments: List of translated segments (with start, end, text)
-        - original_audio_path: Path to the original full audio wav
+        - original_audio: Path to the original full audio wav, or decoded (samples, sample_rate)
+        - batched: Render length-bucketed batches per voice (defaults to Config.TTS_BATCHED)
         """
+        if batched is None:
+            batched = Config.TTS_BATCHED
         self.load_model()
         print(f"🗣️ Cloning voices and rendering {len(segments)} segments via F5-TTS...")
 
-        # Create temp dir for segments
-        temp_dir = Config.TEMP_DIR / "f5tts_segments"
-        temp_dir.mkdir(exist_ok=True)
+        # Load full original audio once; references are cut from it in memory
+        orig_audio, orig_rate = AudioProcessor.load_audio(original_audio)
+        references = ReferenceVoiceManager(orig_audio, orig_rate, segments)
         
-        # Load full original audio for cropping reference samples
-        orig_audio = AudioSegment.from_wav(original_audio_path)
+        # One preallocated timeline sized from the last segment end
+        timeline_end = max((seg['end'] for seg in segments), default=0)
+        mixer = AudioMixer(timeline_end, sample_rate=44100)
         
-        combined_audio = AudioSegment.silent(duration=0, frame_rate=44100)
-        
-        for i, seg in enumerate(segments):
-            start_ms = int(seg['start'] * 1000)
-            end_ms = int(seg['end'] * 1000)
-            text = seg['text']
-            
-            # Extract original segment as voice prompt for cloning
-            ref_path = temp_dir / f"ref_{i:04d}.wav"
-            ref_seg = orig_audio[start_ms:end_ms]
-            
-            # F5-TTS works best with 5-10s reference. Let's pad if short.
-            if len(ref_seg) < 5000:
-                pad_start = max(0, start_ms - 2000)
-                pad_end = min(len(orig_audio), end_ms + 2000)
-                ref_seg = orig_audio[pad_start:pad_end]
-            
-            ref_seg.export(str(ref_path), format="wav")
-
-            # Output path for synthesized segment
-            seg_out_path = temp_dir / f"syn_{i:04d}.wav"
-            
-            print(f"🎙️ Rendering Segment {i} (F5-TTS Cloning)...")
-            
-            # F5-TTS Inference
-            self.model.infer(
-                ref_file=str(ref_path),
-                ref_text="", # F5-TTS uses ASR on reference if text is empty, more robust
-                gen_text=text,
-                output_file=str(seg_out_path)
-            )
-            
-            # Load and Merge with Sync Protection
-            if seg_out_path.exists():
-                syn_audio = AudioSegment.from_wav(str(seg_out_path))
-                
-                # Dynamic Sync (Rate check) - Index-TTS is natural but text might be long
-                # If much longer than original, we might need a slight stretch
-                target_dur = end_ms - start_ms
-                if len(syn_audio) > target_dur * 1.2 and target_dur > 0:
-                    speed = min(len(syn_audio) / target_dur, 1.25)
-                    syn_audio = syn_audio.speedup(playback_speed=speed, chunk_size=150, crossfade=25)
-
-                # Ensure base is long enough
-                if len(combined_audio) < start_ms:
-                    combined_audio += AudioSegment.silent(duration=start_ms - len(combined_audio), frame_rate=44100)
-                
-                # Overlay
-                combined_audio = combined_audio.overlay(syn_audio, position=start_ms)
-                
-                # Cleanup temp segment files
-                os.remove(ref_path)
-                os.remove(seg_out_path)
+        rendered = []
+        for i, wav, wav_rate in self._render_segments(segments, references, batched=batched):
+            rendered.append((segments[i], wav, wav_rate))
+            if len(rendered) >= Config.TTS_STRETCH_BATCH:
+                self._mix_segments(mixer, rendered)
+                rendered = []
+        self._mix_segments(mixer, rendered)
 
         # Export final merged audio
-        combined_audio.export(output_path, format="wav", parameters=["-ar", "44100", "-ac", "2"])
+        mixer.export_wav(output_path, channels=2)
         print(f"✅ Voice Cloned Dubbing Complete: {output_path}")
         return output_path
 
     def unload(self):
-        """Releases VRAM."""
+        """Releases this processor's handle; F5-TTS is evicted if it cannot stay resident next to Whisper."""
         if self.model:
-            del self.model
+            from core.asr import ASRProcessor
             self.model = None
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            print("🗑️ F5-TTS Unloaded from VRAM.")
\ No newline at end of file
+            self._prepared_refs = {}
+            get_registry().release(self.registry_key(self.device), ASRProcessor.registry_key())
+            print("🗑️ F5-TTS released to registry.")
\ No newline at end of file
@@ -19,12 +19,28 @@ class ProgressTracker:
         ]
         self.step_index = 0
 
+    # Pipeline stage names (core.metrics events) -> position in self.steps
+    STAGE_INDEX = {"extract": 0, "asr": 1, "translate": 2, "dub": 2, "tts": 3, "lipsync": 4, "mux": 4}
+
+    def handle(self, event):
+        """Consumer of MetricsRecorder events (see core.metrics): drives the console bar."""
+        if event["type"] == "stage_start":
+            self.set_step(self.STAGE_INDEX.get(event["stage"], self.step_index), event["status"])
+        elif event["type"] == "status":
+            self.set_status(event["status"])
+        elif event["type"] == "job_end":
+            self.set_step(len(self.steps) - 1, "Pipeline Complete" if event["status"] == "done" else "Failed")
+
     def set_step(self, index, status="Processing"):
         self.step_index = index
         self.current_step = self.steps[index] if index < len(self.steps) else "Finishing"
         self.sub_status = status
         self.step_start_time = time.time()
 
+    def set_status(self, status):
+        """Updates the sub-status of the current step without restarting its timer."""
+        self.sub_status = status
+
     def stop(self):
         self.is_running = False
 
@@ -71,24 +87,37 @@ class SubtitleGenerator:
         import textwrap
         return "\n".join(textwrap.wrap(text, width=max_width))
 
+    @staticmethod
+    def format_times(seconds):
+        """Vectorized format_time for a column of timestamps (same truncation)."""
+        import numpy as np
+        seconds = np.asarray(seconds, dtype=np.float64)
+        whole = np.floor(seconds)
+        milliseconds = ((seconds - whole) * 1000).astype(np.int64)
+        whole = whole.astype(np.int64)
+        return [f"{h:02d}:{m:02d}:{s:02d},{ms:03d}" for h, m, s, ms in
+                zip((whole // 3600).tolist(), (whole % 3600 // 60).tolist(), (whole % 60).tolist(), milliseconds.tolist())]
+
     @staticmethod
     def save_srt(segments, output_path, max_width=50):
         """
-        Saves segments to an SRT file with professional formatting.
-        - Handles long line wrapping
+        Saves segments (SegmentStore or segment dicts) to an SRT file with professional formatting.
+        - Handles long line wrapping (once per distinct text)
         - Cleans up whitespace
         """
+        from core.segments import SegmentStore
+        store = SegmentStore.from_segments(segments)
+        starts = SubtitleGenerator.format_times(store.start)
+        ends = SubtitleGenerator.format_times(store.end)
+        wrapped = {}
+        for text_id in store.used_text_ids().tolist():
+            # 过滤空内容
+            text = store.texts[text_id].strip()
+            # 自动换行处理
+            wrapped[text_id] = SubtitleGenerator.wrap_text(text, max_width=max_width) if text else None
+        blocks = [f"{i}\n{start} --> {end}\n{wrapped[text_id]}\n\n"
+                  for i, (start, end, text_id) in enumerate(zip(starts, ends, store.text_ids.tolist()), 1)
+                  if wrapped[text_id] is not None]
         with open(output_path, 'w', encoding='utf-8') as f:
-            for i, seg in enumerate(segments, 1):
-                start = SubtitleGenerator.format_time(seg['start'])
-                end = SubtitleGenerator.format_time(seg['end'])
-                # 过滤空内容
-                text = seg.get('text', '').strip()
-                if not text:
-                    continue
-                
-                # 自动换行处理
-                wrapped_text = SubtitleGenerator.wrap_text(text, max_width=max_width)
-                
-                f.write(f"{i}\n{start} --> {end}\n{wrapped_text}\n\n")
+            f.write("".join(blocks))
         print(f"📄 Subtitles saved to: {output_path}")
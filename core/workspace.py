@@ -0,0 +1,40 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from config import Config
+
+class JobWorkspace:
+    """
+    Private scratch directory for one pipeline run.
+    Lives under Config.TEMP_DIR/jobs (or /dev/shm when RAM-backed) and is removed
+    when the `with` block exits, so concurrent jobs never share temp files.
+    """
+    def __init__(self, job_id=None, in_ram=None):
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        in_ram = Config.WORKSPACE_IN_RAM if in_ram is None else in_ram
+        shm = Path("/dev/shm")
+        if in_ram and shm.is_dir() and os.access(shm, os.W_OK):
+            base = shm / "video-trans-studio"
+        else:
+            if in_ram:
+                print("⚠️ /dev/shm not available, using a disk-backed workspace.")
+            base = Config.TEMP_DIR / "jobs"
+        self.root = base / self.job_id
+
+    def __enter__(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
+
+    def path(self, name):
+        """Path of an artifact inside the workspace (sub-directories are created on demand)."""
+        target = self.root / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -1,103 +1,470 @@
 import sys
 import os
-import torch
 import gc
+import asyncio
+import time
+import shutil
+import argparse
+import contextlib
 from config import Config
-from core.audio import AudioProcessor
-from core.asr import ASRProcessor
-from core.translator import Translator
-from core.tts import TTSProcessor
-from core.lipsync import LipSyncProcessor
-from core.utils import ProgressTracker, SubtitleGenerator
+from core.cache import StageCache
+# Model stacks (torch, faster-whisper, transformers, F5-TTS, ...) are imported inside
+# run_pipeline, so `--help` / `--check` start in well under a second.
 
 def cleanup_vram():
     """Forcefully clear VRAM."""
     gc.collect()
-    if torch.cuda.is_available():
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
         torch.cuda.empty_cache()
 
-async def run_pipeline(video_path, target_lang="en"):
+# Cross-process semaphore set by daemon workers; limits concurrent model-heavy stages
+_heavy_slots = None
+# Shared counter of the slots this worker holds, so the daemon can free them if we die holding one
+_heavy_held = None
+
+def set_heavy_slots(semaphore, held=None):
+    global _heavy_slots, _heavy_held
+    _heavy_slots = semaphore
+    _heavy_held = held
+
+@contextlib.contextmanager
+def heavy_stage():
+    """Holds a heavy-stage slot (daemon mode) so CPU-bound stages of other jobs can overlap."""
+    if _heavy_slots is None:
+        yield
+        return
+    with _heavy_slots:
+        if _heavy_held is not None:
+            with _heavy_held.get_lock():
+                _heavy_held.value += 1
+        try:
+            yield
+        finally:
+            # Before the release: a crash in between leaks at most this one slot, never frees one twice
+            if _heavy_held is not None:
+                with _heavy_held.get_lock():
+                    _heavy_held.value -= 1
+
+async def run_pipeline(video_path, target_lang="en", force_stages=None, metrics=None, profile=None):
     """
     Orchestrates the full video translation pipeline.
     video_path: Path to source video
-    target_lang: Language code for translation (default: en)
+    target_lang: Language code for translation (default: en); several ("en,ja,fr" or a list)
+                 share extraction and ASR and are muxed into one file with a track per language
+    force_stages: Stage names (see StageCache.STAGES, or "all") to re-run even if cached
+    metrics: MetricsRecorder for this job (a new one is created if omitted)
+    profile: "full" / "sample" to profile every stage (default: Config.PROFILE_MODE)
     """
+    from core.audio import AudioProcessor
+    from core.asr import ASRProcessor, CPU_COMPUTE_TYPE
+    from core.translator import Translator
+    from core.tts import TTSProcessor
+    from core.reference import ReferenceVoiceManager
+    from core.lipsync import LipSyncProcessor
+    from core.utils import ProgressTracker, SubtitleGenerator
+    from core.translation_memory import TranslationMemory
+    from core.streaming import StreamingPipeline
+    from core.registry import get_registry
+    from core.workspace import JobWorkspace
+    from core.faces import FaceIndex
+    from core.segments import SegmentStore
+    from core.resegment import Resegmenter
+    from core.mux import encode_audio, mux_tracks
+    from core import metrics as job_metrics
     Config.print_info()
     
     if not os.path.exists(video_path):
         print(f"❌ Video not found: {video_path}")
         return
 
-    # Initialize progress tracker
-    tracker = ProgressTracker()
-    tracker.start_reporting()
-
-    try:
-        # Prepare output directory
-        video_name = os.path.splitext(os.path.basename(video_path))[0]
-        project_output_dir = Config.OUTPUT_DIR / video_name
-        project_output_dir.mkdir(parents=True, exist_ok=True)
+    # Stage timings, resources, latencies and cache hits; the console bar is just a subscriber
+    metrics = metrics or job_metrics.MetricsRecorder(job_id=os.path.basename(video_path))
+    job_metrics.set_active(metrics)
+    tracker = None
+    if Config.PROGRESS_BAR:
+        tracker = ProgressTracker()
+        metrics.subscribe(tracker.handle)
+        tracker.start_reporting()
+    metrics_path = None
+    # Private scratch space for this run; removed when the block exits, even when a stage fails
+    with JobWorkspace() as workspace:
+        try:
+            # Prepare output directory
+            video_name = os.path.splitext(os.path.basename(video_path))[0]
+            project_output_dir = Config.OUTPUT_DIR / video_name
+            project_output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Define output file paths
-        final_video_path = str(project_output_dir / f"final_{video_name}_{target_lang}.mp4")
-        original_srt_path = str(project_output_dir / f"{video_name}_original.srt")
-        translated_srt_path = str(project_output_dir / f"{video_name}_{target_lang}.srt")
-        
-        # 1. Extract Audio
-        tracker.set_step(0, "Audio Extraction (Extracting Wav)")
-        audio_path = AudioProcessor.extract_audio(video_path)
-        
-        # 2. ASR (Whisper)
-        tracker.set_step(1, "ASR Transcription (Whisper Large-v3)")
-        asr = ASRProcessor()
-        segments = asr.transcribe(audio_path)
-        SubtitleGenerator.save_srt(segments, original_srt_path)
-        asr.unload() 
-        cleanup_vram()
+            # Several target languages fan out after ASR and end up as tracks of one file
+            languages = parse_target_langs(target_lang)
+            if not languages:
+                raise ValueError("no target language given")
+            fan_out = len(languages) > 1
+            target_lang = languages[0]
+
+            # Define output file paths
+            final_video_path = str(project_output_dir / f"final_{video_name}_{'+'.join(languages)}.mp4")
+            original_srt_path = str(project_output_dir / f"{video_name}_original.srt")
+            translated_srt_path = str(project_output_dir / f"{video_name}_{target_lang}.srt")
+            dubbed_audio_path = str(project_output_dir / "dubbed_audio.wav")
+            metrics_path = project_output_dir / "metrics.json"
+            profile = profile or Config.PROFILE_MODE
+            if profile:
+                from core.profiling import StageProfiler
+                metrics.subscribe(StageProfiler(project_output_dir / "profile", mode=profile).handle)
+
+            # Every stage is keyed by its params + the digest of its upstream artifact,
+            # so only stages whose inputs changed are executed again.
+            cache = StageCache(force_stages=force_stages)
+            video_hash = StageCache.hash_file(video_path)
+            use_local = False
         
-        # 3. Translate
-        tracker.set_step(2, f"Translation (NLLB to {target_lang})")
-        translator = Translator(target_lang=target_lang)
-        translated_segments = translator.translate_segments(segments)
-        SubtitleGenerator.save_srt(translated_segments, translated_srt_path)
+            # 1. Extract Audio
+            metrics.start_stage("extract", "Audio Extraction (Extracting Wav)")
+            extract_key = cache.make_key("extract", {"codec": "pcm_s16le", "sample_rate": 16000, "channels": 1}, [video_hash])
+            extract_entry = cache.get("extract", extract_key)
+            if extract_entry is None:
+                # Decode once straight from the ffmpeg pipe; every stage below shares this buffer
+                audio = AudioProcessor.decode_pcm(video_path, spill_path=workspace.path("original_audio.f32"))
+                extract_entry = cache.put_file("extract", extract_key,
+                                               AudioProcessor.write_wav(*audio, workspace.path("original_audio.wav")))
+            else:
+                audio = AudioProcessor.load_wav(extract_entry.path)
+            metrics.media_duration = len(audio[0]) / audio[1]
         
-        # 4. TTS (F5-TTS Voice Cloning)
-        tracker.set_step(3, "TTS Generation (F5-TTS Cloning)")
-        tts = TTSProcessor()
-        dubbed_audio_path = str(project_output_dir / "dubbed_audio.wav")
-        # Pass the original audio path for speaker cloning
-        await tts.generate_full_audio(translated_segments, audio_path, dubbed_audio_path)
-        tts.unload()
-        cleanup_vram()
+            # 2. ASR (Whisper)
+            metrics.start_stage("asr", "ASR Transcription (Whisper Large-v3)")
+            asr = ASRProcessor()
+            asr_key = cache.make_key("asr", dict(
+                asr.describe(),
+                model=Config.WHISPER_MODEL_SIZE,
+                compute_type=CPU_COMPUTE_TYPE if Config.ASR_PARALLEL_WORKERS > 1 else Config.WHISPER_COMPUTE_TYPE,
+                chunks=Config.ASR_PARALLEL_WORKERS * Config.ASR_CHUNKS_PER_WORKER if Config.ASR_PARALLEL_WORKERS > 1 else 1,
+                store="npz",
+            ), [extract_entry.digest])
+            def translate_params(lang):
+                return {
+                    "source_lang": Config.TRANSLATE_SOURCE_LANG,
+                    "target_lang": lang,
+                    "backend": Translator.backend_id(use_local),
+                    "store": "npz",
+                }
+            # Everything that changes the rendered dub: batching, clip fitting and reference selection
+            tts_params = {"backend": "f5-tts", "batched": Config.TTS_BATCHED,
+                          "stretch": {"min_speed": Config.TTS_STRETCH_MIN_SPEED, "max_speed": Config.TTS_STRETCH_MAX_SPEED,
+                                      "tolerance": Config.TTS_STRETCH_TOLERANCE},
+                          "reference": ReferenceVoiceManager.describe()}
+
+            def put_translation(lang, store):
+                """
+                Caches a finished translation. One with failed segments (source text kept) goes under
+                a key that is never looked up, so the next run translates it again instead of hitting it.
+                """
+                params = dict(translate_params(lang), incomplete=True) if store.errors else translate_params(lang)
+                return cache.put_segments("translate", cache.make_key("translate", params, [segments_entry.digest]), store)
+
+            def translate_to(lang):
+                """Cached translation of the (resegmented) transcript; returns the cache entry."""
+                translate_key = cache.make_key("translate", translate_params(lang), [segments_entry.digest])
+                entry = cache.get("translate", translate_key)
+                if entry is None:
+                    with heavy_stage():
+                        translator = Translator(target_lang=lang, use_local=use_local, memory=TranslationMemory())
+                        entry = put_translation(lang, translator.translate_segments(segments))
+                return entry
+
+            async def dub(translate_entry, translated_segments, output_path):
+                """Cached F5-TTS rendering of one translation into output_path."""
+                tts_key = cache.make_key("tts", tts_params, [translate_entry.digest, extract_entry.digest])
+                entry = cache.get("tts", tts_key)
+                if entry is None:
+                    tts = TTSProcessor()
+                    # Pass the decoded original audio for speaker cloning
+                    with heavy_stage():
+                        await tts.generate_full_audio(translated_segments, audio, output_path)
+                    tts.unload()
+                    cleanup_vram()
+                    cache.put_file("tts", tts_key, output_path)
+                else:
+                    shutil.copyfile(entry.path, output_path)
+            # Splits long segments / merges fragments so TTS chunks are evenly sized
+            resegmenter = Resegmenter() if Config.RESEGMENT else None
+            asr_entry = cache.get("asr", asr_key)
+            segments_entry = translate_entry = tts_entry = None
+
+            if asr_entry is None and Config.STREAMING_PIPELINE and not fan_out:
+                # ASR, translation and TTS overlap; results are cached as if run one by one
+                translator = Translator(target_lang=target_lang, use_local=use_local, memory=TranslationMemory())
+                tts = TTSProcessor()
+                pipeline = StreamingPipeline(asr, translator, tts, resegmenter=resegmenter)
+                with heavy_stage():
+                    asr_segments, segments, translated_segments = await pipeline.run(audio, dubbed_audio_path)
+                asr.unload()
+                tts.unload()
+                cleanup_vram()
+                asr_entry = segments_entry = cache.put_segments("asr", asr_key, SegmentStore.from_segments(asr_segments))
+                if resegmenter is not None:
+                    # Streaming only splits (merging would wait on the next segment), hence its own key
+                    resegment_key = cache.make_key("resegment", dict(resegmenter.describe(), merge=False),
+                                                   [asr_entry.digest])
+                    segments_entry = cache.put_segments("resegment", resegment_key, SegmentStore.from_segments(segments))
+                translate_entry = put_translation(target_lang, SegmentStore.from_segments(translated_segments))
+                # Streaming renders segment by segment whatever TTS_BATCHED says; key it as such
+                tts_key = cache.make_key("tts", dict(tts_params, batched=False), [translate_entry.digest,
+                                                                                 extract_entry.digest])
+                tts_entry = cache.put_file("tts", tts_key, dubbed_audio_path)
+
+            if asr_entry is None:
+                with heavy_stage():
+                    asr_entry = cache.put_segments("asr", asr_key, asr.transcribe(audio))
+                asr.unload() 
+                cleanup_vram()
+            if segments_entry is None:
+                segments_entry = asr_entry
+                if resegmenter is not None:
+                    resegment_key = cache.make_key("resegment", dict(resegmenter.describe(), merge=True),
+                                                   [asr_entry.digest])
+                    segments_entry = cache.get("resegment", resegment_key)
+                    if segments_entry is None:
+                        segments_entry = cache.put_segments("resegment", resegment_key,
+                                                            resegmenter.resegment(asr_entry.load_segments()))
+            segments = segments_entry.load_segments()
+            SubtitleGenerator.save_srt(segments, original_srt_path)
         
-        # 5. LipSync (MuseTalk)
-        tracker.set_step(4, "Lip-Syncing (MuseTalk Syncing)")
-        lipsync = LipSyncProcessor()
-        # MuseTalk process
-        await lipsync.sync(video_path, dubbed_audio_path, final_video_path)
+            if fan_out:
+                # 3+4. Translation and TTS per language, concurrently within the slot limits
+                metrics.start_stage("dub", f"Translation + TTS ({', '.join(languages)})")
+                translate_slots = asyncio.Semaphore(Config.FANOUT_TRANSLATE_SLOTS)
+                # One language at a time: every language renders through the one F5-TTS model in the registry
+                tts_lock = asyncio.Lock()
+
+                async def dub_language(lang):
+                    async with translate_slots:
+                        entry = await asyncio.to_thread(translate_to, lang)
+                    translated = entry.load_segments()
+                    srt_path = str(project_output_dir / f"{video_name}_{lang}.srt")
+                    SubtitleGenerator.save_srt(translated, srt_path)
+                    audio_path = str(project_output_dir / f"dubbed_audio_{lang}.wav")
+                    async with tts_lock:
+                        # generate_full_audio renders synchronously: its own loop in a thread keeps the others going
+                        await asyncio.to_thread(asyncio.run, dub(entry, translated, audio_path))
+                    # Encoded while later languages are still rendering; the final mux only copies
+                    encoded_path = await asyncio.to_thread(encode_audio, audio_path)
+                    return lang, encoded_path, srt_path
+
+                # A failed language doesn't cut the others short: they finish (and are cached) before the job fails
+                results = await asyncio.gather(*(dub_language(lang) for lang in languages), return_exceptions=True)
+                failed = [(lang, result) for lang, result in zip(languages, results) if isinstance(result, Exception)]
+                for lang, error in failed:
+                    print(f"❌ Dubbing {lang} failed: {error!r}")
+                if failed:
+                    raise RuntimeError(f"{len(failed)} of {len(languages)} languages failed: "
+                                       f"{', '.join(lang for lang, _ in failed)}")
+                tracks = results
+
+                # 5. One container: copied video + a dubbed track and soft subtitles per language (no lip-sync,
+                # the video stream is shared by every language)
+                metrics.start_stage("mux", f"Muxing {len(tracks)} languages")
+                mux_tracks(video_path, final_video_path, tracks, original_audio=Config.MUX_ORIGINAL_AUDIO,
+                           original_subtitles=original_srt_path if Config.MUX_ORIGINAL_SUBTITLES else None,
+                           source_lang=Config.TRANSLATE_SOURCE_LANG)
+                dubbed_outputs = [encoded_path for _, encoded_path, _ in tracks]
+            else:
+                # 3. Translate
+                metrics.start_stage("translate", f"Translation (NLLB to {target_lang})")
+                if translate_entry is None:
+                    translate_entry = translate_to(target_lang)
+                translated_segments = translate_entry.load_segments()
+                SubtitleGenerator.save_srt(translated_segments, translated_srt_path)
+
+                # 4. TTS (F5-TTS Voice Cloning)
+                metrics.start_stage("tts", "TTS Generation (F5-TTS Cloning)")
+                if tts_entry is None:
+                    await dub(translate_entry, translated_segments, dubbed_audio_path)
+
+                # 5. LipSync (MuseTalk)
+                metrics.start_stage("lipsync", "Lip-Syncing (MuseTalk Syncing)")
+                lipsync = LipSyncProcessor()
+                face_index = FaceIndex.load_or_build(video_path, cache=cache, video_hash=video_hash)
+                # MuseTalk process
+                with heavy_stage():
+                    await lipsync.sync(video_path, dubbed_audio_path, final_video_path, face_index=face_index,
+                                       segments=translated_segments, workdir=workspace.path("lipsync"),
+                                       progress=lambda value, message: metrics.set_status(
+                                           f"LivePortrait {value:.0%} {message}".rstrip()))
+                dubbed_outputs = [dubbed_audio_path]
         
-        tracker.set_step(5, "Pipeline Complete")
-        print(f"\n\n🎉 Pipeline Finished Successfully!")
-        print(f"📦 Final Result: {final_video_path}")
-        print(f"📄 Also check: {dubbed_audio_path}")
+            metrics.finish("done")
+            print(f"\n\n🎉 Pipeline Finished Successfully!")
+            print(f"📦 Final Result: {final_video_path}")
+            print(f"📄 Also check: {', '.join(dubbed_outputs)}")
+            registry_stats = get_registry().stats()
+            print(f"🧠 Model registry: {registry_stats['hits']} hits, {registry_stats['misses']} loads "
+                  f"({registry_stats['load_seconds']:.1f}s), {registry_stats['evictions']} evictions, "
+                  f"resident: {', '.join(registry_stats['resident']) or 'none'}")
+            print("📊 Stages: " + " | ".join(
+                f"{name} {stage['wall_seconds']:.1f}s" + (f" (RTF {stage['rtf']:.2f})" if stage['rtf'] is not None else "")
+                for name, stage in metrics.stages.items()))
         
-        return final_video_path
+            return final_video_path
         
-    except Exception as e:
-        print(f"\n❌ Pipeline failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return None
-    finally:
-        tracker.stop()
+        except Exception as e:
+            print(f"\n❌ Pipeline failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+        finally:
+            if metrics.status is None:
+                metrics.finish("failed")
+            if metrics_path is not None:
+                metrics.save_json(metrics_path)
+                aggregate = job_metrics.MetricsAggregate()
+                aggregate.add(metrics.to_dict())
+                aggregate.write_prometheus(metrics_path.with_suffix(".prom"))
+            job_metrics.set_active(None)
+            if tracker is not None:
+                tracker.stop()
+
+def parse_target_langs(target_lang):
+    """"en" / "en,ja,fr" / ["en", "ja"] -> unique language codes, in order."""
+    if isinstance(target_lang, str):
+        target_lang = target_lang.split(",")
+    return list(dict.fromkeys(lang.strip() for lang in target_lang if lang.strip()))
+
+def check_inputs(video_path, target_lang):
+    """Pre-flight check without loading any model stack: input, tools, output dir, model assets."""
+    from core.assets import AssetManifest
+    started = time.perf_counter()
+    ok = True
+
+    def report(passed, message, required=True):
+        nonlocal ok
+        print(f"{'✅' if passed else ('❌' if required else '⚠️')} {message}")
+        ok = ok and (passed or not required)
+
+    if video_path:
+        readable = os.path.isfile(video_path) and os.access(video_path, os.R_OK)
+        size = os.path.getsize(video_path) if readable else 0
+        report(readable and size > 0, f"Input video: {video_path}"
+               + (f" ({size / 1e6:.1f} MB)" if readable else " (missing or unreadable)"))
+    for tool in ("ffmpeg", "ffprobe"):
+        path = shutil.which(tool)
+        report(path is not None, f"{tool}: {path or 'not found on PATH'}")
+    from core.translator import NLLB_LANG_CODES
+    for lang in parse_target_langs(target_lang):
+        report(lang in NLLB_LANG_CODES, f"Target language '{lang}'"
+               + ("" if lang in NLLB_LANG_CODES else " (online translation only, no NLLB code)"), required=False)
+    report(os.access(Config.OUTPUT_DIR, os.W_OK), f"Output dir writable: {Config.OUTPUT_DIR}")
+
+    # Whisper and F5-TTS are always needed; anything else recorded (LivePortrait, NLLB) is checked too
+    from core.asr import ASRProcessor
+    manifest = AssetManifest()
+    expected = [name for name in (ASRProcessor.asset_name(), *Config.F5TTS_HF_REPOS) if name]
+    for name in dict.fromkeys(expected + list(manifest.assets)):
+        if name not in manifest.assets:
+            report(False, f"Asset '{name}' not in {manifest.path} (first run downloads it)", required=False)
+            continue
+        problems = manifest.verify(name)
+        report(not problems, f"Asset '{name}'" + (f": {problems[0]}" if problems else " ready"), required=False)
+
+    print(f"{'🟢 Ready' if ok else '🔴 Not ready'} (checked in {time.perf_counter() - started:.2f}s)")
+    return ok
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Video Trans Studio - AI video dubbing pipeline")
+    parser.add_argument("video_path", nargs="?", help="Path to the source video")
+    parser.add_argument("target_lang", nargs="?", default="en",
+                        help="Target language code, or several comma-separated (e.g. en,ja,fr) muxed into one "
+                             "file with an audio and subtitle track each (default: en)")
+    parser.add_argument(
+        "--force-stage", action="append", default=[], dest="force_stages",
+        choices=list(StageCache.STAGES) + ["all"],
+        help="Re-run a stage even if a cached result exists (repeatable)"
+    )
+    parser.add_argument("--check", action="store_true",
+                        help="Validate input, tools and model assets offline, then exit")
+    parser.add_argument("--no-progress", action="store_true", help="Disable the console progress bar")
+    parser.add_argument("--profile", nargs="?", const="full", choices=["full", "sample"],
+                        help="Profile each stage (cProfile/stack sampling + tracemalloc) into <output>/profile")
+    parser.add_argument("--tts-batch", action="store_true", help="Render TTS in length-bucketed batches per voice")
+    parser.add_argument("--stream", action="store_true", help="Overlap ASR, translation and TTS through bounded queues")
+    parser.add_argument("--asr-mode", choices=["sequential", "batched"], help="Whisper decoding mode")
+    parser.add_argument("--asr-preset", choices=list(Config.ASR_PRESETS), help="Beam width / word timing preset")
+    parser.add_argument("--asr-workers", type=int, help="Transcribe silence-split chunks in N worker processes")
+    parser.add_argument("--asr-threads", type=int, help="cpu_threads per ASR worker process")
+    parser.add_argument("--no-resegment", action="store_true",
+                        help="Keep Whisper's segmentation (no splitting of long segments / merging of fragments)")
+    parser.add_argument("--resegment-max-seconds", type=float, help="Longest segment handed to translation and TTS")
+    parser.add_argument("--source-lang", help="Source language code for translation (default: auto)")
+    parser.add_argument("--lipsync-engine", choices=["liveportrait", "stub"],
+                        help="Lip-sync worker engine (stub: protocol stand-in that copies frames)")
+    parser.add_argument("--lipsync-selective", action="store_true",
+                        help="Animate only spans with dubbed speech and a visible face; stream-copy the rest")
+
+    daemon = parser.add_argument_group("daemon mode")
+    daemon.add_argument("--daemon", action="store_true", help="Process jobs from a queue file or watched directory")
+    daemon.add_argument("--queue", help="JSON-lines job queue ({\"video_path\": ..., \"target_lang\": ...} per line)")
+    daemon.add_argument("--watch", help="Directory watched for new videos")
+    daemon.add_argument("--workers", type=int, help=f"Worker processes (default: {Config.DAEMON_WORKERS})")
+    daemon.add_argument("--exit-when-idle", action="store_true", help="Stop once every queued job has finished")
+
+    args = parser.parse_args(argv)
+    if args.daemon and not (args.queue or args.watch):
+        parser.error("--daemon needs --queue or --watch")
+    if not args.daemon and not args.check and not args.video_path:
+        parser.error("video_path is required (or use --daemon)")
+    return args
+
+def config_overrides(args):
+    """Config attributes selected on the command line (also forwarded to daemon workers)."""
+    overrides = {}
+    if args.profile:
+        overrides["PROFILE_MODE"] = args.profile
+    if args.no_progress:
+        overrides["PROGRESS_BAR"] = False
+    if args.tts_batch:
+        overrides["TTS_BATCHED"] = True
+    if args.stream:
+        overrides["STREAMING_PIPELINE"] = True
+    if args.asr_mode:
+        overrides["ASR_MODE"] = args.asr_mode
+    if args.asr_preset:
+        overrides["ASR_PRESET"] = args.asr_preset
+    if args.asr_workers:
+        overrides["ASR_PARALLEL_WORKERS"] = args.asr_workers
+    if args.asr_threads:
+        overrides["ASR_CPU_THREADS"] = args.asr_threads
+    if args.no_resegment:
+        overrides["RESEGMENT"] = False
+    if args.resegment_max_seconds:
+        overrides["RESEGMENT_MAX_SECONDS"] = args.resegment_max_seconds
+    if args.source_lang:
+        overrides["TRANSLATE_SOURCE_LANG"] = args.source_lang
+    if args.lipsync_engine:
+        overrides["LIPSYNC_ENGINE"] = args.lipsync_engine
+    if args.lipsync_selective:
+        overrides["LIPSYNC_SELECTIVE"] = True
+    return overrides
+
+def apply_config(overrides):
+    for name, value in overrides.items():
+        setattr(Config, name, value)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <video_path> [target_lang]")
-        sys.exit(1)
-        
-    video_input = sys.argv[1]
-    lang_input = sys.argv[2] if len(sys.argv) > 2 else "en"
+    args = parse_args()
+    overrides = config_overrides(args)
+    apply_config(overrides)
+
+    if args.check:
+        sys.exit(0 if check_inputs(args.video_path, args.target_lang) else 1)
+
+    if args.daemon:
+        from core.jobs import JobDaemon, QueueFileSource, WatchDirSource
+        # In daemon mode a positional argument is the default target language for watched files
+        target_lang = args.video_path or "en"
+        source = QueueFileSource(args.queue) if args.queue else WatchDirSource(args.watch, target_lang)
+        JobDaemon(source, workers=args.workers, exit_when_idle=args.exit_when_idle,
+                  config_overrides=overrides).run()
+        sys.exit(0)
     
-    import asyncio
-    asyncio.run(run_pipeline(video_input, lang_input))
\ No newline at end of file
+    asyncio.run(run_pipeline(args.video_path, args.target_lang, force_stages=args.force_stages))
@@ -0,0 +1,132 @@
+"""
+OnlineTranslationEngine + GoogleWebBackend against a local stand-in of the gtx endpoint
+(http.server on a free port): packing, pack splitting, retry/backoff on 429/5xx.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from core.online_translation import GoogleWebBackend, OnlineTranslationEngine, TranslationError
+
+class StandIn:
+    """
+    Records every request and answers from a script of status codes (200 once it runs out).
+    merge_lines: answer multi-line requests with the lines joined, as the real service sometimes does.
+    """
+    def __init__(self, statuses=(), merge_lines=False):
+        self.statuses = list(statuses)
+        self.merge_lines = merge_lines
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def respond(self, query, text):
+        with self.lock:
+            self.requests.append(text)
+            status = self.statuses.pop(0) if self.statuses else 200
+        if status != 200:
+            return status, b"{}"
+        lines = text.split("\n")
+        if self.merge_lines and len(lines) > 1:
+            lines = [" ".join(lines)]
+        target = query["tl"][0]
+        # gtx shape: [[["translated chunk", "source chunk", ...], ...], ...]
+        chunks = [[f"[{target}] {line}" + ("\n" if i < len(lines) - 1 else ""), line] for i, line in enumerate(lines)]
+        return 200, json.dumps([chunks]).encode("utf-8")
+
+@pytest.fixture
+def server():
+    """Yields (start(stand_in) -> base_url); the server is shut down afterwards."""
+    servers = []
+
+    def start(stand_in):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+                status, payload = stand_in.respond(parse_qs(urlparse(self.path).query), parse_qs(body)["q"][0])
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_port}/translate_a/single"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+def make_engine(base_url, **kwargs):
+    options = dict(max_workers=2, max_chars=5000, retries=3, backoff=0.01)
+    options.update(kwargs)
+    return OnlineTranslationEngine(backend=GoogleWebBackend(base_url=base_url, timeout=5), **options)
+
+def test_packs_texts_into_one_request(server):
+    stand_in = StandIn()
+    engine = make_engine(server(stand_in))
+    texts = ["first line", "second   line", "third"]
+    results = engine.translate(texts, "zh", "en")
+    assert results == [("[en] first line", None), ("[en] second line", None), ("[en] third", None)]
+    assert stand_in.requests == ["first line\nsecond line\nthird"]
+
+def test_packs_respect_max_chars(server):
+    stand_in = StandIn()
+    engine = make_engine(server(stand_in), max_chars=25)
+    texts = ["aaaaaaaaaa", "bbbbbbbbbb", "cccccccccc", "dddddddddd"]
+    results = engine.translate(texts, "zh", "ja")
+    assert [r for r, _ in results] == [f"[ja] {t}" for t in texts]
+    assert sorted(stand_in.requests) == ["aaaaaaaaaa\nbbbbbbbbbb", "cccccccccc\ndddddddddd"]
+
+def test_merged_pack_falls_back_to_single_texts(server):
+    stand_in = StandIn(merge_lines=True)
+    engine = make_engine(server(stand_in))
+    texts = ["one", "two", "three"]
+    results = engine.translate(texts, "zh", "en")
+    assert results == [("[en] one", None), ("[en] two", None), ("[en] three", None)]
+    # The packed request, then one request per text
+    assert stand_in.requests == ["one\ntwo\nthree", "one", "two", "three"]
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retries_transient_status_with_backoff(server, status):
+    stand_in = StandIn(statuses=[status, status])
+    engine = make_engine(server(stand_in), backoff=0.05)
+    started = time.perf_counter()
+    results = engine.translate(["hello"], "zh", "en")
+    elapsed = time.perf_counter() - started
+    assert results == [("[en] hello", None)]
+    assert len(stand_in.requests) == 3
+    # Exponential backoff: at least 0.05 s + 0.1 s of sleep before the third attempt
+    assert elapsed >= 0.15
+
+def test_gives_up_after_retries(server):
+    stand_in = StandIn(statuses=[503] * 10)
+    engine = make_engine(server(stand_in), retries=2)
+    results = engine.translate(["hello"], "zh", "en")
+    assert results == [(None, "HTTP 503")]
+    assert len(stand_in.requests) == 3
+
+def test_does_not_retry_client_errors(server):
+    stand_in = StandIn(statuses=[400])
+    engine = make_engine(server(stand_in))
+    results = engine.translate(["hello"], "zh", "en")
+    assert results == [(None, "HTTP 400")]
+    assert len(stand_in.requests) == 1
+
+def test_connection_errors_are_retryable():
+    # A port nobody listens on: connection refused
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    backend = GoogleWebBackend(base_url=f"http://127.0.0.1:{port}/translate_a/single", timeout=2)
+    with pytest.raises(TranslationError) as excinfo:
+        backend.translate("hello", "zh", "en")
+    assert excinfo.value.retryable